@@ -14,3 +14,9 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
 
 application = get_asgi_application()
+
+# Fill the response cache for the hot queries without delaying startup. The
+# warming runs on its own thread, outside the event loop.
+from weather.services.warmup import warm_on_startup  # noqa: E402
+
+warm_on_startup()
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import json
 import os
 from pathlib import Path
 from dotenv import load_dotenv
@@ -55,6 +56,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "weather.middleware.RequestProfilingMiddleware",
 ]
 
 ROOT_URLCONF = "core.urls"
@@ -133,6 +135,104 @@ STATIC_URL = "static/"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Weather ingest
+# Streaming mode processes the downloaded data in date-ordered chunks and
+# writes each chunk as soon as it is final, keeping memory bounded.
+
+WEATHER_INGEST_STREAMING = (
+    os.environ.get("WEATHER_INGEST_STREAMING", "false").lower() == "true"
+)
+WEATHER_INGEST_CHUNK_SIZE = int(os.environ.get("WEATHER_INGEST_CHUNK_SIZE", 5000))
+# Rows held back while a column waits for the value ending its gap. Beyond
+# this the open gaps are filled with their last value, as at the end of the
+# data, and the rows are written.
+WEATHER_INGEST_MAX_CARRY_ROWS = int(
+    os.environ.get("WEATHER_INGEST_MAX_CARRY_ROWS", 20000)
+)
+
+# Local CSV/Parquet files merged with the Hungaromet downloads, as a JSON list:
+# [{"city": "Budapest", "name": "my_station", "path": "/data/bp.csv",
+#   "priority": 30, "coverage": ["2020-01-01", null],
+#   "column_map": {"date": "Time", "max": "t_max"}}]
+# Higher priority wins per value; the Hungaromet sources use 20 and 10.
+WEATHER_FILE_SOURCES = json.loads(os.environ.get("WEATHER_FILE_SOURCES", "[]"))
+
+# Optional local columnar read replica (memory-mapped .npy files per city and
+# column) used by the analytics endpoints. Disabled when unset.
+WEATHER_COLUMNAR_STORE_DIR = os.environ.get("WEATHER_COLUMNAR_STORE_DIR")
+
+# Rolling-average windows (days) kept as materialized series per city and
+# refreshed from the first changed date after every ingest. Other windows are
+# computed on request.
+WEATHER_ROLLING_WINDOWS = [
+    int(window)
+    for window in os.environ.get("WEATHER_ROLLING_WINDOWS", "7,30,365").split(",")
+    if window.strip()
+]
+
+# Host of the Hungaromet open data files. Point it at
+# `manage.py fake_hungaromet_server` (e.g. http://127.0.0.1:8765) to run the
+# collection offline.
+HUNGAROMET_BASE_URL = os.environ.get("HUNGAROMET_BASE_URL", "https://odp.met.hu")
+
+# Per-stage duration histograms and row/byte counters, exposed at /metrics in
+# the Prometheus text format. The endpoint is unauthenticated and reveals
+# internal row and byte counts, so it is off by default; when enabling it,
+# only let the scraper reach /metrics. Tracing creates OpenTelemetry spans per
+# stage and needs the opentelemetry-api package (plus an SDK/exporter to ship
+# them).
+WEATHER_METRICS_ENABLED = (
+    os.environ.get("WEATHER_METRICS_ENABLED", "false").lower() == "true"
+)
+WEATHER_TRACING_ENABLED = (
+    os.environ.get("WEATHER_TRACING_ENABLED", "false").lower() == "true"
+)
+
+# Opt-in request profiling: Server-Timing / X-Query-Count headers, per-endpoint
+# percentiles at /api/v1/debug/profile/ and a log entry with the slowest
+# statements and their EXPLAIN plans for requests slower than the threshold.
+WEATHER_PROFILING_ENABLED = (
+    os.environ.get("WEATHER_PROFILING_ENABLED", "false").lower() == "true"
+)
+WEATHER_PROFILING_SLOW_MS = float(os.environ.get("WEATHER_PROFILING_SLOW_MS", 500))
+WEATHER_PROFILING_TOP_QUERIES = int(os.environ.get("WEATHER_PROFILING_TOP_QUERIES", 3))
+# Requests kept per endpoint for the percentiles.
+WEATHER_PROFILING_WINDOW = int(os.environ.get("WEATHER_PROFILING_WINDOW", 1000))
+
+# max-age (seconds) of cacheable GET responses of the read endpoints. Clients
+# revalidate with If-None-Match afterwards and get 304 until data changes.
+WEATHER_HTTP_CACHE_MAX_AGE = int(os.environ.get("WEATHER_HTTP_CACHE_MAX_AGE", 60))
+
+# Rendered analytics responses are cached per data version and content coding
+# in this Django cache (the per-process memory cache unless CACHES is set), so
+# repeated reads skip rendering and compression. A timeout of 0 disables it.
+# Encodings are offered in preference order; zstd needs Python 3.14+ or the
+# zstandard package and is skipped otherwise. Smaller bodies stay uncompressed.
+WEATHER_RESPONSE_CACHE = os.environ.get("WEATHER_RESPONSE_CACHE", "default")
+WEATHER_RESPONSE_CACHE_TIMEOUT = int(
+    os.environ.get("WEATHER_RESPONSE_CACHE_TIMEOUT", 3600)
+)
+WEATHER_RESPONSE_ENCODINGS = [
+    encoding.strip()
+    for encoding in os.environ.get("WEATHER_RESPONSE_ENCODINGS", "zstd,gzip").split(",")
+    if encoding.strip()
+]
+WEATHER_RESPONSE_COMPRESS_MIN_BYTES = int(
+    os.environ.get("WEATHER_RESPONSE_COMPRESS_MIN_BYTES", 1024)
+)
+
+# Cache warming: after an ingest (for the ingested city) and when a WSGI or ASGI
+# worker starts, the responses of the hot rolling-average queries are computed
+# into the response cache on a background thread. Hot queries are
+# WEATHER_WARM_QUERIES, a JSON list like
+#   [{"city": "Budapest", "window": 30, "start_date": "2000-01-01"}]
+# plus the WEATHER_WARM_TOP_QUERIES most requested ones seen (shared between
+# workers through WEATHER_RESPONSE_CACHE). Cities without any get the full
+# history of each WEATHER_ROLLING_WINDOWS window.
+WEATHER_WARM_ENABLED = os.environ.get("WEATHER_WARM_ENABLED", "true").lower() == "true"
+WEATHER_WARM_QUERIES = json.loads(os.environ.get("WEATHER_WARM_QUERIES", "[]"))
+WEATHER_WARM_TOP_QUERIES = int(os.environ.get("WEATHER_WARM_TOP_QUERIES", 20))
+
 LOG_FILE_PATH = os.path.join(BASE_DIR, "django_app.log")
 
 LOGGING = {
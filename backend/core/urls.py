@@ -18,7 +18,10 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from weather.views import MetricsAPIView
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/v1/", include("weather.urls")),
+    path("metrics", MetricsAPIView.as_view(), name="metrics"),
 ]
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
 
 application = get_wsgi_application()
+
+# Fill the response cache for the hot queries without delaying startup.
+from weather.services.warmup import warm_on_startup  # noqa: E402
+
+warm_on_startup()
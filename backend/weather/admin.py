@@ -1,5 +1,6 @@
 from django.contrib import admin
 
-from .models import WeatherData
+from .models import DataQualityReport, WeatherData
 
 admin.site.register(WeatherData)
+admin.site.register(DataQualityReport)
@@ -1,6 +1,15 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class WeatherConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "weather"
+
+    def ready(self):
+        from weather.utils import metrics
+
+        metrics.configure(
+            metrics=settings.WEATHER_METRICS_ENABLED,
+            tracing=settings.WEATHER_TRACING_ENABLED,
+        )
@@ -0,0 +1,167 @@
+import hashlib
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import logging
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+logger = logging.getLogger("weather")
+
+
+class FakeHungarometServer:
+    """
+    Local stand-in for the Hungaromet open data host.
+
+    Serves archives (see ``synthetic.hungaromet_archives``) at their
+    upstream URL paths, so the real fetchers can be pointed at it through
+    HUNGAROMET_BASE_URL. Per-request latency, a bandwidth cap, a random
+    5xx error rate and ETag / If-None-Match handling can be injected to
+    measure concurrent fetching, caching and retries reproducibly.
+    """
+
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(
+        self,
+        archives: dict[str, bytes],
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        bandwidth: int | None = None,
+        error_rate: float = 0.0,
+        error_status: int = HTTPStatus.SERVICE_UNAVAILABLE,
+        etag: bool = True,
+        seed: int = 0,
+    ):
+        self.archives = archives
+        self.etags = {
+            path: f'"{hashlib.sha1(content).hexdigest()}"'
+            for path, content in archives.items()
+        }
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.etag = etag
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self.stats = {
+            "requests": 0,
+            "ok": 0,
+            "not_modified": 0,
+            "errors": 0,
+            "not_found": 0,
+            "bytes_sent": 0,
+        }
+
+        self.httpd = ThreadingHTTPServer((host, port), _FakeHungarometHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.fake = self
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def serve_forever(self) -> None:
+        self.httpd.serve_forever()
+
+    def start(self) -> "FakeHungarometServer":
+        """Serve from a background thread."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "FakeHungarometServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def count(self, key: str, value: int = 1) -> None:
+        with self._lock:
+            self.stats[key] += value
+
+    def should_fail(self) -> bool:
+        if not self.error_rate:
+            return False
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+
+class _FakeHungarometHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        self._respond(send_body=True)
+
+    def do_HEAD(self) -> None:
+        self._respond(send_body=False)
+
+    def _respond(self, send_body: bool) -> None:
+        fake: FakeHungarometServer = self.server.fake
+        fake.count("requests")
+        if fake.latency:
+            time.sleep(fake.latency)
+
+        path = urlsplit(self.path).path
+        content = fake.archives.get(path)
+        if content is None:
+            fake.count("not_found")
+            self._send_empty(HTTPStatus.NOT_FOUND)
+            return
+        if fake.should_fail():
+            fake.count("errors")
+            self._send_empty(fake.error_status)
+            return
+
+        etag = fake.etags[path]
+        if fake.etag and etag in self.headers.get("If-None-Match", ""):
+            fake.count("not_modified")
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/zip")
+        self.send_header("Content-Length", str(len(content)))
+        if fake.etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        if send_body:
+            self._write_throttled(content, fake)
+        fake.count("ok")
+
+    def _send_empty(self, status: int) -> None:
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _write_throttled(self, content: bytes, fake: FakeHungarometServer) -> None:
+        start = time.perf_counter()
+        for offset in range(0, len(content), fake.CHUNK_SIZE):
+            chunk = content[offset : offset + fake.CHUNK_SIZE]
+            if fake.bandwidth:
+                # Hold each chunk back until the cap allows it to be sent.
+                due = (offset + len(chunk)) / fake.bandwidth
+                wait = due - (time.perf_counter() - start)
+                if wait > 0:
+                    time.sleep(wait)
+            self.wfile.write(chunk)
+            fake.count("bytes_sent", len(chunk))
+
+    def log_message(self, format: str, *args) -> None:
+        logger.debug(f"Fake Hungaromet server: {format % args}")
@@ -0,0 +1,312 @@
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from datetime import date, timedelta
+import http.client
+import logging
+import random
+import re
+import threading
+import time
+from urllib.parse import urlencode, urlsplit
+
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.core.wsgi import get_wsgi_application
+import pandas as pd
+
+from weather.benchmarks.synthetic import SyntheticCity, generate_daily_series
+from weather.repositories.weather_repository import (
+    WeatherDataRepository,
+    WeatherRecordBatch,
+)
+from weather.utils.profiling import percentile
+from weather.utils.weather_fetchers import HungarometSource
+
+
+logger = logging.getLogger("weather")
+
+
+SEED_START = date(1901, 1, 1)
+SEED_END = date(2024, 12, 31)
+
+# Upper bounds (ms) of the latency histogram buckets; the last one is open.
+HISTOGRAM_BOUNDS_MS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+_SQL_TIMING = re.compile(r"(?:^|,)\s*sql;dur=([\d.]+)")
+
+
+def seed_city(
+    repository: WeatherDataRepository,
+    city: SyntheticCity,
+    start: date = SEED_START,
+    end: date = SEED_END,
+) -> int:
+    """Store a generated daily series for ``city``; days with gaps are skipped."""
+    df = generate_daily_series(start, end, seed=city.seed)
+    columns = df[["tx", "ta", "tn"]].to_numpy(dtype="float64")
+    complete = (columns != HungarometSource.NA).all(axis=1)
+    times = pd.to_datetime(df["Time"][complete].astype(str), format="%Y%m%d")
+    batch = WeatherRecordBatch(
+        city=city.name,
+        time=times.to_numpy(dtype="datetime64[D]").tolist(),
+        t_max=columns[complete, 0].tolist(),
+        t_mean=columns[complete, 1].tolist(),
+        t_min=columns[complete, 2].tolist(),
+    )
+    repository.save_all(batch)
+    return len(batch)
+
+
+@dataclass(frozen=True)
+class LoadRequest:
+    scenario: str
+    method: str
+    path: str
+
+
+class RequestMix:
+    """
+    Random requests against the read and collection endpoints.
+
+    Rolling-average requests pick a city, a window and a range (the last
+    N days of the seeded history, or all of it for None); ``collect_share``
+    of the requests go to the collection endpoint instead.
+    """
+
+    ROLLING_AVERAGE_PATH = "/api/v1/weather/rolling-average/"
+    COLLECT_PATH = "/api/v1/weather/collect-data/"
+
+    def __init__(
+        self,
+        cities: list[str],
+        windows: list[int],
+        ranges: list[int | None],
+        collect_share: float = 0.0,
+        end: date = SEED_END,
+    ):
+        self.cities = cities
+        self.windows = windows
+        self.ranges = ranges
+        self.collect_share = collect_share
+        self.end = end
+
+    def next(self, rng: random.Random) -> LoadRequest:
+        if rng.random() < self.collect_share:
+            return LoadRequest("collect", "POST", self.COLLECT_PATH)
+
+        window = rng.choice(self.windows)
+        days = rng.choice(self.ranges)
+        params = {"city": rng.choice(self.cities), "window": window}
+        if days is not None:
+            params["start_date"] = (self.end - timedelta(days=days)).isoformat()
+            params["end_date"] = self.end.isoformat()
+        return LoadRequest(
+            f"rolling_average w{window} {f'{days}d' if days else 'all'}",
+            "GET",
+            f"{self.ROLLING_AVERAGE_PATH}?{urlencode(params)}",
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class Sample:
+    scenario: str
+    status: int
+    latency: float
+    bytes: int
+    query_count: int | None
+    sql_time: float | None
+
+
+class LoadRunner:
+    """
+    Sends requests from ``concurrency`` threads, each over its own
+    keep-alive connection, until ``requests`` were sent or ``duration``
+    seconds passed. The first ``warmup`` requests are not recorded.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        mix: RequestMix,
+        concurrency: int,
+        requests: int,
+        duration: float | None = None,
+        warmup: int = 0,
+        seed: int = 0,
+        timeout: float = 60.0,
+    ):
+        self.base_url = base_url
+        self.mix = mix
+        self.concurrency = concurrency
+        self.requests = requests
+        self.duration = duration
+        self.warmup = warmup
+        self.seed = seed
+        self.timeout = timeout
+
+        self._lock = threading.Lock()
+        self._issued = 0
+        self._samples: list[Sample] = []
+
+    def run(self) -> dict:
+        self._issued = 0
+        self._samples = []
+        deadline = None
+        if self.duration is not None:
+            deadline = time.perf_counter() + self.duration
+
+        workers = [
+            threading.Thread(
+                target=self._work, args=(random.Random(self.seed + i), deadline)
+            )
+            for i in range(self.concurrency)
+        ]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+        return summarize_samples(self._samples, elapsed, self.concurrency)
+
+    def _take(self) -> int | None:
+        """Index of the next request, or None when the budget is spent."""
+        with self._lock:
+            if self._issued >= self.requests + self.warmup:
+                return None
+            self._issued += 1
+            return self._issued - 1
+
+    def _work(self, rng: random.Random, deadline: float | None) -> None:
+        url = urlsplit(self.base_url)
+        conn = http.client.HTTPConnection(url.hostname, url.port, timeout=self.timeout)
+        try:
+            while deadline is None or time.perf_counter() < deadline:
+                index = self._take()
+                if index is None:
+                    break
+                sample = self._send(conn, self.mix.next(rng))
+                if index >= self.warmup:
+                    with self._lock:
+                        self._samples.append(sample)
+        finally:
+            conn.close()
+
+    def _send(self, conn: http.client.HTTPConnection, request: LoadRequest) -> Sample:
+        start = time.perf_counter()
+        try:
+            conn.request(request.method, request.path)
+            response = conn.getresponse()
+            body = response.read()
+        except (OSError, http.client.HTTPException) as e:
+            conn.close()
+            logger.debug(f"Load request {request.path} failed: {e}")
+            return Sample(
+                request.scenario, 0, time.perf_counter() - start, 0, None, None
+            )
+        latency = time.perf_counter() - start
+
+        query_count = response.getheader("X-Query-Count")
+        sql = _SQL_TIMING.search(response.getheader("Server-Timing") or "")
+        return Sample(
+            request.scenario,
+            response.status,
+            latency,
+            len(body),
+            int(query_count) if query_count is not None else None,
+            float(sql.group(1)) / 1000 if sql else None,
+        )
+
+
+def summarize_samples(samples: list[Sample], elapsed: float, concurrency: int) -> dict:
+    by_scenario: dict[str, list[Sample]] = defaultdict(list)
+    for sample in samples:
+        by_scenario[sample.scenario].append(sample)
+
+    return {
+        "concurrency": concurrency,
+        "elapsed": elapsed,
+        "scenarios": {
+            "all": _summarize(samples, elapsed),
+            **{
+                scenario: _summarize(group, elapsed)
+                for scenario, group in sorted(by_scenario.items())
+            },
+        },
+    }
+
+
+def _summarize(samples: list[Sample], elapsed: float) -> dict:
+    if not samples:
+        return {"requests": 0}
+
+    latencies = [s.latency for s in samples]
+    errors = sum(1 for s in samples if not 200 <= s.status < 400)
+    queries = [s.query_count for s in samples if s.query_count is not None]
+    sql_times = [s.sql_time for s in samples if s.sql_time is not None]
+
+    histogram = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+    for latency in latencies:
+        histogram[_bucket(latency * 1000)] += 1
+
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "error_rate": errors / len(samples),
+        "statuses": dict(sorted(Counter(s.status for s in samples).items())),
+        "throughput": len(samples) / elapsed if elapsed else None,
+        "bytes": sum(s.bytes for s in samples),
+        "mean": sum(latencies) / len(latencies),
+        "median": percentile(latencies, 50),
+        **{f"p{q}": percentile(latencies, q) for q in (90, 95, 99)},
+        "max": max(latencies),
+        "histogram": {
+            "bounds_ms": HISTOGRAM_BOUNDS_MS,
+            "counts": histogram,
+        },
+        "queries": (
+            {"mean": sum(queries) / len(queries), "max": max(queries)}
+            if queries
+            else None
+        ),
+        "sql_mean": sum(sql_times) / len(sql_times) if sql_times else None,
+    }
+
+
+def _bucket(latency_ms: float) -> int:
+    for index, bound in enumerate(HISTOGRAM_BOUNDS_MS):
+        if latency_ms <= bound:
+            return index
+    return len(HISTOGRAM_BOUNDS_MS)
+
+
+class _QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+class LocalServer:
+    """
+    The project's WSGI application on a threaded local HTTP server, for
+    load tests without a separately started server. Client and server
+    share the process, so absolute numbers are pessimistic.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.httpd = ThreadedWSGIServer((host, port), _QuietRequestHandler)
+        self.httpd.set_app(get_wsgi_application())
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "LocalServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self._thread.join()
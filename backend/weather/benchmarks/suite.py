@@ -0,0 +1,259 @@
+from collections import defaultdict
+from dataclasses import replace
+import logging
+import platform
+import statistics
+import time
+from typing import Callable
+
+import django
+from django.db import connection
+import numpy as np
+import pandas as pd
+
+from weather.benchmarks.synthetic import (
+    SyntheticHungarometSession,
+    hungaromet_archives,
+    synthetic_cities,
+    synthetic_registry,
+)
+from weather.models import (
+    DataQualityReport,
+    RollingSeries,
+    WeatherData,
+    WeatherDataVersion,
+)
+from weather.repositories.rolling_series_repository import (
+    DjangoRollingSeriesRepository,
+)
+from weather.repositories.weather_repository import (
+    DjangoWeatherDataRepository,
+    WeatherRecordBatch,
+)
+from weather.services.analytics import RollingAverageService, RollingSeriesService
+from weather.services.weather_services import WeatherDataValidationService
+from weather.utils.utils import convert_to_batch
+from weather.utils.weather_fetchers import HungarometWeatherFetcher
+from weather.utils.weather_sources import MergeEngine
+
+
+logger = logging.getLogger("weather")
+
+
+STAGES = [
+    "parse",
+    "merge",
+    "fetch",
+    "clean",
+    "convert",
+    "save_insert",
+    "save_update",
+    "save_unchanged",
+    "rolling",
+    "rolling_series",
+    "rolling_materialized",
+]
+
+
+class BenchmarkSuite:
+    """
+    Times each collection and analytics stage on synthetic Hungaromet data.
+
+    ``scale`` is the number of generated cities, each with the full
+    1901-2024 history (~45k days). Stage times are summed over cities per
+    repetition; the reported statistics are over repetitions.
+    """
+
+    UPDATE_FRACTION = 0.1
+
+    def __init__(
+        self,
+        scale: int,
+        repeat: int = 3,
+        windows: tuple[int, ...] = (7, 30, 365),
+        base_url: str | None = None,
+    ):
+        """
+        Archives are served from memory, or downloaded over HTTP from
+        ``base_url`` (a ``FakeHungarometServer``) when it is given.
+        """
+        self.scale = scale
+        self.repeat = repeat
+        self.windows = windows
+        self.cities = synthetic_cities(scale)
+        if base_url is None:
+            session = SyntheticHungarometSession(hungaromet_archives(self.cities))
+            self.registry = synthetic_registry(self.cities, session)
+        else:
+            self.registry = synthetic_registry(self.cities, base_url=base_url)
+        self.repository = DjangoWeatherDataRepository()
+
+    def run(self) -> dict:
+        runs: dict[str, list[float]] = defaultdict(list)
+        rows: dict[str, int] = defaultdict(int)
+
+        try:
+            for repetition in range(self.repeat):
+                totals: dict[str, float] = defaultdict(float)
+                for city in self.cities:
+                    self._run_city(city.name, totals, rows if repetition == 0 else None)
+                for stage in STAGES:
+                    runs[stage].append(totals[stage])
+                logger.info(
+                    f"Benchmark {self.scale}x repetition "
+                    f"{repetition + 1}/{self.repeat} done."
+                )
+        finally:
+            self._clear([city.name for city in self.cities])
+
+        return {
+            "scale": self.scale,
+            "cities": len(self.cities),
+            "rows": rows["convert"],
+            "stages": {stage: summarize(runs[stage], rows[stage]) for stage in STAGES},
+        }
+
+    def _run_city(
+        self, city: str, totals: dict[str, float], rows: dict[str, int] | None
+    ) -> None:
+        def timed(stage: str, func: Callable, count: Callable = len):
+            start = time.perf_counter()
+            result = func()
+            totals[stage] += time.perf_counter() - start
+            if rows is not None:
+                rows[stage] += count(result)
+            return result
+
+        fetcher = HungarometWeatherFetcher(city, registry=self.registry)
+        sources = fetcher.sources()
+        engine = MergeEngine(sources)
+
+        frames = timed(
+            "parse", lambda: [src.read() for src in sources], lambda r: sum(map(len, r))
+        )
+        timed("merge", lambda: engine.merge_frames(frames))
+        merged = timed("fetch", fetcher.fetch)
+
+        validator = WeatherDataValidationService(dataframe=merged.copy())
+        timed("clean", validator.clean_data, lambda _: len(validator.df))
+        batch = timed("convert", lambda: convert_to_batch(validator.df))
+
+        self._clear([city])
+        timed(
+            "save_insert", lambda: self.repository.save_all(batch), lambda _: len(batch)
+        )
+
+        changed = self._changed_batch(batch)
+        timed(
+            "save_update",
+            lambda: self.repository.save_all(changed),
+            lambda _: len(batch),
+        )
+        timed(
+            "save_unchanged",
+            lambda: self.repository.save_all(changed),
+            lambda _: len(batch),
+        )
+
+        service = RollingAverageService(self.repository)
+        timed(
+            "rolling",
+            lambda: [service.calculate(city=city, window=w) for w in self.windows],
+            lambda r: sum(map(len, r)),
+        )
+
+        series_repository = DjangoRollingSeriesRepository()
+        series = RollingSeriesService(self.repository, series_repository, self.windows)
+        timed(
+            "rolling_series",
+            lambda: series.refresh(city),
+            lambda _: len(batch) * len(self.windows),
+        )
+        materialized = RollingAverageService(
+            self.repository, series_repository=series_repository
+        )
+        timed(
+            "rolling_materialized",
+            lambda: [materialized.calculate(city=city, window=w) for w in self.windows],
+            lambda r: sum(map(len, r)),
+        )
+
+    @staticmethod
+    def _clear(cities: list[str]) -> None:
+        """
+        Delete everything a run stores for the synthetic ``cities``, which
+        matters when it runs against the configured database.
+        """
+        for model in (
+            WeatherData,
+            WeatherDataVersion,
+            RollingSeries,
+            DataQualityReport,
+        ):
+            model.objects.filter(city__in=cities).delete()
+
+    def _changed_batch(self, batch: WeatherRecordBatch) -> WeatherRecordBatch:
+        """A copy of the batch with every n-th day's values shifted."""
+        step = max(int(1 / self.UPDATE_FRACTION), 1)
+        t_max = np.asarray(batch.t_max)
+        t_max[::step] += 0.1
+        return replace(batch, t_max=t_max.tolist())
+
+
+def summarize(seconds: list[float], rows: int) -> dict:
+    median = statistics.median(seconds)
+    return {
+        "runs": len(seconds),
+        "min": min(seconds),
+        "median": median,
+        "mean": statistics.fmean(seconds),
+        "rows": rows,
+        "rows_per_second": rows / median if median else None,
+    }
+
+
+def environment() -> dict:
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "django": django.get_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "database": connection.vendor,
+    }
+
+
+def compare(
+    current: dict,
+    baseline: dict,
+    threshold: float,
+    metric: str = "median",
+    section: str = "stages",
+) -> list[dict]:
+    """
+    Compare stage times (``metric`` of each entry in ``section``) of two
+    result documents. A stage regresses when it is more than ``threshold``
+    (e.g. 0.2 = 20%) slower.
+    """
+    rows = []
+    for scale, result in current["results"].items():
+        base = baseline.get("results", {}).get(scale)
+        if base is None:
+            continue
+        for stage, stats in result[section].items():
+            base_stats = base.get(section, {}).get(stage)
+            if not base_stats or not base_stats.get(metric) or metric not in stats:
+                continue
+            change = stats[metric] / base_stats[metric] - 1
+            rows.append(
+                {
+                    "scale": scale,
+                    "stage": stage,
+                    "baseline": base_stats[metric],
+                    "current": stats[metric],
+                    "change": change,
+                    "regression": change > threshold,
+                }
+            )
+    return rows
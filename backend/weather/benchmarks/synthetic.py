@@ -0,0 +1,188 @@
+from dataclasses import dataclass
+from datetime import date
+import io
+import zipfile
+
+import numpy as np
+import pandas as pd
+import requests
+
+from weather.utils.weather_fetchers import (
+    HungarometHomogenizedSource,
+    HungarometRecentSource,
+    HungarometSource,
+)
+from weather.utils.weather_sources import WeatherSourceRegistry
+
+
+HOMOGENIZED_FILES = {
+    "tx": HungarometHomogenizedSource.MAX_TEMPREATURE_URL,
+    "tn": HungarometHomogenizedSource.MIN_TEMPREATURE_URL,
+    "ta": HungarometHomogenizedSource.MEAN_TEMPREATURE_URL,
+}
+
+
+@dataclass(frozen=True)
+class SyntheticCity:
+    name: str
+    station_number: int
+    seed: int
+
+
+def synthetic_cities(count: int) -> list[SyntheticCity]:
+    return [
+        SyntheticCity(name=f"Synthcity{i:03d}", station_number=90000 + i, seed=i)
+        for i in range(count)
+    ]
+
+
+def generate_daily_series(
+    start: date,
+    end: date,
+    seed: int,
+    missing_rate: float = 0.001,
+    gap_count: int = 2,
+) -> pd.DataFrame:
+    """
+    Realistic-looking daily max/mean/min temperatures: a seasonal cycle,
+    a slow warming trend, autocorrelated noise, sporadic missing values
+    (``HungarometSource.NA``) and a few multi-day gaps.
+    """
+    rng = np.random.default_rng(seed)
+    days = pd.date_range(start, end, freq="D")
+    n = days.size
+
+    day_of_year = days.dayofyear.to_numpy()
+    years = (days.year - days.year[0]).to_numpy()
+    seasonal = 11.0 - 12.0 * np.cos(2 * np.pi * (day_of_year - 15) / 365.25)
+    trend = 0.015 * years
+    noise = np.zeros(n)
+    shocks = rng.normal(0, 2.0, n)
+    for i in range(1, n):
+        noise[i] = 0.7 * noise[i - 1] + shocks[i]
+    t_mean = seasonal + trend + noise
+    spread = rng.uniform(3.0, 7.0, n)
+
+    df = pd.DataFrame(
+        {
+            "Time": days.strftime("%Y%m%d").astype(int),
+            "tx": np.round(t_mean + spread, 1),
+            "ta": np.round(t_mean, 1),
+            "tn": np.round(t_mean - spread, 1),
+        }
+    )
+    for col in ("tx", "ta", "tn"):
+        df.loc[rng.random(n) < missing_rate, col] = HungarometSource.NA
+
+    keep = np.ones(n, dtype=bool)
+    for gap_start in rng.integers(0, max(n - 10, 1), gap_count):
+        keep[gap_start : gap_start + rng.integers(1, 6)] = False
+    return df[keep].reset_index(drop=True)
+
+
+def _zip(text: str, filename: str) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zfile:
+        zfile.writestr(filename, text)
+    return buffer.getvalue()
+
+
+def homogenized_archives(city: SyntheticCity) -> dict[str, bytes]:
+    """Zipped per-column CSVs in the layout of the 1901-2023 homogenized series."""
+    first, last = HungarometHomogenizedSource.coverage
+    df = generate_daily_series(first, last, seed=city.seed)
+
+    archives = {}
+    for column, url_template in HOMOGENIZED_FILES.items():
+        path = HungarometHomogenizedSource.PATH + url_template.format(city=city.name)
+        csv = df[["Time", column]].assign(EOR="EOR").to_csv(sep=";", index=False)
+        archives[path] = _zip(csv, path.rsplit("/", 1)[-1].removesuffix(".zip"))
+    return archives
+
+
+def recent_archive(city: SyntheticCity) -> dict[str, bytes]:
+    """Zipped station CSV in the layout of the 2014-2024 daily observations."""
+    first, last = HungarometRecentSource.coverage
+    df = generate_daily_series(first, last, seed=city.seed + 10_000)
+
+    observations = pd.DataFrame(
+        {
+            "StationNumber": city.station_number,
+            "StationName": city.name,
+            "Time": df["Time"],
+            "t": df["ta"],
+            "tn": df["tn"],
+            "tx": df["tx"],
+            "EOR": "EOR",
+        }
+    )
+    preamble = "".join(
+        f"# synthetic {city.name} station {city.station_number}\n" for _ in range(5)
+    )
+    filename = HungarometRecentSource.FILENAME.format(
+        station_number=city.station_number
+    )
+    csv = preamble + observations.to_csv(sep=";", index=False)
+    path = HungarometRecentSource.PATH + filename
+    return {path: _zip(csv, filename.removesuffix(".zip"))}
+
+
+def hungaromet_archives(cities: list[SyntheticCity]) -> dict[str, bytes]:
+    """All archives for the given cities, keyed by their upstream URL path."""
+    archives = {}
+    for city in cities:
+        archives.update(homogenized_archives(city))
+        archives.update(recent_archive(city))
+    return archives
+
+
+class _Response:
+    def __init__(self, url: str, content: bytes | None):
+        self.url = url
+        self.content = content or b""
+        self.status_code = 200 if content is not None else 404
+
+    def raise_for_status(self) -> None:
+        if self.status_code != 200:
+            raise requests.HTTPError(f"{self.status_code} for {self.url}")
+
+
+class SyntheticHungarometSession:
+    """In-memory stand-in for ``requests`` serving generated archives by URL suffix."""
+
+    def __init__(self, archives: dict[str, bytes]):
+        self.archives = archives
+
+    def get(self, url: str, *args, **kwargs) -> _Response:
+        for path, content in self.archives.items():
+            if url.endswith(path):
+                return _Response(url, content)
+        return _Response(url, None)
+
+
+def synthetic_registry(
+    cities: list[SyntheticCity],
+    session: SyntheticHungarometSession | None = None,
+    base_url: str | None = None,
+) -> WeatherSourceRegistry:
+    """
+    Registry wiring the Hungaromet sources of each city to an in-memory
+    session, or to a server at ``base_url`` (see ``fake_hungaromet.py``).
+    """
+    registry = WeatherSourceRegistry()
+    for city in cities:
+        registry.register(
+            city.name,
+            lambda name: HungarometHomogenizedSource(
+                name, session=session, base_url=base_url
+            ),
+            name=HungarometHomogenizedSource.name,
+        )
+        registry.register(
+            city.name,
+            lambda name, station=city.station_number: HungarometRecentSource(
+                name, station, session=session, base_url=base_url
+            ),
+            name=HungarometRecentSource.name,
+        )
+    return registry
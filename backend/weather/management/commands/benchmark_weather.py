@@ -0,0 +1,139 @@
+from contextlib import nullcontext
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from weather.benchmarks.fake_hungaromet import FakeHungarometServer
+from weather.benchmarks.suite import BenchmarkSuite, compare, environment
+from weather.benchmarks.synthetic import hungaromet_archives, synthetic_cities
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the collection and analytics stages on synthetic Hungaromet data, "
+        "without network access, and optionally compare against a baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scales",
+            nargs="+",
+            type=int,
+            default=[1],
+            help="Dataset scales to run; N means N cities of full history.",
+        )
+        parser.add_argument("--repeat", type=int, default=3)
+        parser.add_argument("--output", help="Write the JSON results to this file.")
+        parser.add_argument("--baseline", help="JSON results to compare against.")
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.2,
+            help="Relative slowdown reported as a regression (default 0.2 = 20%%).",
+        )
+        parser.add_argument(
+            "--fail-on-regression",
+            action="store_true",
+            help="Exit with an error when any stage regresses.",
+        )
+        parser.add_argument(
+            "--http",
+            action="store_true",
+            help="Download the archives from a local fake Hungaromet server.",
+        )
+        parser.add_argument(
+            "--latency",
+            type=float,
+            default=0.0,
+            help="With --http: seconds added per request.",
+        )
+        parser.add_argument(
+            "--bandwidth",
+            type=int,
+            help="With --http: response body cap in bytes per second.",
+        )
+        parser.add_argument(
+            "--use-default-db",
+            action="store_true",
+            help="Run against the configured database instead of a temporary one.",
+        )
+
+    def handle(self, *args, **options):
+        if options["repeat"] < 1 or any(scale < 1 for scale in options["scales"]):
+            raise CommandError("--repeat and --scales must be positive integers.")
+
+        baseline = None
+        if options["baseline"]:
+            baseline = json.loads(Path(options["baseline"]).read_text())
+
+        server = nullcontext()
+        if options["http"]:
+            server = FakeHungarometServer(
+                hungaromet_archives(synthetic_cities(max(options["scales"]))),
+                latency=options["latency"],
+                bandwidth=options["bandwidth"],
+            )
+
+        old_name = connection.settings_dict["NAME"]
+        if not options["use_default_db"]:
+            connection.creation.create_test_db(
+                verbosity=0, autoclobber=True, serialize=False
+            )
+        try:
+            results = {
+                "meta": {
+                    **environment(),
+                    "repeat": options["repeat"],
+                    "http": options["http"],
+                },
+                "results": {},
+            }
+            with server:
+                base_url = server.url if options["http"] else None
+                for scale in options["scales"]:
+                    self.stdout.write(f"Running benchmark at {scale}x...")
+                    result = BenchmarkSuite(
+                        scale, repeat=options["repeat"], base_url=base_url
+                    ).run()
+                    results["results"][f"{scale}x"] = result
+                    self._print_result(result)
+        finally:
+            if not options["use_default_db"]:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        if options["output"]:
+            Path(options["output"]).write_text(json.dumps(results, indent=2))
+            self.stdout.write(f"Results written to {options['output']}.")
+
+        if baseline is not None:
+            rows = compare(results, baseline, options["threshold"])
+            self._print_comparison(rows)
+            if options["fail_on_regression"] and any(r["regression"] for r in rows):
+                raise CommandError("Performance regression against the baseline.")
+
+    def _print_result(self, result: dict) -> None:
+        self.stdout.write(
+            f"{result['scale']}x: {result['cities']} cities, {result['rows']} rows"
+        )
+        for stage, stats in result["stages"].items():
+            rate = stats["rows_per_second"]
+            self.stdout.write(
+                f"  {stage:<20} median {stats['median'] * 1000:10.1f} ms"
+                f"  min {stats['min'] * 1000:10.1f} ms"
+                f"  {rate or 0:14,.0f} rows/s"
+            )
+
+    def _print_comparison(self, rows: list[dict]) -> None:
+        self.stdout.write("Comparison with baseline (median):")
+        for row in rows:
+            line = (
+                f"  {row['scale']:>5} {row['stage']:<20} "
+                f"{row['baseline'] * 1000:10.1f} ms -> {row['current'] * 1000:10.1f} ms "
+                f"({row['change']:+.1%})"
+            )
+            if row["regression"]:
+                self.stdout.write(self.style.ERROR(line + "  REGRESSION"))
+            else:
+                self.stdout.write(line)
@@ -0,0 +1,135 @@
+from dataclasses import dataclass
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+PROJECT_PACKAGES = ("weather", "core")
+
+
+@dataclass
+class ImportRecord:
+    name: str
+    self_us: int
+    cumulative_us: int
+    importer: str | None
+
+
+def parse_importtime(output: str) -> list[ImportRecord]:
+    """
+    Parse ``python -X importtime`` output. Imports are reported after
+    their own dependencies, so the importer of a module is the next line
+    with a smaller indentation.
+    """
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        depth = len(name) - len(name.lstrip())
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+
+    records = []
+    for i, (name, self_us, cumulative_us, depth) in enumerate(rows):
+        importer = next(
+            (other for other, _, _, d in rows[i + 1 :] if d < depth),
+            None,
+        )
+        records.append(ImportRecord(name, self_us, cumulative_us, importer))
+    return records
+
+
+def is_project_module(name: str | None) -> bool:
+    return name is not None and name.split(".")[0] in PROJECT_PACKAGES
+
+
+class Command(BaseCommand):
+    help = (
+        "Report the import cost of the startup path (django.setup() plus the "
+        "URLconf) and fail when heavy modules are imported by project code "
+        "or the budget is exceeded."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--module",
+            nargs="+",
+            default=[settings.ROOT_URLCONF],
+            help="Modules imported after django.setup() (default: ROOT_URLCONF).",
+        )
+        parser.add_argument(
+            "--forbid",
+            nargs="*",
+            default=["pandas", "requests", "zipfile"],
+            help="Modules that project code must not import at startup.",
+        )
+        parser.add_argument(
+            "--budget-ms",
+            type=float,
+            help="Fail when importing the modules takes longer than this.",
+        )
+        parser.add_argument("--top", type=int, default=15)
+
+    def handle(self, *args, **options):
+        code = "import django; django.setup(); " + "; ".join(
+            f"import {module}" for module in options["module"]
+        )
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            capture_output=True,
+            text=True,
+        )
+        if completed.returncode != 0:
+            raise CommandError(f"Import failed:\n{completed.stderr[-2000:]}")
+
+        records = parse_importtime(completed.stderr)
+        by_name = {record.name: record for record in records}
+        top_level = [record for record in records if record.importer is None]
+        total_ms = sum(record.cumulative_us for record in top_level) / 1000
+        modules_ms = (
+            sum(
+                by_name[module].cumulative_us
+                for module in options["module"]
+                if module in by_name
+            )
+            / 1000
+        )
+
+        self.stdout.write(
+            f"Interpreter and Django startup imports: {total_ms - modules_ms:.1f} ms"
+        )
+        self.stdout.write(
+            f"{', '.join(options['module'])}: {modules_ms:.1f} ms "
+            f"({len(records)} modules in total)"
+        )
+        self.stdout.write("Slowest imports (self time):")
+        for record in sorted(records, key=lambda r: r.self_us, reverse=True)[
+            : options["top"]
+        ]:
+            self.stdout.write(
+                f"  {record.name:<45} self {record.self_us / 1000:7.1f} ms  "
+                f"cumulative {record.cumulative_us / 1000:7.1f} ms"
+            )
+
+        problems = []
+        for name in options["forbid"]:
+            record = by_name.get(name)
+            if record is None:
+                continue
+            line = f"{name} ({record.cumulative_us / 1000:.1f} ms) imported by {record.importer}"
+            if is_project_module(record.importer):
+                problems.append(line)
+            else:
+                self.stdout.write(f"Note: {line}, outside the project.")
+
+        if options["budget_ms"] is not None and modules_ms > options["budget_ms"]:
+            problems.append(
+                f"import time {modules_ms:.1f} ms exceeds the budget of "
+                f"{options['budget_ms']:.1f} ms"
+            )
+
+        if problems:
+            raise CommandError("Startup import check failed: " + "; ".join(problems))
+        self.stdout.write(self.style.SUCCESS("Startup import check passed."))
@@ -1,27 +1,65 @@
+import argparse
+
+from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
 
-from weather.utils.utils import convert_to_records
+from weather.repositories.columnar_store import get_columnar_store
+from weather.repositories.quality_report_repository import (
+    DjangoQualityReportRepository,
+)
+from weather.repositories.rolling_series_repository import (
+    DjangoRollingSeriesRepository,
+)
 from weather.repositories.weather_repository import DjangoWeatherDataRepository
+from weather.services.warmup import CacheWarmer
 from weather.services.weather_services import (
-    WeatherDataCollectorService,
-    WeatherDataValidationService,
+    RollingSeriesService,
+    WeatherIngestPipeline,
 )
+from weather.utils.response_cache import ResponseBodyCache
 from weather.utils.weather_fetchers import HungarometWeatherFetcher
 
 
 class Command(BaseCommand):
-    def handle(self, *args, **options):
-        repository = DjangoWeatherDataRepository()
-        fetcher = HungarometWeatherFetcher(city="Budapest")
-        collector_service = WeatherDataCollectorService(fetcher=fetcher)
-
-        collector_service.collect_historical_data()
-        data = collector_service.get_data()
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--stream",
+            action=argparse.BooleanOptionalAction,
+            default=settings.WEATHER_INGEST_STREAMING,
+            help="Process and save the data in date-ordered chunks "
+            "(default: WEATHER_INGEST_STREAMING).",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=settings.WEATHER_INGEST_CHUNK_SIZE,
+            help="Number of rows per chunk in streaming mode.",
+        )
 
-        validator_service = WeatherDataValidationService(dataframe=data)
-        validator_service.clean_data()
-        clean_data = validator_service.get_cleaned_data()
+    def handle(self, *args, **options):
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be a positive integer.")
 
-        records = convert_to_records(clean_data)
+        repository = DjangoWeatherDataRepository()
+        # Warming from this short-lived process only helps the servers when
+        # they share the response cache; it then runs before exiting.
+        warmer = None
+        if settings.WEATHER_WARM_ENABLED and ResponseBodyCache().shared:
+            warmer = CacheWarmer(background=False)
+        pipeline = WeatherIngestPipeline(
+            fetcher=HungarometWeatherFetcher(city="Budapest"),
+            repository=repository,
+            report_repository=DjangoQualityReportRepository(),
+            store=get_columnar_store(),
+            rolling_series=RollingSeriesService(
+                repository,
+                DjangoRollingSeriesRepository(),
+                settings.WEATHER_ROLLING_WINDOWS,
+            ),
+            warmer=warmer,
+        )
 
-        repository.save_all(records)
+        if options["stream"]:
+            pipeline.run_streaming(chunk_size=options["chunk_size"])
+        else:
+            pipeline.run()
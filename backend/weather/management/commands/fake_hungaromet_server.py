@@ -0,0 +1,87 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from weather.benchmarks.fake_hungaromet import FakeHungarometServer
+from weather.benchmarks.synthetic import (
+    SyntheticCity,
+    hungaromet_archives,
+    synthetic_cities,
+)
+from weather.utils.weather_fetchers import HungarometWeatherFetcher
+
+
+class Command(BaseCommand):
+    help = (
+        "Serve generated Hungaromet archives in the upstream layout. "
+        "Point HUNGAROMET_BASE_URL at it to collect weather data offline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument(
+            "--cities",
+            nargs="*",
+            default=list(HungarometWeatherFetcher.CITY_STATION_NUMBERS),
+            help="Known cities to serve (default: all with a station number).",
+        )
+        parser.add_argument(
+            "--synthetic-cities",
+            type=int,
+            default=0,
+            help="Additionally serve N synthetic cities (SynthcityNNN).",
+        )
+        parser.add_argument(
+            "--latency", type=float, default=0.0, help="Seconds added per request."
+        )
+        parser.add_argument(
+            "--bandwidth", type=int, help="Response body cap in bytes per second."
+        )
+        parser.add_argument(
+            "--error-rate",
+            type=float,
+            default=0.0,
+            help="Fraction of requests answered with --error-status.",
+        )
+        parser.add_argument("--error-status", type=int, default=503)
+        parser.add_argument(
+            "--no-etag", action="store_true", help="Disable ETag / 304 responses."
+        )
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        stations = HungarometWeatherFetcher.CITY_STATION_NUMBERS
+        unknown = set(options["cities"]) - set(stations)
+        if unknown:
+            raise CommandError(
+                f"No station number for {sorted(unknown)}. Choose from {list(stations)}."
+            )
+        cities = [
+            SyntheticCity(name=name, station_number=stations[name], seed=index)
+            for index, name in enumerate(options["cities"])
+        ]
+        cities += synthetic_cities(options["synthetic_cities"])
+
+        self.stdout.write(f"Generating archives for {len(cities)} cities...")
+        server = FakeHungarometServer(
+            hungaromet_archives(cities),
+            host=options["host"],
+            port=options["port"],
+            latency=options["latency"],
+            bandwidth=options["bandwidth"],
+            error_rate=options["error_rate"],
+            error_status=options["error_status"],
+            etag=not options["no_etag"],
+            seed=options["seed"],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Serving at {server.url} (HUNGAROMET_BASE_URL={server.url})"
+            )
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.httpd.server_close()
+            self.stdout.write(f"Stopped. {server.stats}")
@@ -0,0 +1,299 @@
+from contextlib import ExitStack
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from weather.benchmarks.load import (
+    HISTOGRAM_BOUNDS_MS,
+    LoadRunner,
+    LocalServer,
+    RequestMix,
+    seed_city,
+)
+from weather.benchmarks.suite import compare, environment
+from weather.benchmarks.synthetic import SyntheticCity, synthetic_cities
+from weather.repositories.rolling_series_repository import (
+    DjangoRollingSeriesRepository,
+)
+from weather.repositories.weather_repository import DjangoWeatherDataRepository
+from weather.services.analytics import RollingSeriesService
+from weather.utils.weather_fetchers import HungarometWeatherFetcher
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive concurrent rolling-average and collection requests against a "
+        "local server and report throughput, latency percentiles, errors and "
+        "query counts, optionally compared against a baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--url",
+            help=(
+                "Base URL of a running server. By default the application is "
+                "served in-process from a temporary database with profiling on."
+            ),
+        )
+        parser.add_argument(
+            "--concurrency",
+            nargs="+",
+            type=int,
+            default=[8],
+            help="Concurrency levels to run, one after another.",
+        )
+        parser.add_argument(
+            "--requests", type=int, default=500, help="Requests per level."
+        )
+        parser.add_argument(
+            "--duration", type=float, help="Stop a level after this many seconds."
+        )
+        parser.add_argument(
+            "--warmup", type=int, default=20, help="Unrecorded requests per level."
+        )
+        parser.add_argument(
+            "--cities", type=int, default=2, help="Synthetic cities to request."
+        )
+        parser.add_argument("--windows", nargs="+", type=int, default=[7, 30, 365])
+        parser.add_argument(
+            "--ranges",
+            nargs="+",
+            default=["all", "3650", "365"],
+            help="Requested history in days before the last seeded day, or 'all'.",
+        )
+        parser.add_argument(
+            "--collect-share",
+            type=float,
+            default=0.05,
+            help="Fraction of requests sent to the collection endpoint.",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--seed-data",
+            action="store_true",
+            help="With --url or --use-default-db: store synthetic data for "
+            "synthetic cities that have none. Budapest is never seeded there.",
+        )
+        parser.add_argument(
+            "--use-default-db",
+            action="store_true",
+            help="Serve from the configured database instead of a temporary one.",
+        )
+        parser.add_argument("--output", help="Write the JSON results to this file.")
+        parser.add_argument("--baseline", help="JSON results to compare against.")
+        parser.add_argument(
+            "--metric",
+            default="p95",
+            choices=["mean", "median", "p90", "p95", "p99"],
+            help="Latency compared against the baseline (default p95).",
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.2,
+            help="Relative slowdown reported as a regression (default 0.2 = 20%%).",
+        )
+        parser.add_argument(
+            "--fail-on-regression",
+            action="store_true",
+            help="Exit with an error when any scenario regresses.",
+        )
+        parser.add_argument(
+            "--max-error-rate",
+            type=float,
+            help="Exit with an error when a level's error rate exceeds this.",
+        )
+
+    def handle(self, *args, **options):
+        if (
+            options["requests"] < 1
+            or options["cities"] < 1
+            or any(level < 1 for level in options["concurrency"])
+        ):
+            raise CommandError(
+                "--requests, --cities and --concurrency must be positive integers."
+            )
+        try:
+            ranges = [
+                None if value == "all" else int(value) for value in options["ranges"]
+            ]
+        except ValueError:
+            raise CommandError("--ranges takes day counts or 'all'.")
+
+        baseline = None
+        if options["baseline"]:
+            baseline = json.loads(Path(options["baseline"]).read_text())
+
+        cities = synthetic_cities(options["cities"])
+        mix = RequestMix(
+            [city.name for city in cities],
+            options["windows"],
+            ranges,
+            collect_share=options["collect_share"],
+        )
+
+        local = options["url"] is None
+        temporary_db = local and not options["use_default_db"]
+        if options["collect_share"] and temporary_db:
+            # The collection endpoint works on Budapest; with data present it
+            # measures the steady-state check instead of a download. Budapest
+            # is a real city, so its synthetic rows only go into the
+            # temporary database.
+            stations = HungarometWeatherFetcher.CITY_STATION_NUMBERS
+            cities.append(SyntheticCity("Budapest", stations["Budapest"], seed=1000))
+        old_name = connection.settings_dict["NAME"]
+        if temporary_db:
+            connection.creation.create_test_db(
+                verbosity=0, autoclobber=True, serialize=False
+            )
+        try:
+            if temporary_db or options["seed_data"]:
+                self._seed(cities)
+
+            results = {
+                "meta": {
+                    **environment(),
+                    "url": options["url"] or "in-process",
+                    "requests": options["requests"],
+                    "duration": options["duration"],
+                    "warmup": options["warmup"],
+                    "mix": {
+                        "cities": mix.cities,
+                        "windows": mix.windows,
+                        "ranges": options["ranges"],
+                        "collect_share": mix.collect_share,
+                    },
+                },
+                "results": {},
+            }
+            with ExitStack() as stack:
+                server = self._start_server(stack) if local else None
+                for level in options["concurrency"]:
+                    self.stdout.write(f"Running {level} concurrent clients...")
+                    runner = LoadRunner(
+                        server.url if local else options["url"],
+                        mix,
+                        concurrency=level,
+                        requests=options["requests"],
+                        duration=options["duration"],
+                        warmup=options["warmup"],
+                        seed=options["seed"],
+                    )
+                    result = runner.run()
+                    results["results"][f"c{level}"] = result
+                    self._print_result(result)
+        finally:
+            if temporary_db:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        if options["output"]:
+            Path(options["output"]).write_text(json.dumps(results, indent=2))
+            self.stdout.write(f"Results written to {options['output']}.")
+
+        problems = []
+        if options["max_error_rate"] is not None:
+            for level, result in results["results"].items():
+                rate = result["scenarios"]["all"].get("error_rate", 0.0)
+                if rate > options["max_error_rate"]:
+                    problems.append(f"{level} error rate {rate:.1%}")
+
+        if baseline is not None:
+            rows = compare(
+                results,
+                baseline,
+                options["threshold"],
+                metric=options["metric"],
+                section="scenarios",
+            )
+            self._print_comparison(rows, options["metric"])
+            if options["fail_on_regression"] and any(r["regression"] for r in rows):
+                problems.append("latency regression against the baseline")
+
+        if problems:
+            raise CommandError("Load test failed: " + "; ".join(problems))
+
+    def _seed(self, cities: list[SyntheticCity]) -> None:
+        repository = DjangoWeatherDataRepository()
+        series = RollingSeriesService(
+            repository,
+            DjangoRollingSeriesRepository(),
+            settings.WEATHER_ROLLING_WINDOWS,
+        )
+        for city in cities:
+            if repository.exists_for_city(city.name):
+                continue
+            rows = seed_city(repository, city)
+            series.refresh(city.name)
+            self.stdout.write(f"Seeded {city.name}: {rows} rows.")
+
+    def _start_server(self, stack: ExitStack) -> LocalServer:
+        """
+        Serve the application in-process until ``stack`` closes. The
+        settings stay overridden for as long, since requests read them.
+        """
+        # Profiling supplies the X-Query-Count and Server-Timing headers; the
+        # middleware is set up when the WSGI handler is created.
+        stack.enter_context(
+            override_settings(
+                DEBUG=False,
+                ALLOWED_HOSTS=["127.0.0.1", "localhost"],
+                WEATHER_PROFILING_ENABLED=True,
+                WEATHER_PROFILING_SLOW_MS=float("inf"),
+            )
+        )
+        return stack.enter_context(LocalServer())
+
+    def _print_result(self, result: dict) -> None:
+        total = result["scenarios"]["all"]
+        if not total["requests"]:
+            self.stdout.write("  No requests completed.")
+            return
+        self.stdout.write(
+            f"c{result['concurrency']}: {total['requests']} requests in "
+            f"{result['elapsed']:.2f} s, {total['throughput']:.1f} req/s, "
+            f"{total['errors']} errors ({total['error_rate']:.1%}), "
+            f"statuses {total['statuses']}"
+        )
+        self.stdout.write(
+            f"  {'scenario':<28} {'count':>6} {'p50':>9} {'p95':>9} {'p99':>9} "
+            f"{'max':>9} {'queries':>8} {'sql':>9}"
+        )
+        for scenario, stats in result["scenarios"].items():
+            queries = stats["queries"]["mean"] if stats["queries"] else None
+            sql = stats["sql_mean"]
+            self.stdout.write(
+                f"  {scenario:<28} {stats['requests']:>6} "
+                + " ".join(
+                    f"{stats[key] * 1000:7.1f}ms"
+                    for key in ("median", "p95", "p99", "max")
+                )
+                + f" {'-' if queries is None else f'{queries:.1f}':>8}"
+                + f" {'-' if sql is None else f'{sql * 1000:.1f}ms':>9}"
+            )
+
+        self.stdout.write("  Latency histogram (all):")
+        counts = total["histogram"]["counts"]
+        labels = [f"<= {bound} ms" for bound in HISTOGRAM_BOUNDS_MS]
+        labels.append(f"> {HISTOGRAM_BOUNDS_MS[-1]} ms")
+        widest = max(counts)
+        for label, count in zip(labels, counts):
+            if count:
+                bar = "#" * max(round(40 * count / widest), 1)
+                self.stdout.write(f"  {label:>12} {count:>6} {bar}")
+
+    def _print_comparison(self, rows: list[dict], metric: str) -> None:
+        self.stdout.write(f"Comparison with baseline ({metric}):")
+        for row in rows:
+            line = (
+                f"  {row['scale']:>5} {row['stage']:<28} "
+                f"{row['baseline'] * 1000:10.1f} ms -> {row['current'] * 1000:10.1f} ms "
+                f"({row['change']:+.1%})"
+            )
+            if row["regression"]:
+                self.stdout.write(self.style.ERROR(line + "  REGRESSION"))
+            else:
+                self.stdout.write(line)
@@ -0,0 +1,53 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from weather.models import RollingSeries, WeatherData
+from weather.repositories.rolling_series_repository import (
+    DjangoRollingSeriesRepository,
+)
+from weather.repositories.weather_repository import DjangoWeatherDataRepository
+from weather.services.analytics import RollingSeriesService
+
+
+class Command(BaseCommand):
+    help = (
+        "Build the materialized rolling series of cities whose series are "
+        "missing or stale, e.g. for data stored before they existed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--cities", nargs="*", help="Cities to refresh (default: all stored)."
+        )
+        parser.add_argument(
+            "--windows",
+            nargs="*",
+            type=int,
+            default=settings.WEATHER_ROLLING_WINDOWS,
+            help="Windows in days (default: WEATHER_ROLLING_WINDOWS).",
+        )
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Drop the existing series first, even when they are current.",
+        )
+
+    def handle(self, *args, **options):
+        if any(window < 1 for window in options["windows"]):
+            raise CommandError("--windows must be positive integers.")
+
+        cities = options["cities"] or list(
+            WeatherData.objects.order_by("city")
+            .values_list("city", flat=True)
+            .distinct()
+        )
+        repository = DjangoWeatherDataRepository()
+        service = RollingSeriesService(
+            repository, DjangoRollingSeriesRepository(), options["windows"]
+        )
+
+        for city in cities:
+            if options["rebuild"]:
+                RollingSeries.objects.filter(city=city).delete()
+            service.refresh(city)
+            self.stdout.write(f"{city}: windows {service.windows} up to date.")
@@ -0,0 +1,69 @@
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+from weather.utils.profiling import QueryRecorder, RequestProfile, aggregator
+
+
+logger = logging.getLogger("weather")
+
+
+class RequestProfilingMiddleware:
+    """
+    Opt-in (WEATHER_PROFILING_ENABLED) per-request profile: query count, SQL
+    time, Python time and response rendering time.
+
+    Every response gets ``Server-Timing`` and ``X-Query-Count`` headers, the
+    profile is aggregated per endpoint (see ProfilingStatsAPIView), and
+    requests slower than WEATHER_PROFILING_SLOW_MS are logged together with
+    their slowest statements and EXPLAIN plans.
+    """
+
+    def __init__(self, get_response):
+        if not settings.WEATHER_PROFILING_ENABLED:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.slow_threshold = settings.WEATHER_PROFILING_SLOW_MS / 1000
+        self.top_queries = settings.WEATHER_PROFILING_TOP_QUERIES
+        aggregator.window = settings.WEATHER_PROFILING_WINDOW
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        request.weather_serialize_time = 0.0
+        start = time.perf_counter()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        total = time.perf_counter() - start
+
+        match = request.resolver_match
+        profile = RequestProfile(
+            endpoint=match.route if match is not None else "<unresolved>",
+            method=request.method,
+            status=response.status_code,
+            total=total,
+            queries=recorder.queries,
+            serialize_time=request.weather_serialize_time,
+        )
+        aggregator.record(profile)
+
+        response["Server-Timing"] = profile.server_timing()
+        response["X-Query-Count"] = str(profile.query_count)
+
+        if total >= self.slow_threshold:
+            details = profile.to_dict(top_queries=self.top_queries, explain=True)
+            logger.warning(f"Slow request {request.path}: {json.dumps(details)}")
+        return response
+
+    def process_template_response(self, request, response):
+        """Time the rendering of DRF responses, which happens after the view."""
+        start = time.perf_counter()
+
+        def rendered(_response):
+            request.weather_serialize_time = time.perf_counter() - start
+
+        response.add_post_render_callback(rendered)
+        return response
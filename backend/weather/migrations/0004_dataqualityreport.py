@@ -0,0 +1,41 @@
+# Generated by Django 5.2.7 on 2026-10-19 05:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("weather", "0003_weatherdata_city"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DataQualityReport",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("city", models.CharField(max_length=100)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("row_count", models.IntegerField()),
+                ("issue_count", models.IntegerField()),
+                ("report", models.JSONField()),
+            ],
+            options={
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["city", "-created_at"],
+                        name="weather_dat_city_09d35e_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-19 05:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("weather", "0004_dataqualityreport"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="weatherdata",
+            name="time",
+            field=models.DateField(),
+        ),
+        migrations.AddConstraint(
+            model_name="weatherdata",
+            constraint=models.UniqueConstraint(
+                fields=("city", "time"), name="weatherdata_unique_city_time"
+            ),
+        ),
+    ]
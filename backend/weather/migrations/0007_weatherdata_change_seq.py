@@ -0,0 +1,61 @@
+# Generated by Django 5.2.7 on 2026-10-19 05:55
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_updated_at(apps, schema_editor):
+    # created_at used auto_now, so it holds the last time a row was saved.
+    WeatherData = apps.get_model("weather", "WeatherData")
+    WeatherData.objects.filter(updated_at__isnull=True).update(
+        updated_at=F("created_at")
+    )
+
+
+def backfill_change_seq(apps, schema_editor):
+    # Rows stored before change tracking get a fresh city version as their
+    # change sequence, so a feed read from since=0 returns them.
+    WeatherData = apps.get_model("weather", "WeatherData")
+    WeatherDataVersion = apps.get_model("weather", "WeatherDataVersion")
+    cities = (
+        WeatherData.objects.filter(change_seq=0)
+        .order_by("city")
+        .values_list("city", flat=True)
+        .distinct()
+    )
+    for city in list(cities):
+        version, _ = WeatherDataVersion.objects.get_or_create(city=city)
+        version.version += 1
+        version.save()
+        WeatherData.objects.filter(city=city, change_seq=0).update(
+            change_seq=version.version
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("weather", "0006_weatherdataversion"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="weatherdata",
+            name="change_seq",
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name="weatherdata",
+            name="created_at",
+            field=models.DateTimeField(auto_now_add=True),
+        ),
+        migrations.AddIndex(
+            model_name="weatherdata",
+            index=models.Index(
+                fields=["city", "change_seq", "time"],
+                name="weatherdata_city_change_seq",
+            ),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+        migrations.RunPython(backfill_change_seq, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.7 on 2026-10-19 05:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("weather", "0007_weatherdata_change_seq"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RollingSeries",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("city", models.CharField(max_length=100)),
+                ("window", models.PositiveIntegerField()),
+                ("version", models.CharField(blank=True, max_length=64)),
+                ("times", models.BinaryField(default=bytes)),
+                ("averages", models.BinaryField(default=bytes)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("city", "window"),
+                        name="rollingseries_unique_city_window",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -2,16 +2,88 @@ from django.db import models
 
 
 class WeatherData(models.Model):
-    time = models.DateField(unique=True)
+    time = models.DateField()
     t_max = models.FloatField()
     t_mean = models.FloatField()
     t_min = models.FloatField()
     city = models.CharField(max_length=100)
-    created_at = models.DateTimeField(auto_now=True)
+    created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(null=True, blank=True)
+    # City data version (WeatherDataVersion) of the save that last inserted or
+    # changed the row; 0 for rows stored before change tracking.
+    change_seq = models.PositiveBigIntegerField(default=0)
 
     class Meta:
         ordering = ["time"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["city", "time"], name="weatherdata_unique_city_time"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["city", "change_seq", "time"],
+                name="weatherdata_city_change_seq",
+            )
+        ]
 
     def __str__(self) -> str:
         return f"{self.time}: max={self.t_max}, mean={self.t_mean}, min={self.t_min}"
+
+
+class WeatherDataVersion(models.Model):
+    """
+    Per-city counter bumped whenever save_all changes the city's rows. The
+    new value is stamped on the changed rows as their ``change_seq``.
+    """
+
+    city = models.CharField(max_length=100, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.city}: v{self.version}"
+
+
+class RollingSeries(models.Model):
+    """
+    Materialized rolling averages of a city for one window, built from the
+    city data version in ``version``.
+
+    The series is stored packed, so reading it is a single row: ``times``
+    holds the dates as little-endian int32 days since 1970-01-01 and
+    ``averages`` the ``<field>_avg`` columns one after another as
+    little-endian float64.
+    """
+
+    city = models.CharField(max_length=100)
+    window = models.PositiveIntegerField()
+    version = models.CharField(max_length=64, blank=True)
+    times = models.BinaryField(default=bytes)
+    averages = models.BinaryField(default=bytes)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["city", "window"], name="rollingseries_unique_city_window"
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.city} ({self.window}d) @ {self.version}"
+
+
+class DataQualityReport(models.Model):
+    city = models.CharField(max_length=100)
+    created_at = models.DateTimeField(auto_now_add=True)
+    row_count = models.IntegerField()
+    issue_count = models.IntegerField()
+    report = models.JSONField()
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [models.Index(fields=["city", "-created_at"])]
+
+    def __str__(self) -> str:
+        return f"{self.city} @ {self.created_at}: {self.issue_count} issues"
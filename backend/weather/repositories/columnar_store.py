@@ -0,0 +1,230 @@
+from datetime import date
+from functools import cache
+import logging
+import os
+from pathlib import Path
+import re
+import shutil
+import threading
+import uuid
+
+from django.conf import settings
+import numpy as np
+
+from ..utils.metrics import track
+from .weather_repository import (
+    ChangeCursor,
+    DjangoWeatherDataRepository,
+    SaveResult,
+    WeatherChange,
+    WeatherDataFields,
+    WeatherDataRepository,
+    WeatherRecord,
+    WeatherRecordBatch,
+)
+
+
+logger = logging.getLogger("weather")
+
+
+COLUMNS = ["time"] + [field.value for field in WeatherDataFields]
+
+
+class ColumnarWeatherStore:
+    """
+    Local read replica of WeatherData: one directory per city holding a
+    memory-mapped ``.npy`` file per column.
+
+    Every refresh writes a new version directory and then atomically swaps
+    the city's ``CURRENT`` pointer file, so readers always see a complete
+    snapshot. Range reads binary-search the date column and return views of
+    the mapped arrays, without copying.
+    """
+
+    KEEP_VERSIONS = 2
+
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+        self._lock = threading.Lock()
+        # city -> (CURRENT file identity, mapped columns)
+        self._mapped: dict[str, tuple[tuple[int, int], dict[str, np.ndarray]]] = {}
+
+    def refresh(self, city: str, repository: WeatherDataRepository) -> str:
+        """Rebuild the city's snapshot from the primary repository."""
+        with track("columnar_refresh") as stage:
+            columns = repository.get_columns(city=city)
+            version = self.write(city, columns)
+            stage.rows = columns["time"].size
+        logger.info(
+            f"Columnar store refreshed for {city}: "
+            f"{columns['time'].size} rows, version {version}."
+        )
+        return version
+
+    def write(self, city: str, columns: dict[str, np.ndarray]) -> str:
+        city_dir = self._city_dir(city)
+        city_dir.mkdir(parents=True, exist_ok=True)
+
+        version = uuid.uuid4().hex
+        tmp_dir = city_dir / f".tmp-{version}"
+        tmp_dir.mkdir()
+        for name in COLUMNS:
+            dtype = "datetime64[D]" if name == "time" else "float64"
+            np.save(tmp_dir / f"{name}.npy", np.asarray(columns[name], dtype=dtype))
+        tmp_dir.rename(city_dir / version)
+
+        pointer_tmp = city_dir / f".CURRENT-{version}"
+        pointer_tmp.write_text(version)
+        os.replace(pointer_tmp, city_dir / "CURRENT")
+
+        self._prune(city_dir, keep=version)
+        return version
+
+    def has_city(self, city: str) -> bool:
+        return (self._city_dir(city) / "CURRENT").exists()
+
+    def version(self, city: str) -> str | None:
+        try:
+            return (self._city_dir(city) / "CURRENT").read_text().strip()
+        except FileNotFoundError:
+            return None
+
+    def get_columns(
+        self,
+        city: str,
+        start_date: date | None = None,
+        end_date: date | None = None,
+    ) -> dict[str, np.ndarray] | None:
+        """Zero-copy views of the city's columns for an inclusive date range."""
+        columns = self._open(city)
+        if columns is None:
+            return None
+
+        time = columns["time"]
+        lo = (
+            0
+            if start_date is None
+            else np.searchsorted(time, np.datetime64(start_date, "D"), "left")
+        )
+        hi = (
+            time.size
+            if end_date is None
+            else np.searchsorted(time, np.datetime64(end_date, "D"), "right")
+        )
+        return {name: column[lo:hi] for name, column in columns.items()}
+
+    def _open(self, city: str) -> dict[str, np.ndarray] | None:
+        pointer = self._city_dir(city) / "CURRENT"
+        try:
+            stat = pointer.stat()
+        except FileNotFoundError:
+            return None
+        identity = (stat.st_ino, stat.st_mtime_ns)
+
+        cached = self._mapped.get(city)
+        if cached is not None and cached[0] == identity:
+            return cached[1]
+
+        with self._lock:
+            version_dir = self._city_dir(city) / pointer.read_text().strip()
+            columns = {
+                name: np.load(version_dir / f"{name}.npy", mmap_mode="r")
+                for name in COLUMNS
+            }
+            self._mapped[city] = (identity, columns)
+        return columns
+
+    def _city_dir(self, city: str) -> Path:
+        return self.root / re.sub(r"[^\w-]", "_", city)
+
+    def _prune(self, city_dir: Path, keep: str) -> None:
+        """Remove old snapshots; recently replaced ones stay for open readers."""
+        versions = sorted(
+            (
+                p
+                for p in city_dir.iterdir()
+                if p.is_dir() and not p.name.startswith(".")
+            ),
+            key=lambda p: p.stat().st_mtime,
+            reverse=True,
+        )
+        for old in versions[self.KEEP_VERSIONS :]:
+            if old.name != keep:
+                shutil.rmtree(old, ignore_errors=True)
+
+
+class ColumnarWeatherDataRepository(WeatherDataRepository):
+    """
+    Read-only repository serving from the columnar store, falling back to
+    the primary repository for cities without a snapshot.
+    """
+
+    def __init__(self, store: ColumnarWeatherStore, fallback: WeatherDataRepository):
+        self.store = store
+        self.fallback = fallback
+
+    def get_columns(
+        self,
+        city: str,
+        start_date: date | None = None,
+        end_date: date | None = None,
+    ) -> dict[str, np.ndarray]:
+        columns = self.store.get_columns(city, start_date, end_date)
+        if columns is None:
+            return self.fallback.get_columns(city, start_date, end_date)
+        return columns
+
+    def get(
+        self,
+        city: str | None = None,
+        start_date: date | None = None,
+        end_date: date | None = None,
+        limit: int | None = None,
+    ) -> list[WeatherRecord]:
+        if city is None or not self.store.has_city(city):
+            return self.fallback.get(city, start_date, end_date, limit)
+
+        columns = self.store.get_columns(city, start_date, end_date)
+        batch = WeatherRecordBatch(
+            city=city,
+            time=columns["time"][:limit].tolist(),
+            t_max=columns["t_max"][:limit].tolist(),
+            t_mean=columns["t_mean"][:limit].tolist(),
+            t_min=columns["t_min"][:limit].tolist(),
+        )
+        return list(batch)
+
+    def get_all(self) -> list[WeatherRecord]:
+        return self.fallback.get_all()
+
+    def exists_for_city(self, city: str) -> bool:
+        return self.store.has_city(city) or self.fallback.exists_for_city(city)
+
+    def data_version(self, city: str) -> str | None:
+        # Reads come from the snapshot, so its version identifies the data.
+        return self.store.version(city) or self.fallback.data_version(city)
+
+    def changes_since(
+        self, city: str, cursor: ChangeCursor, limit: int
+    ) -> list[WeatherChange]:
+        return self.fallback.changes_since(city, cursor, limit)
+
+    def save_all(self, records: list[WeatherRecord] | WeatherRecordBatch) -> SaveResult:
+        raise NotImplementedError("The columnar store is a read replica.")
+
+
+@cache
+def get_columnar_store() -> ColumnarWeatherStore | None:
+    """The configured store, or None when WEATHER_COLUMNAR_STORE_DIR is unset."""
+    if not settings.WEATHER_COLUMNAR_STORE_DIR:
+        return None
+    return ColumnarWeatherStore(settings.WEATHER_COLUMNAR_STORE_DIR)
+
+
+def get_read_repository() -> WeatherDataRepository:
+    """Repository for the analytics reads: the columnar store when configured."""
+    repository = DjangoWeatherDataRepository()
+    store = get_columnar_store()
+    if store is None:
+        return repository
+    return ColumnarWeatherDataRepository(store, fallback=repository)
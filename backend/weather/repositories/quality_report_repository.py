@@ -0,0 +1,88 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime
+import logging
+
+from ..models import DataQualityReport
+
+
+logger = logging.getLogger("weather")
+
+
+@dataclass
+class QualityReportRecord:
+    id: int
+    city: str
+    created_at: datetime
+    row_count: int
+    issue_count: int
+    report: dict | None = None
+
+    def to_dict(self) -> dict:
+        data = {
+            "id": self.id,
+            "city": self.city,
+            "created_at": self.created_at,
+            "row_count": self.row_count,
+            "issue_count": self.issue_count,
+        }
+        if self.report is not None:
+            data["report"] = self.report
+        return data
+
+
+class QualityReportRepository(ABC):
+    @abstractmethod
+    def save(self, city: str, report: dict) -> QualityReportRecord:
+        pass
+
+    @abstractmethod
+    def get(self, report_id: int) -> QualityReportRecord | None:
+        pass
+
+    @abstractmethod
+    def list(
+        self, city: str | None = None, limit: int | None = None
+    ) -> list[QualityReportRecord]:
+        pass
+
+
+class DjangoQualityReportRepository(QualityReportRepository):
+    def save(self, city: str, report: dict) -> QualityReportRecord:
+        obj = DataQualityReport.objects.create(
+            city=city,
+            row_count=report["row_count"],
+            issue_count=report["issue_count"],
+            report=report,
+        )
+        logger.debug(f"Saved data quality report {obj.pk} for {city}.")
+        return self._to_record(obj)
+
+    def get(self, report_id: int) -> QualityReportRecord | None:
+        obj = DataQualityReport.objects.filter(pk=report_id).first()
+        return self._to_record(obj) if obj is not None else None
+
+    def list(
+        self, city: str | None = None, limit: int | None = None
+    ) -> list[QualityReportRecord]:
+        qs = DataQualityReport.objects.defer("report")
+
+        if city is not None:
+            qs = qs.filter(city=city)
+        if limit is not None:
+            qs = qs[:limit]
+
+        return [self._to_record(obj, with_report=False) for obj in qs]
+
+    @staticmethod
+    def _to_record(
+        obj: DataQualityReport, with_report: bool = True
+    ) -> QualityReportRecord:
+        return QualityReportRecord(
+            id=obj.pk,
+            city=obj.city,
+            created_at=obj.created_at,
+            row_count=obj.row_count,
+            issue_count=obj.issue_count,
+            report=obj.report if with_report else None,
+        )
@@ -0,0 +1,145 @@
+from abc import ABC, abstractmethod
+from datetime import date
+import logging
+
+from django.db import transaction
+from django.db.models import CharField, OuterRef, Subquery, Value
+from django.db.models.functions import Cast, Coalesce
+import numpy as np
+
+from ..models import RollingSeries, WeatherDataVersion
+from .weather_repository import WeatherDataFields
+
+
+logger = logging.getLogger("weather")
+
+
+AVERAGE_COLUMNS = [f"{field.value}_avg" for field in WeatherDataFields]
+
+
+class RollingSeriesRepository(ABC):
+    """
+    Materialized rolling averages per city and window. Columns are
+    ``time`` plus the ``<field>_avg`` arrays, ordered by date.
+    """
+
+    @abstractmethod
+    def versions(self, city: str) -> dict[int, str]:
+        """Data version each of the city's series was built from, by window."""
+        pass
+
+    @abstractmethod
+    def is_current(self, city: str, window: int) -> bool:
+        """True when the series exists and matches the city's data version."""
+        pass
+
+    @abstractmethod
+    def get_columns(
+        self,
+        city: str,
+        window: int,
+        start_date: date | None = None,
+        end_date: date | None = None,
+    ) -> dict[str, np.ndarray]:
+        pass
+
+    @abstractmethod
+    def write(
+        self,
+        city: str,
+        window: int,
+        version: str,
+        columns: dict[str, np.ndarray],
+        since: date | None = None,
+    ) -> None:
+        """
+        Replace the series from ``since`` on (all of it when None) with
+        ``columns`` and mark it as built from ``version``.
+        """
+        pass
+
+
+class DjangoRollingSeriesRepository(RollingSeriesRepository):
+    def versions(self, city: str) -> dict[int, str]:
+        return dict(
+            RollingSeries.objects.filter(city=city).values_list("window", "version")
+        )
+
+    def is_current(self, city: str, window: int) -> bool:
+        data_version = WeatherDataVersion.objects.filter(city=OuterRef("city")).values(
+            "version"
+        )[:1]
+        return RollingSeries.objects.filter(
+            city=city,
+            window=window,
+            # Cities without a version row are at version 0.
+            version=Coalesce(
+                Cast(Subquery(data_version), output_field=CharField()), Value("0")
+            ),
+        ).exists()
+
+    def get_columns(
+        self,
+        city: str,
+        window: int,
+        start_date: date | None = None,
+        end_date: date | None = None,
+    ) -> dict[str, np.ndarray]:
+        packed = (
+            RollingSeries.objects.filter(city=city, window=window)
+            .values_list("times", "averages")
+            .first()
+        )
+        columns = _unpack(*packed) if packed is not None else _unpack(b"", b"")
+
+        time = columns["time"]
+        lo = 0 if start_date is None else time.searchsorted(np.datetime64(start_date))
+        hi = (
+            time.size
+            if end_date is None
+            else time.searchsorted(np.datetime64(end_date), side="right")
+        )
+        # Copies, so callers may modify them.
+        return {name: values[lo:hi].copy() for name, values in columns.items()}
+
+    @transaction.atomic
+    def write(
+        self,
+        city: str,
+        window: int,
+        version: str,
+        columns: dict[str, np.ndarray],
+        since: date | None = None,
+    ) -> None:
+        series, _ = RollingSeries.objects.select_for_update().get_or_create(
+            city=city, window=window
+        )
+
+        if since is not None:
+            kept = _unpack(series.times, series.averages)
+            head = kept["time"] < np.datetime64(since)
+            columns = {
+                name: np.concatenate([kept[name][head], columns[name]]) for name in kept
+            }
+
+        series.times, series.averages = _pack(columns)
+        series.version = version
+        series.save(update_fields=["times", "averages", "version", "updated_at"])
+        logger.debug(
+            f"Rolling series {city}/{window} written from {since or 'the start'}: "
+            f"{columns['time'].size} rows, version {version}."
+        )
+
+
+def _pack(columns: dict[str, np.ndarray]) -> tuple[bytes, bytes]:
+    times = np.asarray(columns["time"], dtype="datetime64[D]").astype("<i4")
+    averages = np.concatenate(
+        [np.asarray(columns[name], dtype="<f8") for name in AVERAGE_COLUMNS]
+    )
+    return times.tobytes(), averages.tobytes()
+
+
+def _unpack(times: bytes, averages: bytes) -> dict[str, np.ndarray]:
+    time = np.frombuffer(times, dtype="<i4").astype("datetime64[D]")
+    values = np.frombuffer(averages, dtype="<f8").reshape(len(AVERAGE_COLUMNS), -1)
+    return {"time": time, **dict(zip(AVERAGE_COLUMNS, values))}
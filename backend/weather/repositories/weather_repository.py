@@ -1,11 +1,17 @@
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
-from datetime import date
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
 from enum import Enum
+from typing import Iterable, Iterator, Sequence
 from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
 import logging
+import math
+import numpy as np
 
-from ..models import WeatherData
+from ..models import WeatherData, WeatherDataVersion
+from ..utils.metrics import track
 
 
 logger = logging.getLogger("weather")
@@ -17,7 +23,7 @@ class WeatherDataFields(Enum):
     T_MIN = "t_min"
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class WeatherRecord:
     time: date
     t_max: float
@@ -35,9 +41,115 @@ class WeatherRecord:
         }
 
 
+@dataclass(frozen=True, slots=True)
+class WeatherRecordBatch:
+    """
+    Columnar batch of daily records for a single city.
+
+    Columns are parallel sequences ordered by date, so a cleaned DataFrame
+    can be handed to the repository without creating per-row records.
+    """
+
+    city: str
+    time: Sequence[date]
+    t_max: Sequence[float]
+    t_mean: Sequence[float]
+    t_min: Sequence[float]
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+    def __iter__(self) -> Iterator[WeatherRecord]:
+        for time, t_max, t_mean, t_min in zip(
+            self.time, self.t_max, self.t_mean, self.t_min
+        ):
+            yield WeatherRecord(time, t_max, t_mean, t_min, self.city)
+
+    @classmethod
+    def from_records(
+        cls, records: Iterable[WeatherRecord]
+    ) -> list["WeatherRecordBatch"]:
+        """Group records into one batch per city, keeping their order."""
+        columns: dict[str, tuple[list, list, list, list]] = {}
+        for r in records:
+            time, t_max, t_mean, t_min = columns.setdefault(r.city, ([], [], [], []))
+            time.append(r.time)
+            t_max.append(r.t_max)
+            t_mean.append(r.t_mean)
+            t_min.append(r.t_min)
+        return [cls(city, *cols) for city, cols in columns.items()]
+
+
+@dataclass
+class SaveResult:
+    """
+    Per city, the first and last date of the rows a save inserted or
+    changed, and the data versions the save produced, in order.
+    """
+
+    spans: dict[str, tuple[date, date]] = field(default_factory=dict)
+    versions: dict[str, list[str]] = field(default_factory=dict)
+
+    def __bool__(self) -> bool:
+        return bool(self.spans)
+
+    def update(self, other: "SaveResult") -> None:
+        for city, (first, last) in other.spans.items():
+            if city in self.spans:
+                known_first, known_last = self.spans[city]
+                first, last = min(first, known_first), max(last, known_last)
+            self.spans[city] = (first, last)
+        for city, versions in other.versions.items():
+            self.versions.setdefault(city, []).extend(versions)
+
+
+@dataclass(frozen=True, slots=True)
+class WeatherChange:
+    """A row as of the save that last inserted or changed it."""
+
+    record: WeatherRecord
+    change_seq: int
+    updated_at: datetime | None
+
+    def to_dict(self) -> dict:
+        return {
+            **self.record.to_dict(),
+            "change_seq": self.change_seq,
+            "updated_at": self.updated_at,
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class ChangeCursor:
+    """
+    Position in a city's change feed: everything up to ``seq``, or, when
+    ``time`` is set, the rows of ``seq`` up to and including that date.
+    Serialized as ``"<seq>"`` or ``"<seq>:<YYYY-MM-DD>"``.
+    """
+
+    seq: int = 0
+    time: date | None = None
+
+    @classmethod
+    def parse(cls, token: str) -> "ChangeCursor":
+        seq, _, time = token.partition(":")
+        try:
+            cursor = cls(int(seq), date.fromisoformat(time) if time else None)
+        except ValueError:
+            raise ValueError(f"Invalid change token: {token!r}.") from None
+        if cursor.seq < 0:
+            raise ValueError(f"Invalid change token: {token!r}.")
+        return cursor
+
+    def __str__(self) -> str:
+        if self.time is None:
+            return str(self.seq)
+        return f"{self.seq}:{self.time.isoformat()}"
+
+
 class WeatherDataRepository(ABC):
     @abstractmethod
-    def save_all(self, records: list[WeatherRecord]) -> None:
+    def save_all(self, records: list[WeatherRecord] | WeatherRecordBatch) -> SaveResult:
         pass
 
     @abstractmethod
@@ -58,6 +170,67 @@ class WeatherDataRepository(ABC):
     def exists_for_city(self, city: str) -> bool:
         pass
 
+    def data_version(self, city: str) -> str | None:
+        """
+        Opaque token that changes whenever the city's data changes, for
+        cache validation. None when the repository cannot tell.
+        """
+        return None
+
+    @abstractmethod
+    def changes_since(
+        self, city: str, cursor: ChangeCursor, limit: int
+    ) -> list[WeatherChange]:
+        """
+        Rows inserted or changed after ``cursor``, ordered by change
+        sequence and date, at most ``limit`` of them.
+        """
+        pass
+
+    def lookback_start(self, city: str, time: date, rows: int) -> date | None:
+        """
+        Date of the row ``rows`` rows before ``time``, so that a read from
+        it covers a full trailing window. None when there are fewer rows.
+        """
+        if rows <= 0:
+            return time
+        dates = self.get_columns(city=city, end_date=time - timedelta(days=1))["time"]
+        if dates.size < rows:
+            return None
+        return dates[-rows].item()
+
+    def get_columns(
+        self,
+        city: str,
+        start_date: date | None = None,
+        end_date: date | None = None,
+    ) -> dict[str, np.ndarray]:
+        """Date-ordered ``time`` (datetime64[D]) and temperature arrays."""
+        records = sorted(
+            self.get(city=city, start_date=start_date, end_date=end_date),
+            key=lambda r: r.time,
+        )
+        return _to_columns([(r.time, r.t_max, r.t_mean, r.t_min) for r in records])
+
+
+def _same_values(stored: tuple[float, ...], new: tuple[float, ...]) -> bool:
+    """Equal temperatures, counting missing (NaN) as equal to missing."""
+    return all(a == b or (math.isnan(a) and math.isnan(b)) for a, b in zip(stored, new))
+
+
+def _to_columns(rows: list[tuple]) -> dict[str, np.ndarray]:
+    columns = ["time"] + [field.value for field in WeatherDataFields]
+    if not rows:
+        return {
+            name: np.array([], dtype="datetime64[D]" if name == "time" else "float64")
+            for name in columns
+        }
+    time, *values = zip(*rows)
+    data = {"time": np.array(time, dtype="datetime64[D]")}
+    for name, column in zip(columns[1:], values):
+        data[name] = np.array(column, dtype="float64")
+    return data
+
 
 class DjangoWeatherDataRepository(WeatherDataRepository):
     def get_all(self) -> list[WeatherRecord]:
@@ -102,62 +275,185 @@ class DjangoWeatherDataRepository(WeatherDataRepository):
             for obj in qs
         ]
 
+    def get_columns(
+        self,
+        city: str,
+        start_date: date | None = None,
+        end_date: date | None = None,
+    ) -> dict[str, np.ndarray]:
+        qs = WeatherData.objects.filter(city=city)
+
+        if start_date is not None:
+            qs = qs.filter(time__gte=start_date)
+        if end_date is not None:
+            qs = qs.filter(time__lte=end_date)
+
+        rows = list(
+            qs.order_by("time").values_list(
+                "time", *[field.value for field in WeatherDataFields]
+            )
+        )
+        return _to_columns(rows)
+
+    def lookback_start(self, city: str, time: date, rows: int) -> date | None:
+        if rows <= 0:
+            return time
+        return (
+            WeatherData.objects.filter(city=city, time__lt=time)
+            .order_by("-time")
+            .values_list("time", flat=True)[rows - 1 : rows]
+            .first()
+        )
+
     @transaction.atomic
-    def save_all(self, records: list[WeatherRecord]) -> None:
+    def save_all(self, records: list[WeatherRecord] | WeatherRecordBatch) -> SaveResult:
         """
-        Persist all WeatherRecord entities to the database.
+        Persist all WeatherRecord entities or columnar batches to the database.
 
         Efficiently handles:
         - New records → created
         - Existing records (with changed values) → updated
         - Existing records (identical values) → skipped
+
+        Returns the date span of the inserted and changed rows and the
+        versions produced, per city.
         """
         logger.debug("Saving weather data to db started.")
 
+        result = SaveResult()
         if not records:
-            return
+            return result
+
+        if isinstance(records, WeatherRecordBatch):
+            batches = [records]
+        else:
+            batches = WeatherRecordBatch.from_records(records)
+
+        with track("save") as stage:
+            for batch in batches:
+                saved = self._save_batch(batch)
+                if saved is not None:
+                    span, change_seq = saved
+                    result.update(
+                        SaveResult({batch.city: span}, {batch.city: [str(change_seq)]})
+                    )
+            stage.rows = sum(map(len, batches))
+        return result
+
+    def data_version(self, city: str) -> str:
+        version = (
+            WeatherDataVersion.objects.filter(city=city)
+            .values_list("version", flat=True)
+            .first()
+        )
+        return str(version or 0)
+
+    def changes_since(
+        self, city: str, cursor: ChangeCursor, limit: int
+    ) -> list[WeatherChange]:
+        after = Q(change_seq__gt=cursor.seq)
+        if cursor.time is not None:
+            after |= Q(change_seq=cursor.seq, time__gt=cursor.time)
+
+        qs = (
+            WeatherData.objects.filter(after, city=city)
+            .order_by("change_seq", "time")
+            .values_list(
+                "time",
+                *[field.value for field in WeatherDataFields],
+                "change_seq",
+                "updated_at",
+            )[:limit]
+        )
+        return [
+            WeatherChange(
+                WeatherRecord(time, t_max, t_mean, t_min, city), change_seq, updated_at
+            )
+            for time, t_max, t_mean, t_min, change_seq, updated_at in qs
+        ]
 
-        record_map = {r.time: r for r in records}
-        record_dates = list(record_map.keys())
+    def _next_version(self, city: str) -> int:
+        """
+        Bump the city's version and return it. The UPDATE keeps the row
+        locked until the save commits, so concurrent saves of a city commit
+        their change sequences in increasing order and a change feed never
+        skips one.
+        """
+        WeatherDataVersion.objects.get_or_create(city=city)
+        WeatherDataVersion.objects.filter(city=city).update(version=F("version") + 1)
+        return WeatherDataVersion.objects.values_list("version", flat=True).get(
+            city=city
+        )
+
+    def _save_batch(
+        self, batch: WeatherRecordBatch
+    ) -> tuple[tuple[date, date], int] | None:
+        """
+        Insert or update the batch and return the date span of the changed
+        rows with their ``change_seq``, or None when nothing changed.
+        Changed rows are stamped with ``updated_at`` and the new city
+        version as ``change_seq``.
+        """
+        # Later rows win for repeated dates, as with a dict of records.
+        row_map = {
+            time: (t_max, t_mean, t_min)
+            for time, t_max, t_mean, t_min in zip(
+                batch.time, batch.t_max, batch.t_mean, batch.t_min
+            )
+        }
 
-        existing_qs = WeatherData.objects.filter(time__in=record_dates)
+        # A single range scan instead of an IN list with one parameter per day.
+        existing_qs = WeatherData.objects.filter(
+            city=batch.city, time__gte=min(row_map), time__lte=max(row_map)
+        )
         existing_map = {obj.time: obj for obj in existing_qs}
         to_create: list[WeatherData] = []
         to_update: list[WeatherData] = []
 
-        for date_, record in record_map.items():
+        for date_, (t_max, t_mean, t_min) in row_map.items():
             existing = existing_map.get(date_)
 
             if existing is None:
                 to_create.append(
                     WeatherData(
-                        time=record.time,
-                        t_max=record.t_max,
-                        t_mean=record.t_mean,
-                        t_min=record.t_min,
-                        city=record.city,
+                        time=date_,
+                        t_max=t_max,
+                        t_mean=t_mean,
+                        t_min=t_min,
+                        city=batch.city,
                     )
                 )
-            else:
-                if (
-                    existing.t_max != record.t_max
-                    or existing.t_mean != record.t_mean
-                    or existing.t_min != record.t_min
-                    or existing.city != record.city
-                ):
-                    existing.t_max = record.t_max
-                    existing.t_mean = record.t_mean
-                    existing.t_min = record.t_min
-                    existing.city = record.city
-                    to_update.append(existing)
+            elif not _same_values(
+                (existing.t_max, existing.t_mean, existing.t_min),
+                (t_max, t_mean, t_min),
+            ):
+                existing.t_max = t_max
+                existing.t_mean = t_mean
+                existing.t_min = t_min
+                to_update.append(existing)
+
+        changed = to_create + to_update
+        if not changed:
+            return None
+
+        change_seq = self._next_version(batch.city)
+        now = timezone.now()
+        for obj in changed:
+            obj.change_seq = change_seq
+            obj.updated_at = now
 
         if to_create:
             WeatherData.objects.bulk_create(to_create)
 
         if to_update:
             WeatherData.objects.bulk_update(
-                to_update, [field.value for field in WeatherDataFields]
+                to_update,
+                [field.value for field in WeatherDataFields]
+                + ["change_seq", "updated_at"],
             )
 
+        dates = [obj.time for obj in changed]
+        return (min(dates), max(dates)), change_seq
+
     def exists_for_city(self, city: str) -> bool:
         return WeatherData.objects.filter(city=city).exists()
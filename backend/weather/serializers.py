@@ -1,8 +1,27 @@
 from rest_framework import serializers
 
+from weather.repositories.weather_repository import ChangeCursor
+
 
 class RollingAverageRequestSerializer(serializers.Serializer):
     city = serializers.CharField(required=True)
     window = serializers.IntegerField(default=7, min_value=1)
     start_date = serializers.DateField(required=False, allow_null=True)
     end_date = serializers.DateField(required=False, allow_null=True)
+
+
+class QualityReportListRequestSerializer(serializers.Serializer):
+    city = serializers.CharField(required=False)
+    limit = serializers.IntegerField(default=20, min_value=1, max_value=500)
+
+
+class ChangesRequestSerializer(serializers.Serializer):
+    city = serializers.CharField(required=True)
+    since = serializers.CharField(default="0")
+    limit = serializers.IntegerField(default=1000, min_value=1, max_value=10000)
+
+    def validate_since(self, value: str) -> ChangeCursor:
+        try:
+            return ChangeCursor.parse(value)
+        except ValueError as e:
+            raise serializers.ValidationError(str(e))
@@ -0,0 +1,213 @@
+from datetime import date
+import logging
+from typing import Optional, Sequence
+
+import numpy as np
+
+from weather.repositories.rolling_series_repository import (
+    AVERAGE_COLUMNS,
+    RollingSeriesRepository,
+)
+from weather.repositories.weather_repository import (
+    WeatherDataFields,
+    WeatherDataRepository,
+)
+from weather.utils.metrics import track
+from weather.utils.utils import log_action
+
+
+logger = logging.getLogger("weather")
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Trailing mean over ``window`` rows that skips NaNs, like
+    ``Series.rolling(window, min_periods=1).mean()``, via cumulative sums.
+    """
+    valid = ~np.isnan(values)
+    # Summing deviations from the series mean keeps the running sums small,
+    # which keeps the cancellation error of long series negligible.
+    offset = values[valid].mean() if valid.any() else 0.0
+    deviations = np.where(valid, values - offset, 0.0)
+    sums = np.concatenate(([0.0], np.cumsum(deviations)))
+    counts = np.concatenate(([0], np.cumsum(valid)))
+
+    end = np.arange(1, values.size + 1)
+    start = np.maximum(end - window, 0)
+    window_counts = counts[end] - counts[start]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = offset + (sums[end] - sums[start]) / window_counts
+    means[window_counts == 0] = np.nan
+    return means
+
+
+def rolling_columns(
+    columns: dict[str, np.ndarray], window: int
+) -> dict[str, np.ndarray]:
+    """``time`` plus the ``<field>_avg`` rolling means of temperature columns."""
+    averages = {"time": columns["time"]}
+    for field, name in zip(WeatherDataFields, AVERAGE_COLUMNS):
+        averages[name] = rolling_mean(columns[field.value], window)
+    return averages
+
+
+class RollingAverageService:
+    def __init__(
+        self,
+        repository: WeatherDataRepository,
+        series_repository: RollingSeriesRepository | None = None,
+    ):
+        self.repository = repository
+        self.series_repository = series_repository
+
+    @log_action(
+        action="Calculating rolling averages", logger=logger, stage="rolling_average"
+    )
+    def calculate(
+        self,
+        city: str,
+        window: int = 7,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+    ):
+        averages = self._materialized(city, window, start_date, end_date)
+        if averages is None:
+            averages = rolling_columns(
+                self.repository.get_columns(
+                    city=city, start_date=start_date, end_date=end_date
+                ),
+                window,
+            )
+
+        if averages["time"].size == 0:
+            return []
+
+        return [
+            {"time": time, **dict(zip(AVERAGE_COLUMNS, values))}
+            for time, *values in zip(
+                averages["time"].tolist(),
+                *(averages[name].tolist() for name in AVERAGE_COLUMNS),
+            )
+        ]
+
+    def _materialized(
+        self,
+        city: str,
+        window: int,
+        start_date: date | None,
+        end_date: date | None,
+    ) -> dict[str, np.ndarray] | None:
+        """The stored series for the range, or None when it is missing or stale."""
+        if self.series_repository is None or not self.series_repository.is_current(
+            city, window
+        ):
+            return None
+
+        averages = self.series_repository.get_columns(
+            city, window, start_date, end_date
+        )
+        head = min(window - 1, averages["time"].size)
+        if start_date is not None and head:
+            # Windows are cut at the start of the range, so its first rows
+            # average fewer values than the stored series does.
+            columns = self.repository.get_columns(
+                city=city,
+                start_date=start_date,
+                end_date=averages["time"][head - 1].item(),
+            )
+            for name, values in rolling_columns(columns, window).items():
+                if name != "time":
+                    averages[name][:head] = values
+        return averages
+
+
+class RollingSeriesService:
+    """
+    Keeps the materialized rolling series of the configured windows in step
+    with the weather data. After a save only the tail from the first changed
+    date is recomputed, reading ``window - 1`` earlier rows for the windows.
+    """
+
+    def __init__(
+        self,
+        repository: WeatherDataRepository,
+        series_repository: RollingSeriesRepository,
+        windows: Sequence[int],
+    ):
+        self.repository = repository
+        self.series_repository = series_repository
+        self.windows = sorted(set(windows))
+
+    def refresh(
+        self,
+        city: str,
+        since: date | None = None,
+        base_version: str | None = None,
+        versions: Sequence[str] = (),
+    ) -> None:
+        """
+        Bring the city's series up to date. ``since`` is the first date an
+        ingest changed after ``base_version``, producing ``versions``. The
+        tail is only recomputed when the series was built from
+        ``base_version`` and the ingest produced every version since;
+        otherwise another writer may have changed earlier rows, and the
+        series is rebuilt in full.
+        """
+        if not self.windows:
+            return
+
+        # Read before the data, so a series is never labelled with a version
+        # newer than the rows it was computed from.
+        version = self.repository.data_version(city)
+        if version is None:
+            return
+        built = self.series_repository.versions(city)
+        sole_writer = (
+            since is not None
+            and base_version is not None
+            and _follows(base_version, version, versions)
+        )
+        full_columns = None
+        rows = 0
+
+        with track("rolling_series") as stage:
+            for window in self.windows:
+                if built.get(window) == version:
+                    continue
+
+                if sole_writer and built.get(window) == base_version:
+                    start = self.repository.lookback_start(city, since, window - 1)
+                    averages = rolling_columns(
+                        self.repository.get_columns(city=city, start_date=start),
+                        window,
+                    )
+                    keep = averages["time"] >= np.datetime64(since)
+                    averages = {name: values[keep] for name, values in averages.items()}
+                    self.series_repository.write(
+                        city, window, version, averages, since=since
+                    )
+                else:
+                    if full_columns is None:
+                        full_columns = self.repository.get_columns(city=city)
+                    averages = rolling_columns(full_columns, window)
+                    self.series_repository.write(city, window, version, averages)
+                rows += averages["time"].size
+            stage.rows = rows
+
+        if rows:
+            logger.info(
+                f"Rolling series refreshed for {city} from {since or 'the start'}, "
+                f"windows {self.windows}, version {version}."
+            )
+
+
+def _follows(base_version: str, version: str, versions: Sequence[str]) -> bool:
+    """
+    Whether ``versions`` are exactly the versions after ``base_version`` up
+    to ``version``. Versions that are not sequence numbers never are.
+    """
+    try:
+        expected = list(range(int(base_version) + 1, int(version) + 1))
+        return sorted(int(v) for v in versions) == expected
+    except ValueError:
+        return False
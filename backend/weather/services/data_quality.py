@@ -0,0 +1,216 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+from weather.repositories.weather_repository import WeatherDataFields
+
+
+logger = logging.getLogger("weather")
+
+
+TEMPERATURE_COLUMNS = [field.value for field in WeatherDataFields]
+
+
+def _iso(value) -> str | None:
+    if value is None:
+        return None
+    return str(np.datetime64(value, "D"))
+
+
+class _Occurrences:
+    """Running count and first/last date of rows matching a check."""
+
+    __slots__ = ("count", "first", "last")
+
+    def __init__(self):
+        self.count = 0
+        self.first = None
+        self.last = None
+
+    def update(self, times: np.ndarray, mask: np.ndarray) -> None:
+        hits = times[mask]
+        if hits.size == 0:
+            return
+        first, last = hits.min(), hits.max()
+        self.count += int(hits.size)
+        self.first = first if self.first is None else min(self.first, first)
+        self.last = last if self.last is None else max(self.last, last)
+
+    def to_dict(self) -> dict:
+        return {"count": self.count, "first": _iso(self.first), "last": _iso(self.last)}
+
+
+class DataQualityReportBuilder:
+    """
+    Builds a structured data quality report for weather data in one
+    vectorized pass over the date and temperature arrays.
+
+    The builder can be fed a whole DataFrame or consecutive date-ordered
+    chunks of one; gaps and duplicates spanning chunk edges are tracked.
+    """
+
+    MIN_TEMPERATURE = -50
+    MAX_TEMPERATURE = 60
+    MAX_GAP_RUNS = 100
+
+    def __init__(self):
+        self.row_count = 0
+        self.first_date = None
+        self.last_date = None
+        self.duplicates = _Occurrences()
+        self.source_duplicates: dict[str, int] = {}
+        self.missing_values = {col: _Occurrences() for col in TEMPERATURE_COLUMNS}
+        self.out_of_range = {col: _Occurrences() for col in TEMPERATURE_COLUMNS}
+        self.inconsistent = _Occurrences()
+        self.missing_date_count = 0
+        self.gap_runs = 0
+        # Kept apart from ``gaps``, which stops at MAX_GAP_RUNS entries.
+        self.first_gap_start = None
+        self.last_gap_end = None
+        self.gaps: list[dict] = []
+        self.provenance: dict[str, dict[str, int]] = {}
+
+    def update(self, df: pd.DataFrame) -> "DataQualityReportBuilder":
+        times = df["Time"].to_numpy(dtype="datetime64[D]")
+        if times.size == 0:
+            return self
+        values = df[TEMPERATURE_COLUMNS].to_numpy(dtype="float64", na_value=np.nan)
+
+        duplicated = pd.Index(times).duplicated()
+        if self.last_date is not None:
+            duplicated |= times == self.last_date
+        self.duplicates.update(times, duplicated)
+        self._update_source_duplicates(df)
+        self._update_missing_dates(times)
+
+        missing = np.isnan(values)
+        with np.errstate(invalid="ignore"):
+            out_of_range = (values < self.MIN_TEMPERATURE) | (
+                values > self.MAX_TEMPERATURE
+            )
+            t_max, t_mean, t_min = (values[:, i] for i in range(values.shape[1]))
+            inconsistent = (t_min > t_mean) | (t_mean > t_max)
+
+        for i, col in enumerate(TEMPERATURE_COLUMNS):
+            self.missing_values[col].update(times, missing[:, i])
+            self.out_of_range[col].update(times, out_of_range[:, i])
+        self.inconsistent.update(times, inconsistent)
+        self._update_provenance(df)
+
+        first, last = times.min(), times.max()
+        self.row_count += int(times.size)
+        self.first_date = (
+            first if self.first_date is None else min(self.first_date, first)
+        )
+        self.last_date = last if self.last_date is None else max(self.last_date, last)
+        return self
+
+    def _update_missing_dates(self, times: np.ndarray) -> None:
+        """Find runs of calendar days absent between consecutive dates."""
+        unique = np.unique(times)
+        if self.last_date is not None:
+            unique = unique[unique > self.last_date]
+            unique = np.concatenate(([self.last_date], unique))
+        if unique.size < 2:
+            return
+
+        steps = np.diff(unique).astype("int64")
+        gap_idx = np.flatnonzero(steps > 1)
+        if gap_idx.size == 0:
+            return
+
+        starts = unique[gap_idx] + np.timedelta64(1, "D")
+        ends = unique[gap_idx + 1] - np.timedelta64(1, "D")
+        days = steps[gap_idx] - 1
+
+        room = self.MAX_GAP_RUNS - len(self.gaps)
+        self.gaps.extend(
+            {"start": _iso(start), "end": _iso(end), "days": int(length)}
+            for start, end, length in zip(starts[:room], ends[:room], days[:room])
+        )
+        if self.first_gap_start is None:
+            self.first_gap_start = starts[0]
+        self.last_gap_end = ends[-1]
+        self.missing_date_count += int(days.sum())
+        self.gap_runs += int(gap_idx.size)
+
+    def _update_source_duplicates(self, df: pd.DataFrame) -> None:
+        """Count the repeated dates the merge engine dropped from its sources."""
+        for source, dates in df.attrs.get("source_duplicates", {}).items():
+            dates = np.array(dates, dtype="datetime64[D]")
+            self.duplicates.update(dates, np.ones(dates.size, dtype=bool))
+            self.source_duplicates[source] = (
+                self.source_duplicates.get(source, 0) + dates.size
+            )
+
+    def _update_provenance(self, df: pd.DataFrame) -> None:
+        """Count values per source when the data comes from the merge engine."""
+        for col in TEMPERATURE_COLUMNS:
+            source_col = f"{col}_source"
+            if source_col not in df.columns:
+                continue
+            counts = self.provenance.setdefault(col, {})
+            for source, count in df[source_col].value_counts().items():
+                if count:
+                    counts[source] = counts.get(source, 0) + int(count)
+
+    def build(self) -> dict:
+        report = {
+            "row_count": self.row_count,
+            "first_date": _iso(self.first_date),
+            "last_date": _iso(self.last_date),
+            "rules": {
+                "min_temperature": self.MIN_TEMPERATURE,
+                "max_temperature": self.MAX_TEMPERATURE,
+            },
+            "missing_dates": {
+                "count": self.missing_date_count,
+                "first": _iso(self.first_gap_start),
+                "last": _iso(self.last_gap_end),
+                "gap_runs": self.gap_runs,
+                "gaps": self.gaps,
+            },
+            "duplicates": {
+                **self.duplicates.to_dict(),
+                "sources": self.source_duplicates,
+            },
+            "missing_values": {
+                col: acc.to_dict() for col, acc in self.missing_values.items()
+            },
+            "out_of_range": {
+                col: acc.to_dict() for col, acc in self.out_of_range.items()
+            },
+            "inconsistent": self.inconsistent.to_dict(),
+            "provenance": self.provenance,
+        }
+        report["issue_count"] = self.issue_count(report)
+        return report
+
+    @staticmethod
+    def issue_count(report: dict) -> int:
+        return (
+            report["missing_dates"]["count"]
+            + report["duplicates"]["count"]
+            + report["inconsistent"]["count"]
+            + sum(v["count"] for v in report["missing_values"].values())
+            + sum(v["count"] for v in report["out_of_range"].values())
+        )
+
+    @staticmethod
+    def summary(report: dict) -> str:
+        missing_values = {
+            col: v["count"] for col, v in report["missing_values"].items() if v["count"]
+        }
+        out_of_range = {
+            col: v["count"] for col, v in report["out_of_range"].items() if v["count"]
+        }
+        return (
+            f"{report['row_count']} rows ({report['first_date']} - {report['last_date']}), "
+            f"{report['missing_dates']['count']} missing dates "
+            f"in {report['missing_dates'].get('gap_runs', 0)} gaps, "
+            f"{report['duplicates']['count']} duplicates, "
+            f"missing values {missing_values or 0}, "
+            f"out of range {out_of_range or 0}, "
+            f"{report['inconsistent']['count']} inconsistent rows"
+        )
@@ -0,0 +1,269 @@
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date
+import logging
+import os
+import threading
+from typing import Iterable
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+
+from weather.models import WeatherData
+from weather.repositories.columnar_store import get_read_repository
+from weather.repositories.rolling_series_repository import (
+    DjangoRollingSeriesRepository,
+)
+from weather.services.analytics import RollingAverageService
+from weather.utils.http_cache import make_etag, render_json
+from weather.utils.metrics import track
+from weather.utils.response_cache import ResponseBodyCache, supported_encodings
+
+
+logger = logging.getLogger("weather")
+
+# One warming job at a time; jobs queued behind it run in order. Created on
+# first use, since a pool inherited through fork has no thread behind it.
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+# Set once warm_on_startup() ran; processes forked afterwards warm again.
+_warm_after_fork = False
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="weather-warmup"
+            )
+        return _executor
+
+
+@dataclass(frozen=True)
+class HotQuery:
+    """Parameters of a rolling-average request."""
+
+    city: str
+    window: int = 7
+    start_date: date | None = None
+    end_date: date | None = None
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "HotQuery":
+        return cls(
+            city=data["city"],
+            window=int(data.get("window", 7)),
+            start_date=_parse_date(data.get("start_date")),
+            end_date=_parse_date(data.get("end_date")),
+        )
+
+    def etag(self, version: str) -> str:
+        """The ETag the rolling-average endpoint sends for this query."""
+        return make_etag(
+            "rolling-average",
+            self.city,
+            version,
+            self.window,
+            self.start_date,
+            self.end_date,
+        )
+
+
+def _parse_date(value: str | None) -> date | None:
+    return date.fromisoformat(value) if value else None
+
+
+class HotQueryTracker:
+    """
+    Counts rolling-average requests to find the most requested ones.
+
+    Counts are merged into the response cache every ``flush_every``
+    requests and before warming, so with a shared cache every worker, and
+    a freshly started one, sees the queries requested across all of them.
+    """
+
+    CACHE_KEY = "weather:hot-queries"
+
+    def __init__(self, max_queries: int = 1000, flush_every: int = 100):
+        self.max_queries = max_queries
+        self.flush_every = flush_every
+        self._lock = threading.Lock()
+        self._pending: Counter[HotQuery] = Counter()
+        self._recorded = 0
+
+    def record(self, query: HotQuery) -> None:
+        with self._lock:
+            self._pending[query] += 1
+            self._recorded += 1
+            flush = self._recorded % self.flush_every == 0
+        if flush:
+            self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+        if not pending:
+            return
+        counts = self._stored()
+        counts.update(pending)
+        try:
+            caches[settings.WEATHER_RESPONSE_CACHE].set(
+                self.CACHE_KEY,
+                Counter(dict(counts.most_common(self.max_queries))),
+                None,
+            )
+        except Exception as e:
+            logger.warning(f"Storing the hot query counts failed: {e}")
+
+    def top(self, n: int) -> list[HotQuery]:
+        counts = self._stored()
+        with self._lock:
+            counts.update(self._pending)
+        return [query for query, _ in counts.most_common(n)]
+
+    def _stored(self) -> Counter[HotQuery]:
+        try:
+            return Counter(caches[settings.WEATHER_RESPONSE_CACHE].get(self.CACHE_KEY))
+        except Exception as e:
+            logger.warning(f"Reading the hot query counts failed: {e}")
+            return Counter()
+
+
+hot_queries = HotQueryTracker()
+
+
+class CacheWarmer:
+    """
+    Computes the responses of hot rolling-average queries into the response
+    cache, mapping the columnar snapshot and reading the materialized series
+    on the way, so the first requests after an ingest or a restart are
+    served warm.
+
+    Hot queries are WEATHER_WARM_QUERIES plus the most requested ones seen.
+    Cities without any get the full history of the materialized windows.
+    """
+
+    def __init__(
+        self,
+        queries: Iterable[HotQuery] | None = None,
+        tracker: HotQueryTracker | None = None,
+        top: int | None = None,
+        windows: Iterable[int] | None = None,
+        background: bool = True,
+    ):
+        self.queries = (
+            [HotQuery.from_dict(query) for query in settings.WEATHER_WARM_QUERIES]
+            if queries is None
+            else list(queries)
+        )
+        self.tracker = hot_queries if tracker is None else tracker
+        self.top = settings.WEATHER_WARM_TOP_QUERIES if top is None else top
+        self.windows = sorted(
+            set(settings.WEATHER_ROLLING_WINDOWS if windows is None else windows)
+        )
+        self.background = background
+
+    def hot_queries(self, cities: Iterable[str] | None = None) -> list[HotQuery]:
+        """The queries to warm for ``cities``, or for every stored city."""
+        queries = list(dict.fromkeys([*self.queries, *self.tracker.top(self.top)]))
+        if cities is None:
+            cities = (
+                WeatherData.objects.order_by("city")
+                .values_list("city", flat=True)
+                .distinct()
+            )
+        cities = list(cities)
+
+        queries = [query for query in queries if query.city in cities]
+        covered = {query.city for query in queries}
+        for city in cities:
+            if city not in covered:
+                queries.extend(HotQuery(city, window) for window in self.windows)
+        return queries
+
+    def schedule(self, cities: Iterable[str] | None = None) -> Future | None:
+        """Warm on the background thread, or right away without ``background``."""
+        if not self.background:
+            self.warm(cities)
+            return None
+        return _get_executor().submit(self._warm_in_background, cities)
+
+    def warm(self, cities: Iterable[str] | None = None) -> int:
+        """Warm the hot queries of ``cities``; returns the number warmed."""
+        self.tracker.flush()
+        repository = get_read_repository()
+        service = RollingAverageService(
+            repository, series_repository=DjangoRollingSeriesRepository()
+        )
+        cache = ResponseBodyCache()
+        encodings = supported_encodings()
+        warmed = 0
+
+        with track("warmup") as stage:
+            for query in self.hot_queries(cities):
+                try:
+                    # Read before the data, as the endpoint does.
+                    version = repository.data_version(query.city)
+                    if version is None:
+                        continue
+
+                    def calculate(query=query):
+                        return service.calculate(
+                            city=query.city,
+                            window=query.window,
+                            start_date=query.start_date,
+                            end_date=query.end_date,
+                        )
+
+                    if cache.timeout:
+                        cache.warm(
+                            query.etag(version),
+                            encodings,
+                            lambda: render_json(calculate()),
+                        )
+                    else:
+                        calculate()
+                    warmed += 1
+                except Exception as e:
+                    logger.warning(f"Warming {query} failed: {e}")
+            stage.rows = warmed
+
+        logger.info(f"Warmed {warmed} rolling-average queries.")
+        return warmed
+
+    def _warm_in_background(self, cities: Iterable[str] | None) -> int:
+        try:
+            return self.warm(cities)
+        except Exception as e:
+            logger.error(f"Cache warming failed: {e}", exc_info=True)
+            return 0
+        finally:
+            connections.close_all()
+
+
+def warm_on_startup() -> Future | None:
+    """
+    Warm the hot queries in the background when a worker starts. Workers
+    forked after this ran, as servers preloading the application do, warm
+    again in their own process.
+    """
+    global _warm_after_fork
+    if not settings.WEATHER_WARM_ENABLED:
+        return None
+    _warm_after_fork = True
+    return CacheWarmer().schedule()
+
+
+def _after_fork_in_child() -> None:
+    global _executor, _executor_lock
+    _executor = None
+    _executor_lock = threading.Lock()
+    if _warm_after_fork:
+        warm_on_startup()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
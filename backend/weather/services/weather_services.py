@@ -1,52 +1,154 @@
-from datetime import date
 import logging
-from typing import Optional
+
+from django.conf import settings
+import numpy as np
 import pandas as pd
+
+from weather.repositories.columnar_store import ColumnarWeatherStore
 from weather.repositories.weather_repository import (
-    WeatherDataFields,
+    SaveResult,
     WeatherDataRepository,
-    WeatherRecord,
+)
+from weather.repositories.quality_report_repository import QualityReportRepository
+from weather.services.analytics import (  # noqa: F401
+    RollingAverageService,
+    RollingSeriesService,
+    rolling_mean,
+)
+from weather.services.warmup import CacheWarmer
+from weather.services.data_quality import (
+    TEMPERATURE_COLUMNS,
+    DataQualityReportBuilder,
 )
 from weather.utils.weather_fetchers import WeatherFetcher
-from weather.utils.utils import log_action
+from weather.utils.metrics import add_rows, timed
+from weather.utils.utils import convert_to_batch, log_action
 
 logger = logging.getLogger("weather")
 
 
-class WeatherDataCollectorService:
+class WeatherDataValidationService:
     def __init__(
         self,
-        fetcher: WeatherFetcher,
+        dataframe: pd.DataFrame | None = None,
+        max_carry_rows: int | None = None,
     ):
-        self.fetcher = fetcher
-        self.df = None
-        self.records: list[WeatherRecord] = []
-
-    @log_action(action="Collecting historical data", logger=logger)
-    def collect_historical_data(self) -> None:
-        self.df = self.fetcher.fetch()
-
-    def get_data(self):
-        return self.df.copy()
-
-
-class WeatherDataValidationService:
-    def __init__(self, dataframe: pd.DataFrame):
         self.df = dataframe
+        self.report: dict | None = None
+        self._report_builder = DataQualityReportBuilder()
+        self.max_carry_rows = (
+            settings.WEATHER_INGEST_MAX_CARRY_ROWS
+            if max_carry_rows is None
+            else max_carry_rows
+        )
+        # Streaming state: the rows not final yet, as read, and per column
+        # the last value before them with its distance in rows.
+        self._carry: pd.DataFrame | None = None
+        self._anchors: dict[str, tuple[float, int]] = {}
+        self._last_emitted_time = None
 
-    @log_action(action="Cleaning data", logger=logger)
+    @log_action(action="Cleaning data", logger=logger, stage="validate")
     def clean_data(self):
         self.clean_types()
-        self.check_missing_dates()
-        self.check_missing_values()
-        self.check_duplicates()
-        self.check_sanity()
-        self.check_consistency()
+        self.report = self._report_builder.update(self.df).build()
+        self.log_report_summary()
         self.clean_missing_values()
+        self.drop_duplicates()
+        add_rows("validate", len(self.df))
+
+    @timed("validate")
+    def clean_chunk(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """
+        Clean the next date-ordered chunk of a stream and return the rows
+        that are final. Rows after a column's last value are held back until
+        a later chunk (or finish()) provides the value ending the gap, at
+        most ``max_carry_rows`` of them.
+        """
+        # Chunks may be slices of the caller's frame; clean a copy.
+        self.df = chunk.copy()
+        self.clean_types()
+        self._report_builder.update(self.df)
+
+        raw = self.df if self._carry is None else pd.concat([self._carry, self.df])
+        raw = raw.reset_index(drop=True)
+        cleaned, final = self._interpolate(raw, close=False)
+        if len(raw) - final > self.max_carry_rows:
+            logger.warning(
+                f"{len(raw) - final} rows wait for the end of a gap; filling "
+                f"the open gaps with their last value to write them."
+            )
+            cleaned, final = self._interpolate(raw, close=True)
+        return self._advance(raw, cleaned, final)
+
+    @timed("validate")
+    def finish(self) -> pd.DataFrame:
+        """Flush the rows still held back and finalize the quality report."""
+        tail = self.df.iloc[0:0] if self.df is not None else pd.DataFrame()
+        if self._carry is not None:
+            cleaned, final = self._interpolate(self._carry, close=True)
+            tail = self._advance(self._carry, cleaned, final)
+
+        self.report = self._report_builder.build()
+        self.log_report_summary()
+        return tail
+
+    def _interpolate(self, raw: pd.DataFrame, close: bool) -> tuple[pd.DataFrame, int]:
+        """
+        ``raw`` with each column's gaps filled linearly by position, from
+        the column's anchor on, as clean_missing_values() does for a whole
+        frame, and the number of leading rows that are final. Rows after a
+        column's last value are final only with ``close``; they then keep
+        that value. Missing values before a column's first value stay.
+        """
+        cleaned = raw.copy()
+        final = len(raw)
+        positions = np.arange(len(raw))
+        for col in TEMPERATURE_COLUMNS:
+            values = raw[col].to_numpy(dtype="float64")
+            known = positions[~np.isnan(values)]
+            known_values = values[known]
+            if col in self._anchors:
+                value, distance = self._anchors[col]
+                known = np.concatenate([[-distance], known])
+                known_values = np.concatenate([[value], known_values])
+            if known.size == 0:
+                continue
+
+            filled = np.interp(positions, known, known_values, left=np.nan)
+            filled[~np.isnan(values)] = values[~np.isnan(values)]
+            cleaned[col] = filled
+            if not close and known[-1] < len(raw) - 1:
+                final = min(final, max(int(known[-1]) + 1, 0))
+        return cleaned, final
+
+    def _advance(
+        self, raw: pd.DataFrame, cleaned: pd.DataFrame, final: int
+    ) -> pd.DataFrame:
+        """Emit the first ``final`` rows and hold back the others."""
+        for col in TEMPERATURE_COLUMNS:
+            known = np.flatnonzero(raw[col].iloc[:final].notna().to_numpy())
+            if known.size:
+                value = float(raw[col].iloc[known[-1]])
+                self._anchors[col] = (value, final - int(known[-1]))
+            elif col in self._anchors:
+                value, distance = self._anchors[col]
+                self._anchors[col] = (value, distance + final)
+
+        self._carry = raw.iloc[final:] if final < len(raw) else None
+        self.df = cleaned.iloc[:final]
+        return self._emit(self.df)
+
+    def _emit(self, df: pd.DataFrame) -> pd.DataFrame:
+        df = df.drop_duplicates(subset="Time", keep="first")
+        if self._last_emitted_time is not None:
+            df = df[df["Time"] > self._last_emitted_time]
+        if not df.empty:
+            self._last_emitted_time = df["Time"].iloc[-1]
+        return df
 
     @log_action(action="Cleaning types", logger=logger)
     def clean_types(self):
-        for col in ["t_max", "t_mean", "t_min"]:
+        for col in TEMPERATURE_COLUMNS:
             self.df[col] = pd.to_numeric(self.df[col], errors="coerce")
         if not pd.api.types.is_datetime64_any_dtype(self.df["Time"]):
             self.df["Time"] = pd.to_datetime(self.df["Time"], format="%Y%m%d")
@@ -54,100 +156,117 @@ class WeatherDataValidationService:
     @log_action(action="Cleaning missing values", logger=logger)
     def clean_missing_values(self):
         """Interpolating missing values with linear interpolation"""
-        self.df[["t_max", "t_mean", "t_min"]] = self.df[
-            ["t_max", "t_mean", "t_min"]
-        ].interpolate(method="linear")
-
-    @log_action(action="Checking missing dates", logger=logger)
-    def check_missing_dates(self):
-        full_index = pd.date_range(self.df.index.min(), self.df.index.max(), freq="D")
-        missing_dates = full_index.difference(self.df.index)
-        if len(missing_dates) > 0:
-            logger.warning(f"Missing dates: {missing_dates}")
-
-    @log_action(action="Checking missing values", logger=logger)
-    def check_missing_values(self):
-        missing = self.df[["t_max", "t_mean", "t_min"]].isna()
-
-        if missing.any().any():
-            for col in ["t_max", "t_mean", "t_min"]:
-                missing_dates = self.df.index[missing[col]].tolist()
-                if missing_dates:
-                    logger.warning(f"Missing values in {col} at dates: {missing_dates}")
-
-    @log_action(action="Checking duplicates", logger=logger)
-    def check_duplicates(self):
-        duplicates = self.df.index[self.df.index.duplicated()]
-        if len(duplicates) > 0:
-            logger.warning(f"Duplicates found at dates: {duplicates}")
-            self.df = self.df[~self.df.index.duplicated(keep="first")]
-
-    @log_action(action="Checking sanity", logger=logger)
-    def check_sanity(self):
-        logger.info("Rule: -50 °C < t < 60 °C.")
-        min_temp = -50
-        max_temp = 60
-
-        for col in ["t_max", "t_mean", "t_min"]:
-            invalid = self.df[(self.df[col] < min_temp) | (self.df[col] > max_temp)]
-            if not invalid.empty:
-                logger.warning(
-                    f"{col} has unrealistic values at dates: {invalid.index.tolist()}"
-                )
-
-    @log_action(action="Checking consistency", logger=logger)
-    def check_consistency(self):
-        inconsistent = self.df[
-            (self.df["t_min"] > self.df["t_mean"])
-            | (self.df["t_mean"] > self.df["t_max"])
-        ]
-        if not inconsistent.empty:
-            logger.warning(
-                f"Inconsistent temperature values at dates: {inconsistent.index.tolist()}\n{inconsistent}"
-            )
+        self.df[TEMPERATURE_COLUMNS] = self.df[TEMPERATURE_COLUMNS].interpolate(
+            method="linear"
+        )
+
+    def drop_duplicates(self):
+        if self.report["duplicates"]["count"]:
+            self.df = self.df.drop_duplicates(subset="Time", keep="first")
+
+    def log_report_summary(self):
+        summary = DataQualityReportBuilder.summary(self.report)
+        if self.report["issue_count"]:
+            logger.warning(f"Data quality issues found: {summary}")
+        else:
+            logger.info(f"Data quality check passed: {summary}")
+
+    def get_report(self) -> dict | None:
+        return self.report
 
     def get_cleaned_data(self):
         return self.df.copy()
 
 
-class RollingAverageService:
-    def __init__(self, repository: WeatherDataRepository):
-        self.repository = repository
+class WeatherIngestPipeline:
+    """
+    Fetch → validate → save for one city.
+
+    The default mode works on the fully merged DataFrame. The streaming mode
+    pulls date-ordered chunks from the fetcher and writes each cleaned chunk
+    as soon as it is final, so memory stays bounded by the chunk size.
+
+    Afterwards the columnar store and the materialized rolling series are
+    brought up to date, the latter only from the first changed date on, and
+    the hot queries of changed cities are warmed.
+    """
 
-    @log_action(action="Calculating rolling averages", logger=logger)
-    def calculate(
+    def __init__(
         self,
-        city: str,
-        window: int = 7,
-        start_date: Optional[date] = None,
-        end_date: Optional[date] = None,
+        fetcher: WeatherFetcher,
+        repository: WeatherDataRepository,
+        report_repository: QualityReportRepository,
+        store: ColumnarWeatherStore | None = None,
+        rolling_series: RollingSeriesService | None = None,
+        warmer: CacheWarmer | None = None,
     ):
-        records = self.repository.get(
-            city=city, start_date=start_date, end_date=end_date
-        )
+        self.fetcher = fetcher
+        self.repository = repository
+        self.report_repository = report_repository
+        self.store = store
+        self.rolling_series = rolling_series
+        self.warmer = warmer
 
-        if not records:
-            return []
+    @log_action(action="Running ingest pipeline", logger=logger, stage="ingest")
+    def run(self) -> dict:
+        validator_service = WeatherDataValidationService(dataframe=self.fetcher.fetch())
+        validator_service.clean_data()
+        report = validator_service.get_report()
+        self.report_repository.save(city=self.fetcher.city, report=report)
 
-        result_df = pd.DataFrame()
+        base_version = self.repository.data_version(self.fetcher.city)
+        result = self.repository.save_all(convert_to_batch(validator_service.df))
+        self._refresh_store()
+        self._refresh_rolling_series(result, base_version)
+        self._warm(result)
+        return report
 
-        df = pd.DataFrame([r.to_dict() for r in records])
-        df = df.sort_values("time").set_index("time")
+    @log_action(
+        action="Running streaming ingest pipeline",
+        logger=logger,
+        stage="ingest_streaming",
+    )
+    def run_streaming(self, chunk_size: int) -> dict:
+        validator_service = WeatherDataValidationService()
+        base_version = self.repository.data_version(self.fetcher.city)
+        result = SaveResult()
+        saved = 0
 
-        result_df["t_max_avg"] = (
-            df[WeatherDataFields.T_MAX.value]
-            .rolling(window=window, min_periods=1)
-            .mean()
-        )
-        result_df["t_mean_avg"] = (
-            df[WeatherDataFields.T_MEAN.value]
-            .rolling(window=window, min_periods=1)
-            .mean()
-        )
-        result_df["t_min_avg"] = (
-            df[WeatherDataFields.T_MIN.value]
-            .rolling(window=window, min_periods=1)
-            .mean()
+        for chunk in self.fetcher.fetch_chunks(chunk_size):
+            saved += self._save(validator_service.clean_chunk(chunk), result)
+        saved += self._save(validator_service.finish(), result)
+
+        report = validator_service.get_report()
+        self.report_repository.save(city=self.fetcher.city, report=report)
+        logger.info(f"Streaming ingest saved {saved} rows for {self.fetcher.city}.")
+        self._refresh_store()
+        self._refresh_rolling_series(result, base_version)
+        self._warm(result)
+        return report
+
+    def _refresh_store(self) -> None:
+        if self.store is not None:
+            self.store.refresh(self.fetcher.city, self.repository)
+
+    def _refresh_rolling_series(
+        self, result: SaveResult, base_version: str | None
+    ) -> None:
+        if self.rolling_series is None:
+            return
+        span = result.spans.get(self.fetcher.city)
+        self.rolling_series.refresh(
+            self.fetcher.city,
+            since=span[0] if span is not None else None,
+            base_version=base_version,
+            versions=result.versions.get(self.fetcher.city, []),
         )
 
-        return result_df.reset_index().to_dict(orient="records")
+    def _warm(self, result: SaveResult) -> None:
+        if self.warmer is not None and result:
+            self.warmer.schedule(result.spans)
+
+    def _save(self, df: pd.DataFrame, result: SaveResult) -> int:
+        if df.empty:
+            return 0
+        result.update(self.repository.save_all(convert_to_batch(df)))
+        return len(df)
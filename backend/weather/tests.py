@@ -1,3 +1,1324 @@
-from django.test import TestCase
+from datetime import date, timedelta
+import gzip
+from importlib import import_module
+import logging
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import time
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import numpy as np
+import pandas as pd
+import requests
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from weather.benchmarks.fake_hungaromet import FakeHungarometServer
+from weather.benchmarks.suite import STAGES, BenchmarkSuite
+from weather.benchmarks.synthetic import (
+    SyntheticCity,
+    SyntheticHungarometSession,
+    recent_archive,
+)
+from weather.models import (
+    DataQualityReport,
+    RollingSeries,
+    WeatherData,
+    WeatherDataVersion,
+)
+from weather.repositories.columnar_store import (
+    ColumnarWeatherDataRepository,
+    ColumnarWeatherStore,
+)
+from weather.repositories.quality_report_repository import (
+    DjangoQualityReportRepository,
+)
+from weather.repositories.rolling_series_repository import (
+    DjangoRollingSeriesRepository,
+)
+from weather.repositories.weather_repository import (
+    DjangoWeatherDataRepository,
+    _same_values,
+)
+from weather.services.analytics import (
+    RollingAverageService,
+    RollingSeriesService,
+    rolling_mean,
+)
+from weather.services.data_quality import DataQualityReportBuilder
+from weather.services import warmup
+from weather.services.warmup import (
+    CacheWarmer,
+    HotQuery,
+    HotQueryTracker,
+    warm_on_startup,
+)
+from weather.services.weather_services import (
+    WeatherDataValidationService,
+    WeatherIngestPipeline,
+)
+from weather.utils import metrics
+from weather.utils.response_cache import encoded_etag, negotiate_encoding
+from weather.utils.utils import convert_to_batch, log_action
+from weather.utils.weather_fetchers import HungarometRecentSource, WeatherFetcher
+from weather.utils.weather_sources import (
+    FileWeatherSource,
+    MergeEngine,
+    WeatherSource,
+    WeatherSourceRegistry,
+)
+
+
+def daily_frame(
+    start: str, days: int, city: str = "Testville", seed: int = 0
+) -> pd.DataFrame:
+    """Consistent daily temperatures (t_min <= t_mean <= t_max)."""
+    rng = np.random.default_rng(seed)
+    t_mean = rng.normal(10, 8, days).round(1)
+    return pd.DataFrame(
+        {
+            "Time": pd.date_range(start, periods=days, freq="D"),
+            "t_max": t_mean + 5,
+            "t_mean": t_mean,
+            "t_min": t_mean - 5,
+            "city": city,
+        }
+    )
+
+
+class FrameFetcher(WeatherFetcher):
+    def __init__(self, df: pd.DataFrame, city: str):
+        self.df = df
+        self.city = city
+
+    def fetch(self) -> pd.DataFrame:
+        df = self.df.copy()
+        df["city"] = self.city
+        return df
+
+
+class FrameSource(WeatherSource):
+    def __init__(self, name, df, priority=0, column_priority=None, coverage=None):
+        self.name = name
+        self.df = df
+        self.priority = priority
+        self.column_priority = column_priority or {}
+        self.coverage = coverage or (None, None)
+
+    def read(self) -> pd.DataFrame:
+        return self.df.copy()
+
+
+class MergeEngineTests(SimpleTestCase):
+    def setUp(self):
+        primary = daily_frame("2000-01-01", 10).drop(columns="city")
+        primary.loc[3, "t_mean"] = np.nan
+        primary = primary.drop(index=[5])
+        secondary = daily_frame("2000-01-01", 14, seed=1).drop(columns="city")
+        self.primary = FrameSource("primary", primary, priority=20)
+        self.secondary = FrameSource("secondary", secondary, priority=10)
+
+    def test_higher_priority_wins_and_lower_fills_gaps(self):
+        merged = MergeEngine([self.secondary, self.primary]).merge()
+
+        self.assertEqual(len(merged), 14)
+        primary = self.primary.df.set_index("Time")
+        secondary = self.secondary.df.set_index("Time")
+        for row in merged.itertuples():
+            for column in ("t_max", "t_mean", "t_min"):
+                source = getattr(row, f"{column}_source")
+                in_primary = row.Time in primary.index and not np.isnan(
+                    primary.at[row.Time, column]
+                )
+                self.assertEqual(source, "primary" if in_primary else "secondary")
+                expected = (primary if in_primary else secondary).at[row.Time, column]
+                self.assertEqual(getattr(row, column), expected)
+
+        self.assertEqual(merged.loc[3, "t_mean_source"], "secondary")
+        self.assertEqual(merged.loc[3, "t_max_source"], "primary")
+        self.assertEqual(merged.loc[5, "t_max_source"], "secondary")
+
+    def test_column_priority_overrides_source_priority(self):
+        self.secondary.column_priority = {"t_min": 30}
+
+        merged = MergeEngine([self.primary, self.secondary]).merge()
+
+        self.assertTrue((merged["t_min_source"] == "secondary").all())
+        self.assertEqual(merged.loc[0, "t_max_source"], "primary")
+
+    def test_coverage_and_range_limit_sources(self):
+        self.primary.coverage = (date(2000, 1, 3), None)
+
+        merged = MergeEngine(
+            [self.primary, self.secondary], end=date(2000, 1, 12)
+        ).merge()
+
+        self.assertEqual(str(merged["Time"].iloc[-1].date()), "2000-01-12")
+        self.assertEqual(list(merged["t_max_source"][:2]), ["secondary"] * 2)
+        self.assertEqual(merged.loc[2, "t_max_source"], "primary")
+
+    def test_duplicate_dates_keep_first_occurrence(self):
+        df = self.primary.df
+        duplicate = df.iloc[[0]].assign(t_max=99.0)
+        self.primary.df = pd.concat([df.iloc[[0]], duplicate, df.iloc[1:]])
+
+        merged = MergeEngine([self.primary]).merge()
+
+        self.assertTrue(merged["Time"].is_unique)
+        self.assertNotEqual(merged.loc[0, "t_max"], 99.0)
+        self.assertEqual(merged.attrs["source_duplicates"], {"primary": ["2000-01-01"]})
+
+    def test_dropped_duplicates_reach_the_quality_report(self):
+        primary = self.primary.df
+        self.primary.df = pd.concat([primary, primary.iloc[[2, 6]]]).sort_values(
+            "Time", kind="stable"
+        )
+        secondary = self.secondary.df
+        self.secondary.df = pd.concat([secondary, secondary.iloc[[12]]]).sort_values(
+            "Time", kind="stable"
+        )
+        engine = MergeEngine([self.primary, self.secondary])
+
+        whole = WeatherDataValidationService(dataframe=engine.merge().assign(city="X"))
+        whole.clean_data()
+        streaming = WeatherDataValidationService()
+        for chunk in engine.iter_chunks(4):
+            streaming.clean_chunk(chunk.assign(city="X"))
+        streaming.finish()
+
+        for report in (whole.get_report(), streaming.get_report()):
+            self.assertEqual(report["duplicates"]["count"], 3)
+            self.assertEqual(report["duplicates"]["first"], "2000-01-03")
+            self.assertEqual(report["duplicates"]["last"], "2000-01-13")
+            self.assertEqual(
+                report["duplicates"]["sources"], {"primary": 2, "secondary": 1}
+            )
+
+    def test_source_names_are_unique_per_city(self):
+        registry = WeatherSourceRegistry()
+        registry.register("Budapest", lambda city: self.primary, name="primary")
+        registry.register("Szeged", lambda city: self.primary, name="primary")
+
+        with self.assertRaisesMessage(ValueError, "'primary' is already registered"):
+            registry.register("Budapest", lambda city: self.secondary, name="primary")
+        with self.assertRaisesMessage(ValueError, "need a name"):
+            registry.register("Budapest", lambda city: self.secondary)
+        self.assertEqual(len(registry.sources_for("Budapest")), 1)
+
+    def test_chunked_merge_matches_full_merge(self):
+        engine = MergeEngine([self.primary, self.secondary])
+        full = engine.merge()
+
+        for chunk_size in (1, 3, 4, 100):
+            with self.subTest(chunk_size=chunk_size):
+                chunked = pd.concat(engine.iter_chunks(chunk_size), ignore_index=True)
+                pd.testing.assert_frame_equal(chunked, full)
+
+    def test_file_source_maps_columns(self):
+        path = Path(self.enterContext(TemporaryDirectory())) / "station.csv"
+        path.write_text("date;max;min\n20000101;5.5;-1.0\n20000102;6.0;0.5\n")
+        source = FileWeatherSource(
+            "file",
+            str(path),
+            column_map={"date": "Time", "max": "t_max", "min": "t_min"},
+            date_format="%Y%m%d",
+            sep=";",
+        )
+
+        merged = MergeEngine([source]).merge()
+
+        self.assertEqual(list(merged["t_max"]), [5.5, 6.0])
+        self.assertTrue(merged["t_mean"].isna().all())
+        self.assertEqual(list(merged["t_min_source"]), ["file", "file"])
+
+
+class DataQualityReportTests(SimpleTestCase):
+    def test_gap_bounds_beyond_stored_gap_runs(self):
+        # Every third day missing: far more gaps than MAX_GAP_RUNS.
+        df = daily_frame("2000-01-01", 1800)
+        df = df[np.arange(len(df)) % 3 != 1]
+        expected_gaps = len(np.arange(1800)[np.arange(1800) % 3 == 1])
+
+        report = DataQualityReportBuilder().update(df).build()
+        missing = report["missing_dates"]
+
+        self.assertEqual(missing["gap_runs"], expected_gaps)
+        self.assertGreater(missing["gap_runs"], DataQualityReportBuilder.MAX_GAP_RUNS)
+        self.assertEqual(len(missing["gaps"]), DataQualityReportBuilder.MAX_GAP_RUNS)
+        self.assertEqual(missing["count"], expected_gaps)
+        self.assertEqual(missing["first"], "2000-01-02")
+        self.assertEqual(missing["last"], str(date(2000, 1, 1) + timedelta(days=1798)))
+
+    def test_chunked_report_matches_whole_frame(self):
+        df = daily_frame("2000-01-01", 1000)
+        df = df.drop(index=[10, 11, 500, 998]).reset_index(drop=True)
+        df.loc[20, "t_mean"] = np.nan
+        df.loc[30, "t_max"] = 99
+        df = pd.concat([df, df.iloc[[40]]]).sort_values("Time", kind="stable")
+
+        whole = DataQualityReportBuilder().update(df).build()
+        for size in (1, 7, 333):
+            builder = DataQualityReportBuilder()
+            for start in range(0, len(df), size):
+                builder.update(df.iloc[start : start + size])
+            self.assertEqual(builder.build(), whole, f"chunk size {size}")
+
+
+class ConvertToBatchTests(SimpleTestCase):
+    def test_converts_columns_to_dates_and_floats(self):
+        df = pd.DataFrame(
+            {
+                "Time": pd.to_datetime(["2000-01-01 13:30", "2000-01-02 00:00"]),
+                "t_max": [5, 6],
+                "t_mean": [1.5, np.nan],
+                "t_min": np.array([-2, -3], dtype="float32"),
+                "city": "Testville",
+            }
+        )
+
+        batch = convert_to_batch(df)
+
+        self.assertEqual(batch.city, "Testville")
+        self.assertEqual(batch.time, [date(2000, 1, 1), date(2000, 1, 2)])
+        self.assertEqual(batch.t_max, [5.0, 6.0])
+        self.assertEqual(batch.t_mean[0], 1.5)
+        self.assertTrue(np.isnan(batch.t_mean[1]))
+        self.assertEqual(batch.t_min, [-2.0, -3.0])
+        for column in (batch.t_max, batch.t_mean, batch.t_min):
+            self.assertTrue(all(type(value) is float for value in column))
+
+    def test_rejects_several_cities_and_accepts_empty_frames(self):
+        df = pd.concat([daily_frame("2000-01-01", 2), daily_frame("2000-01-03", 2)])
+        df.loc[df.index[-1], "city"] = "Elsewhere"
+        with self.assertRaises(ValueError):
+            convert_to_batch(df)
+
+        empty = convert_to_batch(daily_frame("2000-01-01", 0))
+        self.assertEqual((empty.city, len(empty)), ("", 0))
+
+
+class FakeHungarometServerTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.city = SyntheticCity("Synthcity000", 90000, seed=0)
+        cls.archives = recent_archive(cls.city)
+        (cls.path,) = cls.archives
+
+    def serve(self, **options) -> FakeHungarometServer:
+        return self.enterContext(FakeHungarometServer(self.archives, **options))
+
+    def source(self, server: FakeHungarometServer) -> HungarometRecentSource:
+        return HungarometRecentSource(
+            self.city.name, self.city.station_number, base_url=server.url
+        )
+
+    def test_source_reads_archive_over_http(self):
+        server = self.serve()
+        expected = HungarometRecentSource(
+            self.city.name,
+            self.city.station_number,
+            session=SyntheticHungarometSession(self.archives),
+        ).read()
+
+        pd.testing.assert_frame_equal(self.source(server).read(), expected)
+        chunks = list(self.source(server).read_chunks(1000))
+        pd.testing.assert_frame_equal(
+            pd.concat(chunks, ignore_index=True), expected.reset_index(drop=True)
+        )
+        self.assertEqual(server.stats["ok"], 2)
+        self.assertEqual(server.stats["bytes_sent"], 2 * len(self.archives[self.path]))
+
+    def test_if_none_match_gets_304(self):
+        server = self.serve()
+        url = server.url + self.path
+
+        first = requests.get(url)
+        revalidated = requests.get(
+            url, headers={"If-None-Match": first.headers["ETag"]}
+        )
+        changed = requests.get(url, headers={"If-None-Match": '"other"'})
+
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated.content, b"")
+        self.assertEqual(revalidated.headers["ETag"], first.headers["ETag"])
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(server.stats["not_modified"], 1)
+        self.assertEqual(requests.get(server.url + "/missing.zip").status_code, 404)
+
+    def test_without_etags_always_sends_the_archive(self):
+        server = self.serve(etag=False)
+        url = server.url + self.path
+
+        response = requests.get(url, headers={"If-None-Match": "*"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("ETag", response.headers)
+
+    def test_injected_errors_fail_the_download(self):
+        server = self.serve(error_rate=1.0, error_status=502)
+
+        with self.assertRaises(ValueError):
+            self.source(server).read()
+        self.assertEqual(server.stats["errors"], 1)
+
+    def test_latency_and_bandwidth_slow_responses_down(self):
+        size = len(self.archives[self.path])
+        for options, minimum in (
+            ({"latency": 0.2}, 0.2),
+            ({"bandwidth": int(size / 0.2)}, 0.15),
+        ):
+            with self.subTest(**options):
+                server = self.serve(**options)
+                start = time.perf_counter()
+                response = requests.get(server.url + self.path)
+                self.assertEqual(len(response.content), size)
+                self.assertGreaterEqual(time.perf_counter() - start, minimum)
+
+
+class StreamingIngestTests(TestCase):
+    def setUp(self):
+        df = daily_frame("1990-01-01", 400)
+        df = df.drop(index=[5, 6, 7, 200]).reset_index(drop=True)
+        # Missing values, including runs that straddle chunk edges.
+        df.loc[[1, 48, 49, 50, 51, 99, 100, 101, 250], "t_mean"] = np.nan
+        df.loc[[49, 150, len(df) - 1], "t_max"] = np.nan
+        df = pd.concat([df, df.iloc[[60, 61]]]).sort_values("Time", kind="stable")
+        self.df = df.reset_index(drop=True)
+        self.repository = DjangoWeatherDataRepository()
+
+    def ingest(self, city: str, chunk_size: int | None = None) -> dict:
+        pipeline = WeatherIngestPipeline(
+            fetcher=FrameFetcher(self.df, city),
+            repository=self.repository,
+            report_repository=DjangoQualityReportRepository(),
+        )
+        if chunk_size is None:
+            return pipeline.run()
+        return pipeline.run_streaming(chunk_size=chunk_size)
+
+    def test_streaming_matches_full_ingest(self):
+        full_report = self.ingest("Full")
+        full = self.repository.get_columns("Full")
+        self.assertGreater(full["time"].size, 0)
+
+        for chunk_size in (1, 2, 49, 50, 51, 100, len(self.df)):
+            city = f"Stream{chunk_size}"
+            with self.subTest(chunk_size=chunk_size):
+                report = self.ingest(city, chunk_size)
+                streamed = self.repository.get_columns(city)
+
+                self.assertEqual(report, full_report)
+                np.testing.assert_array_equal(streamed["time"], full["time"])
+                for name in ("t_max", "t_mean", "t_min"):
+                    np.testing.assert_allclose(
+                        streamed[name], full[name], rtol=0, atol=1e-12
+                    )
+
+    def stream(self, df: pd.DataFrame, chunk_size: int, **kwargs) -> list:
+        """The rows emitted per chunk, then by finish()."""
+        service = WeatherDataValidationService(**kwargs)
+        emitted = [
+            service.clean_chunk(df.iloc[start : start + chunk_size])
+            for start in range(0, len(df), chunk_size)
+        ]
+        emitted.append(service.finish())
+        self.assertLessEqual(
+            len(service._carry) if service._carry is not None else 0,
+            chunk_size + service.max_carry_rows,
+        )
+        return emitted
+
+    def assert_matches_whole_frame(self, emitted: list, df: pd.DataFrame):
+        whole = WeatherDataValidationService(dataframe=df.copy())
+        whole.clean_data()
+        streamed = pd.concat(emitted, ignore_index=True)
+        np.testing.assert_array_equal(
+            streamed["Time"].to_numpy(), whole.df["Time"].to_numpy()
+        )
+        for name in ("t_max", "t_mean", "t_min"):
+            np.testing.assert_allclose(
+                streamed[name], whole.df[name], rtol=0, atol=1e-12
+            )
+
+    def test_missing_column_does_not_hold_rows_back(self):
+        df = daily_frame("1990-01-01", 1000)
+        df["t_min"] = np.nan
+
+        emitted = self.stream(df, chunk_size=100)
+
+        self.assertEqual([len(rows) for rows in emitted], [100] * 10 + [0])
+        self.assert_matches_whole_frame(emitted, df)
+
+    def test_long_gap_is_carried_per_column(self):
+        df = daily_frame("1990-01-01", 1000)
+        df.loc[10:989, "t_min"] = np.nan
+        df.loc[500:502, "t_max"] = np.nan
+
+        emitted = self.stream(df, chunk_size=100, max_carry_rows=5000)
+        self.assertEqual(len(emitted[0]), 10)
+        self.assertEqual(len(emitted[-2]), 990)
+        self.assert_matches_whole_frame(emitted, df)
+
+    def test_carry_is_capped(self):
+        df = daily_frame("1990-01-01", 1000)
+        df.loc[10:, "t_min"] = np.nan
+
+        emitted = self.stream(df, chunk_size=100, max_carry_rows=250)
+
+        self.assertGreater(sum(map(len, emitted[:-1])), 700)
+        # A gap open until the end keeps its last value either way.
+        self.assert_matches_whole_frame(emitted, df)
+
+    def test_repeated_streaming_ingest_changes_nothing(self):
+        self.ingest("Again", chunk_size=64)
+        before = self.repository.get_columns("Again")
+        version = self.repository.data_version("Again")
+
+        self.ingest("Again", chunk_size=64)
+
+        self.assertEqual(self.repository.data_version("Again"), version)
+        np.testing.assert_array_equal(
+            self.repository.get_columns("Again")["t_mean"], before["t_mean"]
+        )
+
+
+class CollectWeatherCommandTests(SimpleTestCase):
+    def collect(self, *args) -> str:
+        with mock.patch.object(WeatherIngestPipeline, "run") as run, mock.patch.object(
+            WeatherIngestPipeline, "run_streaming"
+        ) as run_streaming:
+            call_command("collect_weather", *args)
+        self.assertEqual(run.call_count + run_streaming.call_count, 1)
+        return "stream" if run_streaming.called else "full"
+
+    def test_flags_override_the_setting_both_ways(self):
+        for setting, args, expected in (
+            (False, [], "full"),
+            (False, ["--stream"], "stream"),
+            (True, [], "stream"),
+            (True, ["--no-stream"], "full"),
+        ):
+            with self.subTest(setting=setting, args=args):
+                with override_settings(WEATHER_INGEST_STREAMING=setting):
+                    self.assertEqual(self.collect(*args), expected)
+
+
+class QualityReportAPITests(TestCase):
+    def setUp(self):
+        self.repository = DjangoQualityReportRepository()
+        for city in ("Budapest", "Testville"):
+            report = DataQualityReportBuilder().update(daily_frame("2000-01-01", 30))
+            self.repository.save(city=city, report=report.build())
+
+    def test_lists_reports_newest_first(self):
+        response = self.client.get(reverse("quality-reports"), {"limit": 5})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [r["city"] for r in response.json()], ["Testville", "Budapest"]
+        )
+
+    def test_city_filter(self):
+        response = self.client.get(reverse("quality-reports"), {"city": "Budapest"})
+
+        self.assertEqual([r["city"] for r in response.json()], ["Budapest"])
+
+    def test_invalid_limit_is_a_bad_request(self):
+        for limit in ("0", "501", "many"):
+            with self.subTest(limit=limit):
+                response = self.client.get(reverse("quality-reports"), {"limit": limit})
+
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("limit", response.json())
+
+
+class RollingMeanTests(SimpleTestCase):
+    def test_matches_pandas_rolling_with_missing_values(self):
+        values = daily_frame("2000-01-01", 500)["t_mean"].to_numpy()
+        values[[0, 10, 11, 12, 13, 14, 15, 16, 17, 300]] = np.nan
+
+        for window in (1, 3, 7, 30, 365, 1000):
+            with self.subTest(window=window):
+                expected = (
+                    pd.Series(values).rolling(window, min_periods=1).mean().to_numpy()
+                )
+                np.testing.assert_allclose(
+                    rolling_mean(values, window), expected, rtol=0, atol=1e-12
+                )
+
+    def test_all_missing_window_is_nan(self):
+        values = np.array([1.0, np.nan, np.nan, np.nan, 5.0])
+
+        means = rolling_mean(values, 2)
+
+        np.testing.assert_array_equal(
+            np.isnan(means), [False, False, True, True, False]
+        )
+
+
+class ColumnarStoreTests(TestCase):
+    def setUp(self):
+        self.root = self.enterContext(TemporaryDirectory())
+        self.repository = DjangoWeatherDataRepository()
+        self.df = daily_frame("2000-01-01", 120, city="Budapest")
+        self.repository.save_all(convert_to_batch(self.df))
+
+    def test_range_reads_match_the_database(self):
+        store = ColumnarWeatherStore(self.root)
+        store.refresh("Budapest", self.repository)
+
+        for start, end in (
+            (None, None),
+            (date(2000, 2, 1), None),
+            (None, date(2000, 1, 15)),
+            (date(2000, 3, 1), date(2000, 3, 31)),
+            (date(1999, 1, 1), date(1999, 12, 31)),
+        ):
+            with self.subTest(start=start, end=end):
+                mapped = store.get_columns("Budapest", start, end)
+                stored = self.repository.get_columns("Budapest", start, end)
+                for name, values in stored.items():
+                    np.testing.assert_array_equal(mapped[name], values)
+
+    def test_refresh_swaps_snapshot_for_open_readers(self):
+        store = ColumnarWeatherStore(self.root)
+        first = store.refresh("Budapest", self.repository)
+        self.assertEqual(store.get_columns("Budapest")["time"].size, 120)
+
+        more = daily_frame("2000-04-25", 10, city="Budapest", seed=3)
+        self.repository.save_all(convert_to_batch(more))
+        second = store.refresh("Budapest", self.repository)
+        third = store.refresh("Budapest", self.repository)
+
+        self.assertNotEqual(first, second)
+        self.assertEqual(store.version("Budapest"), third)
+        self.assertEqual(store.get_columns("Budapest")["time"].size, 125)
+        snapshots = [p for p in Path(self.root, "Budapest").iterdir() if p.is_dir()]
+        self.assertEqual(len(snapshots), ColumnarWeatherStore.KEEP_VERSIONS)
+
+    def test_repository_falls_back_for_cities_without_snapshot(self):
+        self.repository.save_all(convert_to_batch(daily_frame("2000-01-01", 5)))
+        store = ColumnarWeatherStore(self.root)
+        store.refresh("Budapest", self.repository)
+        columnar = ColumnarWeatherDataRepository(store, fallback=self.repository)
+
+        self.assertEqual(columnar.get_columns("Testville")["time"].size, 5)
+        self.assertEqual(len(columnar.get(city="Budapest", limit=3)), 3)
+        self.assertTrue(columnar.exists_for_city("Testville"))
+        self.assertFalse(columnar.exists_for_city("Nowhere"))
+
+    def test_rolling_average_is_the_same_from_either_repository(self):
+        store = ColumnarWeatherStore(self.root)
+        store.refresh("Budapest", self.repository)
+        columnar = ColumnarWeatherDataRepository(store, fallback=self.repository)
+
+        expected = RollingAverageService(self.repository).calculate(
+            "Budapest", 7, date(2000, 2, 1)
+        )
+        self.assertEqual(
+            RollingAverageService(columnar).calculate("Budapest", 7, date(2000, 2, 1)),
+            expected,
+        )
+
+
+class RecordingSeriesRepository(DjangoRollingSeriesRepository):
+    """Remembers where each write started (None for a full rebuild)."""
+
+    def __init__(self):
+        self.writes = []
+
+    def write(self, city, window, version, columns, since=None):
+        self.writes.append(since)
+        super().write(city, window, version, columns, since=since)
+
+
+class RollingSeriesTests(TestCase):
+    WINDOWS = (1, 7, 30)
+
+    def setUp(self):
+        self.repository = DjangoWeatherDataRepository()
+        self.series_repository = RecordingSeriesRepository()
+        self.series = RollingSeriesService(
+            self.repository, self.series_repository, self.WINDOWS
+        )
+        df = daily_frame("2000-01-01", 200, city="Budapest")
+        self.df = df.drop(index=[10, 11, 12, 100]).reset_index(drop=True)
+
+    def ingest(self, df: pd.DataFrame) -> None:
+        WeatherIngestPipeline(
+            fetcher=FrameFetcher(df, "Budapest"),
+            repository=self.repository,
+            report_repository=DjangoQualityReportRepository(),
+            rolling_series=self.series,
+        ).run()
+
+    def assert_matches_on_the_fly(self, **ranges):
+        on_the_fly = RollingAverageService(self.repository)
+        materialized = RollingAverageService(
+            self.repository, series_repository=self.series_repository
+        )
+        for window in (*self.WINDOWS, 90):
+            with self.subTest(window=window, **ranges):
+                expected = on_the_fly.calculate("Budapest", window, **ranges)
+                actual = materialized.calculate("Budapest", window, **ranges)
+                self.assertEqual(
+                    [row["time"] for row in actual], [row["time"] for row in expected]
+                )
+                for name in ("t_max_avg", "t_mean_avg", "t_min_avg"):
+                    np.testing.assert_allclose(
+                        [row[name] for row in actual],
+                        [row[name] for row in expected],
+                        rtol=0,
+                        atol=1e-9,
+                    )
+
+    def test_materialized_matches_on_the_fly(self):
+        self.ingest(self.df)
+
+        self.assertTrue(self.series_repository.is_current("Budapest", 7))
+        self.assertFalse(self.series_repository.is_current("Budapest", 90))
+        for start, end in (
+            (None, None),
+            (date(2000, 1, 12), None),
+            (date(2000, 2, 1), date(2000, 3, 15)),
+            (None, date(2000, 1, 3)),
+            (date(2001, 1, 1), None),
+        ):
+            self.assert_matches_on_the_fly(start_date=start, end_date=end)
+
+    def test_ingest_refreshes_only_the_changed_tail(self):
+        self.ingest(self.df)
+        self.series_repository.writes.clear()
+
+        changed = self.df.copy()
+        changed.loc[150:, "t_mean"] += 1
+        self.ingest(pd.concat([changed, daily_frame("2000-07-19", 20, seed=2)]))
+
+        since = changed.loc[150, "Time"].date()
+        self.assertEqual(self.series_repository.writes, [since] * len(self.WINDOWS))
+        self.assert_matches_on_the_fly()
+
+    def test_rebuilds_when_another_writer_saved_in_between(self):
+        self.ingest(self.df)
+        base_version = self.repository.data_version("Budapest")
+        self.series_repository.writes.clear()
+
+        # Another writer changes early rows after this ingest read its base
+        # version, then this ingest saves the tail.
+        early = self.df.copy()
+        early.loc[:5, "t_mean"] -= 1
+        self.repository.save_all(convert_to_batch(early))
+        late = self.df.copy()
+        late.loc[150:, "t_mean"] += 1
+        result = self.repository.save_all(convert_to_batch(late))
+
+        self.series.refresh(
+            "Budapest",
+            since=result.spans["Budapest"][0],
+            base_version=base_version,
+            versions=result.versions["Budapest"],
+        )
+
+        self.assertEqual(self.series_repository.writes, [None] * len(self.WINDOWS))
+        self.assert_matches_on_the_fly()
+
+
+class BenchmarkSuiteTests(TestCase):
+    def test_run_leaves_nothing_behind(self):
+        repository = DjangoWeatherDataRepository()
+        repository.save_all(convert_to_batch(daily_frame("2000-01-01", 5, "Budapest")))
+        suite = BenchmarkSuite(scale=1, repeat=2, windows=(7,))
+        city = suite.cities[0].name
+        # A small frame instead of the full synthetic history.
+        suite.registry = WeatherSourceRegistry()
+        suite.registry.register(
+            city,
+            lambda _city: FrameSource("frame", daily_frame("2000-01-01", 40)),
+            name="frame",
+        )
+        DataQualityReport.objects.create(
+            city=city, row_count=0, issue_count=0, report={}
+        )
+
+        result = suite.run()
+
+        self.assertEqual(result["rows"], 40)
+        self.assertEqual(set(result["stages"]), set(STAGES))
+        for model in (
+            WeatherData,
+            WeatherDataVersion,
+            RollingSeries,
+            DataQualityReport,
+        ):
+            with self.subTest(model=model.__name__):
+                self.assertFalse(model.objects.filter(city=city).exists())
+        self.assertEqual(repository.get_columns("Budapest")["time"].size, 5)
+
+
+class MetricsTests(SimpleTestCase):
+    def test_renders_prometheus_text(self):
+        registry = metrics.MetricsRegistry()
+        counter = registry.counter("demo_total", "Demo counter.", ("stage",))
+        histogram = registry.histogram(
+            "demo_seconds",
+            "Demo histogram.",
+            ("stage",),
+            buckets=(0.1, 1.0, float("inf")),
+        )
+        counter.inc(2, stage='say "hi"\n')
+        counter.inc(stage='say "hi"\n')
+        for value in (0.05, 0.1, 0.5, 2.0):
+            histogram.observe(value, stage="b")
+
+        self.assertEqual(
+            registry.render().splitlines(),
+            [
+                "# HELP demo_total Demo counter.",
+                "# TYPE demo_total counter",
+                'demo_total{stage="say \\"hi\\"\\n"} 3',
+                "# HELP demo_seconds Demo histogram.",
+                "# TYPE demo_seconds histogram",
+                'demo_seconds_bucket{stage="b",le="0.1"} 2',
+                'demo_seconds_bucket{stage="b",le="1.0"} 3',
+                'demo_seconds_bucket{stage="b",le="+Inf"} 4',
+                'demo_seconds_sum{stage="b"} 2.65',
+                'demo_seconds_count{stage="b"} 4',
+            ],
+        )
+
+    def stage_lines(self, stage: str) -> list[str]:
+        return [
+            line
+            for line in metrics.REGISTRY.render().splitlines()
+            if f'stage="{stage}"' in line
+        ]
+
+    @mock.patch.object(metrics.config, "metrics", True)
+    def test_log_action_and_track_record_stages(self):
+        logger = logging.getLogger("weather")
+
+        @log_action(action="Listing", logger=logger, stage="test_listing")
+        def listing():
+            return [1, 2, 3]
+
+        @log_action(action="Failing", logger=logger, stage="test_failing")
+        def failing():
+            raise RuntimeError
+
+        listing()
+        listing()
+        with self.assertRaises(RuntimeError):
+            failing()
+        with metrics.track("test_block") as stage:
+            stage.rows = 5
+            stage.bytes = 1024
+
+        lines = self.stage_lines("test_listing")
+        self.assertIn('weather_stage_rows_total{stage="test_listing"} 6', lines)
+        self.assertIn(
+            'weather_stage_duration_seconds_count{stage="test_listing"} 2', lines
+        )
+        self.assertIn(
+            'weather_stage_errors_total{stage="test_failing"} 1',
+            self.stage_lines("test_failing"),
+        )
+        lines = self.stage_lines("test_block")
+        self.assertIn('weather_stage_rows_total{stage="test_block"} 5', lines)
+        self.assertIn('weather_stage_bytes_total{stage="test_block"} 1024', lines)
+
+    @mock.patch.object(metrics.config, "metrics", False)
+    def test_disabled_metrics_record_nothing(self):
+        @metrics.timed("test_disabled")
+        def listing():
+            return [1, 2, 3]
+
+        listing()
+        with metrics.track("test_disabled") as stage:
+            stage.rows = 5
+        metrics.add_rows("test_disabled", 5)
+
+        self.assertEqual(self.stage_lines("test_disabled"), [])
+
+    def test_endpoint_is_hidden_when_disabled(self):
+        with mock.patch.object(metrics.config, "metrics", False):
+            self.assertEqual(self.client.get(reverse("metrics")).status_code, 404)
+
+        with mock.patch.object(metrics.config, "metrics", True):
+            response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(
+            response["Content-Type"].startswith("text/plain; version=0.0.4")
+        )
+        self.assertIn(
+            "# TYPE weather_stage_duration_seconds histogram",
+            response.content.decode(),
+        )
+
+
+class ProfilingStatsAPITests(TestCase):
+    @override_settings(WEATHER_PROFILING_ENABLED=False)
+    def test_disabled_profiling_hides_and_keeps_stats(self):
+        self.assertEqual(self.client.get(reverse("debug-profile")).status_code, 404)
+        self.assertEqual(self.client.delete(reverse("debug-profile")).status_code, 404)
+
+    @override_settings(WEATHER_PROFILING_ENABLED=True)
+    def test_enabled_profiling_resets_stats(self):
+        self.assertEqual(self.client.get(reverse("debug-profile")).status_code, 200)
+        self.assertEqual(self.client.delete(reverse("debug-profile")).status_code, 204)
+
+
+class RollingAverageHTTPCacheTests(TestCase):
+    url = reverse("rolling-average")
+
+    def setUp(self):
+        caches[settings.WEATHER_RESPONSE_CACHE].clear()
+        self.repository = DjangoWeatherDataRepository()
+        self.repository.save_all(
+            convert_to_batch(daily_frame("2000-01-01", 60, city="Budapest"))
+        )
+        self.params = {"city": "Budapest", "window": 7, "start_date": "2000-01-10"}
+
+    def get(self, **headers):
+        return self.client.get(
+            self.url, self.params, HTTP_ACCEPT="application/json", **headers
+        )
+
+    def test_get_revalidates_with_etag(self):
+        response = self.get()
+        etag = response["ETag"]
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("public", response["Cache-Control"])
+        self.assertIn("max-age=", response["Cache-Control"])
+        self.assertIn("Accept", response["Vary"])
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(len(response.json()), 51)
+
+        revalidated = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated["ETag"], etag)
+        self.assertEqual(revalidated.content, b"")
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH='"other"').status_code, 200)
+
+    def test_etag_changes_with_data_and_parameters(self):
+        etag = self.get()["ETag"]
+
+        self.params["window"] = 30
+        self.assertNotEqual(self.get()["ETag"], etag)
+        self.params["window"] = 7
+
+        self.repository.save_all(
+            convert_to_batch(daily_frame("2000-03-01", 1, city="Budapest", seed=5))
+        )
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(len(response.json()), 52)
+
+    def test_post_is_not_cacheable(self):
+        etag = self.get()["ETag"]
+
+        response = self.client.post(
+            self.url, self.params, HTTP_ACCEPT="application/json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("ETag", response)
+        self.assertNotIn("public", response.get("Cache-Control", ""))
+        self.assertEqual(response.json(), self.get().json())
+
+        conditional = self.client.post(
+            self.url,
+            self.params,
+            HTTP_ACCEPT="application/json",
+            HTTP_IF_NONE_MATCH=etag,
+        )
+        self.assertEqual(conditional.status_code, 412)
+
+    def test_browsable_api_revalidates_too(self):
+        response = self.client.get(self.url, self.params, HTTP_ACCEPT="text/html")
+        etag = response["ETag"]
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            self.client.get(
+                self.url, self.params, HTTP_ACCEPT="text/html", HTTP_IF_NONE_MATCH=etag
+            ).status_code,
+            304,
+        )
+        self.assertEqual(
+            self.client.post(
+                self.url, self.params, HTTP_ACCEPT="text/html", HTTP_IF_NONE_MATCH=etag
+            ).status_code,
+            412,
+        )
+
+    def test_invalid_parameters_are_bad_requests(self):
+        for params, field in (
+            ({"window": 7}, "city"),
+            ({"city": "Budapest", "window": "abc"}, "window"),
+            ({"city": "Budapest", "window": 0}, "window"),
+            ({"city": "Budapest", "start_date": "2000-13-01"}, "start_date"),
+        ):
+            for method in (self.client.get, self.client.post):
+                with self.subTest(params=params, method=method.__name__):
+                    response = method(self.url, params, HTTP_ACCEPT="application/json")
+                    self.assertEqual(response.status_code, 400)
+                    self.assertIn(field, response.json())
+
+    def test_city_without_data_changes_etag_once_stored(self):
+        self.params["city"] = "Testville"
+        response = self.get()
+        self.assertEqual(response.json(), [])
+
+        self.repository.save_all(convert_to_batch(daily_frame("2000-01-01", 20)))
+        stored = self.get(HTTP_IF_NONE_MATCH=response["ETag"])
+
+        self.assertEqual(stored.status_code, 200)
+        self.assertEqual(len(stored.json()), 11)
+
+
+class NegotiateEncodingTests(SimpleTestCase):
+    SUPPORTED = ["zstd", "gzip"]
+
+    def test_highest_q_value_wins(self):
+        for header, expected in (
+            ("gzip", "gzip"),
+            ("gzip, deflate, br, zstd", "zstd"),
+            ("zstd;q=0.5, gzip", "gzip"),
+            ("GZIP;Q=0.8, zstd;q=0.7", "gzip"),
+            ("gzip;q=0.9, zstd;q=0.9", "zstd"),
+        ):
+            with self.subTest(header=header):
+                self.assertEqual(negotiate_encoding(header, self.SUPPORTED), expected)
+
+    def test_wildcard_covers_unlisted_codings(self):
+        self.assertEqual(negotiate_encoding("*", self.SUPPORTED), "zstd")
+        self.assertEqual(negotiate_encoding("zstd;q=0, *", self.SUPPORTED), "gzip")
+        self.assertEqual(negotiate_encoding("gzip;q=0.2, *;q=0.1", ["gzip"]), "gzip")
+
+    def test_falls_back_to_identity(self):
+        for header in ("", "br, deflate", "gzip;q=0, zstd;q=0", "*;q=0", "gzip;q=x"):
+            with self.subTest(header=header):
+                self.assertEqual(negotiate_encoding(header, self.SUPPORTED), "identity")
+        self.assertEqual(negotiate_encoding("gzip", []), "identity")
+
+    def test_etag_per_coding(self):
+        self.assertEqual(encoded_etag('"abc"', "identity"), '"abc"')
+        self.assertEqual(encoded_etag('"abc"', "gzip"), '"abc-gzip"')
+
+
+@override_settings(
+    WEATHER_RESPONSE_ENCODINGS=["gzip"], WEATHER_RESPONSE_COMPRESS_MIN_BYTES=1024
+)
+class RollingAverageEncodingTests(TestCase):
+    url = reverse("rolling-average")
+
+    def setUp(self):
+        caches[settings.WEATHER_RESPONSE_CACHE].clear()
+        DjangoWeatherDataRepository().save_all(
+            convert_to_batch(daily_frame("2000-01-01", 60, city="Budapest"))
+        )
+        self.params = {"city": "Budapest", "window": 7}
+
+    def get(self, **headers):
+        return self.client.get(
+            self.url, self.params, HTTP_ACCEPT="application/json", **headers
+        )
+
+    def test_gzip_body_matches_identity(self):
+        identity = self.get()
+        compressed = self.get(HTTP_ACCEPT_ENCODING="br;q=1.0, gzip;q=0.8")
+
+        self.assertNotIn("Content-Encoding", identity)
+        self.assertEqual(compressed["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", compressed["Vary"])
+        self.assertLess(len(compressed.content), len(identity.content))
+        self.assertEqual(gzip.decompress(compressed.content), identity.content)
+
+    def test_each_coding_has_its_own_etag(self):
+        identity = self.get()["ETag"]
+        compressed = self.get(HTTP_ACCEPT_ENCODING="gzip")["ETag"]
+
+        self.assertEqual(compressed, encoded_etag(identity, "gzip"))
+        for header, etag, expected in (
+            ("gzip", compressed, 304),
+            ("gzip", identity, 200),
+            ("identity", identity, 304),
+            ("identity", compressed, 200),
+        ):
+            with self.subTest(accept_encoding=header, etag=etag):
+                response = self.get(
+                    HTTP_ACCEPT_ENCODING=header, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, expected)
+                self.assertIn("Accept-Encoding", response["Vary"])
+
+    def test_small_bodies_are_not_compressed(self):
+        self.params["start_date"] = "2000-02-28"
+        response = self.get(HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Content-Encoding", response)
+        self.assertEqual(len(response.json()), 2)
+
+    def test_repeated_reads_are_served_from_the_cache(self):
+        calculate = RollingAverageService.calculate
+        with mock.patch.object(
+            RollingAverageService, "calculate", autospec=True, side_effect=calculate
+        ) as spy:
+            first = self.get(HTTP_ACCEPT_ENCODING="gzip")
+            again = self.get(HTTP_ACCEPT_ENCODING="gzip")
+            identity = self.get()
+
+        self.assertEqual(spy.call_count, 1)
+        self.assertEqual(again.content, first.content)
+        self.assertEqual(gzip.decompress(first.content), identity.content)
+
+
+@override_settings(
+    WEATHER_RESPONSE_ENCODINGS=["gzip"], WEATHER_RESPONSE_COMPRESS_MIN_BYTES=1024
+)
+class CacheWarmerTests(TestCase):
+    url = reverse("rolling-average")
+
+    def setUp(self):
+        caches[settings.WEATHER_RESPONSE_CACHE].clear()
+        repository = DjangoWeatherDataRepository()
+        repository.save_all(
+            convert_to_batch(daily_frame("2000-01-01", 60, city="Budapest"))
+        )
+        repository.save_all(
+            convert_to_batch(daily_frame("2000-01-01", 30, city="Szeged", seed=1))
+        )
+
+    def get(self, **headers):
+        return self.client.get(
+            self.url,
+            {"city": "Budapest", "window": 7},
+            HTTP_ACCEPT="application/json",
+            **headers,
+        )
+
+    def test_warmed_query_is_served_from_the_cache(self):
+        warmer = CacheWarmer(
+            queries=[HotQuery("Budapest", 7)],
+            tracker=HotQueryTracker(),
+            top=0,
+            windows=[],
+            background=False,
+        )
+        calculate = RollingAverageService.calculate
+        with mock.patch.object(
+            RollingAverageService, "calculate", autospec=True, side_effect=calculate
+        ) as spy:
+            self.assertEqual(warmer.warm(["Budapest"]), 1)
+            warmed = self.get(HTTP_ACCEPT_ENCODING="gzip")
+            identity = self.get()
+
+        self.assertEqual(spy.call_count, 1)
+        self.assertEqual(warmed.status_code, 200)
+        self.assertEqual(warmed["Content-Encoding"], "gzip")
+
+        caches[settings.WEATHER_RESPONSE_CACHE].clear()
+        fresh = self.get()
+        self.assertEqual(identity.content, fresh.content)
+        self.assertEqual(gzip.decompress(warmed.content), fresh.content)
+
+    def test_tracked_counts_are_shared_through_the_cache(self):
+        worker = HotQueryTracker(flush_every=3)
+        worker.record(HotQuery("Szeged", 30))
+        worker.record(HotQuery("Szeged", 30))
+        self.assertEqual(HotQueryTracker().top(2), [])
+
+        worker.record(HotQuery("Budapest", 7))
+        self.assertEqual(
+            HotQueryTracker().top(2),
+            [HotQuery("Szeged", 30), HotQuery("Budapest", 7)],
+        )
+
+    @override_settings(WEATHER_WARM_QUERIES=[{"city": "Budapest", "window": 30}])
+    def test_tracked_queries_are_merged_with_the_configured_ones(self):
+        tracker = HotQueryTracker()
+        for query in (
+            HotQuery("Budapest", 7),
+            HotQuery("Budapest", 7),
+            HotQuery("Budapest", 30),
+            HotQuery("Debrecen", 7),
+        ):
+            tracker.record(query)
+        warmer = CacheWarmer(tracker=tracker, top=3, windows=[7, 365])
+
+        self.assertEqual(
+            warmer.hot_queries(),
+            [
+                HotQuery("Budapest", 30),
+                HotQuery("Budapest", 7),
+                HotQuery("Szeged", 7),
+                HotQuery("Szeged", 365),
+            ],
+        )
+
+
+class WarmOnStartupTests(SimpleTestCase):
+    def setUp(self):
+        for name, value in (
+            ("_executor", None),
+            ("_executor_lock", warmup._executor_lock),
+            ("_warm_after_fork", False),
+        ):
+            patcher = mock.patch.object(warmup, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(self.shutdown_executor)
+        patcher = mock.patch.object(CacheWarmer, "warm", return_value=3)
+        self.warm = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @staticmethod
+    def shutdown_executor():
+        if warmup._executor is not None:
+            warmup._executor.shutdown()
+
+    @override_settings(WEATHER_WARM_ENABLED=False)
+    def test_disabled(self):
+        self.assertIsNone(warm_on_startup())
+        warmup._after_fork_in_child()
+
+        self.assertIsNone(warmup._executor)
+        self.warm.assert_not_called()
+
+    @override_settings(WEATHER_WARM_ENABLED=True)
+    def test_forked_workers_warm_on_their_own_executor(self):
+        self.assertIsNone(warmup._executor)
+        self.assertEqual(warm_on_startup().result(timeout=10), 3)
+        inherited = warmup._executor
+        self.addCleanup(inherited.shutdown)
+
+        warmup._after_fork_in_child()
+
+        self.assertIsNotNone(warmup._executor)
+        self.assertIsNot(warmup._executor, inherited)
+        # The executor runs one job at a time, so this waits for the warming.
+        warmup._executor.submit(lambda: None).result(timeout=10)
+        self.assertEqual(self.warm.call_count, 2)
+
+
+class ChangesFeedTests(TestCase):
+    url = reverse("weather-changes")
+
+    def setUp(self):
+        self.repository = DjangoWeatherDataRepository()
+        self.repository.save_all(convert_to_batch(daily_frame("2000-01-01", 25)))
+
+    def read_feed(self, since: str = "0", limit: int = 10) -> tuple[list[dict], str]:
+        changes = []
+        pages = 0
+        while True:
+            response = self.client.get(
+                self.url, {"city": "Testville", "since": since, "limit": limit}
+            )
+            self.assertEqual(response.status_code, 200)
+            page = response.json()
+            self.assertLessEqual(len(page["changes"]), limit)
+            changes.extend(page["changes"])
+            since = page["next"]
+            pages += 1
+            if not page["has_more"]:
+                return changes, since
+            self.assertLess(pages, 100)
+
+    def test_missing_values_compare_equal(self):
+        nan = float("nan")
+        self.assertTrue(_same_values((1.0, nan, 3.0), (1.0, nan, 3.0)))
+        self.assertFalse(_same_values((1.0, nan, 3.0), (1.0, 2.0, 3.0)))
+        self.assertFalse(_same_values((1.0, 2.0, 3.0), (1.0, nan, 3.0)))
+        self.assertFalse(_same_values((1.0, 2.0, 3.0), (1.0, 2.5, 3.0)))
+
+    @skipUnless(connection.vendor == "postgresql", "SQLite stores NaN as NULL.")
+    def test_resaving_missing_values_changes_nothing(self):
+        df = daily_frame("2000-02-01", 10)
+        df.loc[0, "t_mean"] = np.nan
+        self.repository.save_all(convert_to_batch(df))
+        version = self.repository.data_version("Testville")
+        _, since = self.read_feed()
+
+        self.repository.save_all(convert_to_batch(df))
+
+        self.assertEqual(self.repository.data_version("Testville"), version)
+        self.assertEqual(self.read_feed(since)[0], [])
+
+    def test_pages_through_one_change_sequence(self):
+        changes, cursor = self.read_feed(limit=10)
+
+        self.assertEqual(len(changes), 25)
+        self.assertEqual(len({c["time"] for c in changes}), 25)
+        self.assertEqual({c["change_seq"] for c in changes}, {1})
+        self.assertEqual(cursor, "1")
+
+    def test_has_more_is_exact_at_the_page_boundary(self):
+        response = self.client.get(self.url, {"city": "Testville", "limit": 25})
+
+        self.assertFalse(response.json()["has_more"])
+        self.assertEqual(len(response.json()["changes"]), 25)
+
+    def test_returns_only_rows_changed_after_the_cursor(self):
+        _, cursor = self.read_feed()
+        created = dict(
+            WeatherData.objects.filter(city="Testville").values_list(
+                "time", "created_at"
+            )
+        )
+
+        df = daily_frame("2000-01-20", 10, seed=9)
+        self.repository.save_all(convert_to_batch(df))
+        changes, next_cursor = self.read_feed(cursor, limit=3)
+
+        self.assertEqual(
+            [c["time"] for c in changes],
+            [str(t.date()) for t in df["Time"]],
+        )
+        self.assertEqual({c["change_seq"] for c in changes}, {2})
+        self.assertEqual(next_cursor, "2")
+        self.assertEqual(self.read_feed(next_cursor)[0], [])
+        for row in WeatherData.objects.filter(time__lt=date(2000, 1, 26)):
+            self.assertEqual(row.created_at, created[row.time])
+
+    def test_unchanged_feed_revalidates(self):
+        response = self.client.get(self.url, {"city": "Testville"})
+
+        revalidated = self.client.get(
+            self.url, {"city": "Testville"}, HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_invalid_parameters_are_bad_requests(self):
+        for params, field in (
+            ({"city": "Testville", "since": "x"}, "since"),
+            ({"city": "Testville", "since": "-1"}, "since"),
+            ({"city": "Testville", "since": "1:2000-13-01"}, "since"),
+            ({"city": "Testville", "limit": "0"}, "limit"),
+            ({}, "city"),
+        ):
+            with self.subTest(params=params):
+                response = self.client.get(self.url, params)
+
+                self.assertEqual(response.status_code, 400)
+                self.assertIn(field, response.json())
+
+    def test_migration_backfills_rows_stored_before_change_tracking(self):
+        WeatherData.objects.update(change_seq=0)
+        WeatherDataVersion.objects.all().delete()
+        migration = import_module("weather.migrations.0007_weatherdata_change_seq")
+
+        migration.backfill_change_seq(apps, None)
+
+        changes, cursor = self.read_feed(limit=100)
+        self.assertEqual(len(changes), 25)
+        self.assertEqual(self.repository.data_version("Testville"), cursor)
@@ -1,5 +1,12 @@
 from django.urls import path
-from .views import RollingAverageAPIView, WeatherDataAPIView
+from .views import (
+    ProfilingStatsAPIView,
+    QualityReportDetailAPIView,
+    QualityReportListAPIView,
+    RollingAverageAPIView,
+    WeatherChangesAPIView,
+    WeatherDataAPIView,
+)
 
 urlpatterns = [
     path("weather/collect-data/", WeatherDataAPIView.as_view(), name="weather_data"),
@@ -8,4 +15,16 @@ urlpatterns = [
         RollingAverageAPIView.as_view(),
         name="rolling-average",
     ),
+    path("weather/changes/", WeatherChangesAPIView.as_view(), name="weather-changes"),
+    path(
+        "weather/quality-reports/",
+        QualityReportListAPIView.as_view(),
+        name="quality-reports",
+    ),
+    path(
+        "weather/quality-reports/<int:report_id>/",
+        QualityReportDetailAPIView.as_view(),
+        name="quality-report-detail",
+    ),
+    path("debug/profile/", ProfilingStatsAPIView.as_view(), name="debug-profile"),
 ]
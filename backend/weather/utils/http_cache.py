@@ -0,0 +1,100 @@
+import hashlib
+from typing import Any, Callable
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from weather.utils.response_cache import (
+    ResponseBodyCache,
+    encoded_etag,
+    negotiate_encoding,
+    supported_encodings,
+)
+
+
+def make_etag(*parts) -> str:
+    """Strong ETag over the given parts (data version and request parameters)."""
+    digest = hashlib.sha1("|".join(map(str, parts)).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(request, etag: str) -> bool:
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+    etags = parse_etags(header)
+    return "*" in etags or etag in etags
+
+
+def add_cache_headers(response, etag: str | None, max_age: int | None = None):
+    """ETag plus ``Cache-Control: public, max-age`` so proxies can reuse reads."""
+    if etag is not None:
+        response["ETag"] = etag
+    patch_cache_control(
+        response,
+        public=True,
+        max_age=settings.WEATHER_HTTP_CACHE_MAX_AGE if max_age is None else max_age,
+    )
+    patch_vary_headers(response, ["Accept"])
+    return response
+
+
+def not_modified(etag: str, max_age: int | None = None) -> Response:
+    return add_cache_headers(
+        Response(status=status.HTTP_304_NOT_MODIFIED), etag, max_age
+    )
+
+
+def cacheable(request) -> bool:
+    """Only GET and HEAD responses are sent with validators and cached."""
+    return request.method in ("GET", "HEAD")
+
+
+def check_preconditions(request, etag: str, max_age: int | None = None):
+    """
+    The response to a matching If-None-Match, or None to proceed: 304 for
+    GET and HEAD, 412 for other methods (RFC 9110, section 13.1.2).
+    """
+    if not etag_matches(request, etag):
+        return None
+    if cacheable(request):
+        return not_modified(etag, max_age)
+    return Response(status=status.HTTP_412_PRECONDITION_FAILED)
+
+
+def render_json(data: Any) -> bytes:
+    return JSONRenderer().render(data)
+
+
+def cached_json_response(
+    request, etag: str, compute: Callable[[], Any], max_age: int | None = None
+):
+    """
+    JSON response for the representation identified by ``etag``, in the
+    best content coding the client accepts. The rendered and compressed
+    bodies are cached per coding; ``compute`` only runs on a miss. Only
+    GET and HEAD responses carry the ETag and Cache-Control headers.
+    """
+    encoding = negotiate_encoding(
+        request.headers.get("Accept-Encoding", ""), supported_encodings()
+    )
+    variant_etag = encoded_etag(etag, encoding)
+    response = check_preconditions(request, variant_etag, max_age)
+    if response is None:
+        coding, body = ResponseBodyCache().get(
+            etag,
+            encoding,
+            lambda: render_json(compute()),
+        )
+        response = HttpResponse(body, content_type="application/json")
+        if cacheable(request):
+            add_cache_headers(response, variant_etag, max_age)
+        if coding != "identity":
+            response["Content-Encoding"] = coding
+    patch_vary_headers(response, ["Accept-Encoding"])
+    return response
@@ -0,0 +1,290 @@
+from bisect import bisect_left
+from collections.abc import Mapping, Sized
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+import logging
+import threading
+import time
+from typing import Iterator
+
+
+logger = logging.getLogger("weather")
+
+
+DURATION_BUCKETS = (
+    0.001,
+    0.005,
+    0.01,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    float("inf"),
+)
+
+
+class _Config:
+    """
+    Process-wide switches, set from settings in ``WeatherConfig.ready``.
+    Instrumented code only checks these two booleans when disabled.
+    """
+
+    metrics = False
+    tracer = None
+
+
+config = _Config()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames: tuple[str, ...], values: tuple[str, ...]) -> str:
+    if not labelnames:
+        return ""
+    pairs = ",".join(
+        f'{name}="{_escape(str(value))}"' for name, value in zip(labelnames, values)
+    )
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, value: float = 1, **labels: str) -> None:
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} counter",
+        ]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f"{self.name}{labels} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...],
+        buckets: tuple[float, ...] = DURATION_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # labels -> [per-bucket counts, sum, count]
+        self._values: dict[tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(labels[name] for name in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    labels = _format_labels(
+                        self.labelnames + ("le",), key + (_format_value(bound),)
+                    )
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+                lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: list[Counter | Histogram] = []
+
+    def counter(
+        self, name: str, documentation: str, labelnames: tuple[str, ...] = ()
+    ) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DURATION_BUCKETS,
+    ) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_DURATION = REGISTRY.histogram(
+    "weather_stage_duration_seconds", "Duration of instrumented stages.", ("stage",)
+)
+STAGE_ROWS = REGISTRY.counter(
+    "weather_stage_rows_total", "Rows processed by instrumented stages.", ("stage",)
+)
+STAGE_BYTES = REGISTRY.counter(
+    "weather_stage_bytes_total", "Bytes processed by instrumented stages.", ("stage",)
+)
+STAGE_ERRORS = REGISTRY.counter(
+    "weather_stage_errors_total", "Instrumented stages that raised.", ("stage",)
+)
+RESPONSE_CACHE = REGISTRY.counter(
+    "weather_response_cache_total",
+    "Cached response body lookups by content coding and hit/miss.",
+    ("encoding", "result"),
+)
+
+
+def configure(metrics: bool, tracing: bool) -> None:
+    """Enable metrics and, when OpenTelemetry is installed, trace spans."""
+    config.metrics = metrics
+    config.tracer = None
+    if not tracing:
+        return
+    try:
+        from opentelemetry import trace
+    except ImportError:
+        logger.warning(
+            "WEATHER_TRACING_ENABLED is set but opentelemetry is not installed; "
+            "tracing is disabled."
+        )
+        return
+    config.tracer = trace.get_tracer("weather")
+
+
+def add_rows(stage: str, rows: int) -> None:
+    if config.metrics:
+        STAGE_ROWS.inc(rows, stage=stage)
+
+
+def add_bytes(stage: str, nbytes: int) -> None:
+    if config.metrics:
+        STAGE_BYTES.inc(nbytes, stage=stage)
+
+
+class Stage:
+    """Handle of a running stage; set ``rows`` / ``bytes`` to record them."""
+
+    __slots__ = ("name", "rows", "bytes", "span")
+
+    def __init__(self, name: str, span=None):
+        self.name = name
+        self.rows: int | None = None
+        self.bytes: int | None = None
+        self.span = span
+
+
+_DISABLED_STAGE = Stage("disabled")
+
+
+@contextmanager
+def _track(name: str) -> Iterator[Stage]:
+    span_cm = (
+        config.tracer.start_as_current_span(name)
+        if config.tracer is not None
+        else nullcontext()
+    )
+    with span_cm as span:
+        stage = Stage(name, span)
+        start = time.perf_counter()
+        try:
+            yield stage
+        except BaseException:
+            if config.metrics:
+                STAGE_ERRORS.inc(stage=name)
+            raise
+        finally:
+            if config.metrics:
+                STAGE_DURATION.observe(time.perf_counter() - start, stage=name)
+                if stage.rows is not None:
+                    STAGE_ROWS.inc(stage.rows, stage=name)
+                if stage.bytes is not None:
+                    STAGE_BYTES.inc(stage.bytes, stage=name)
+            if span is not None:
+                if stage.rows is not None:
+                    span.set_attribute("weather.rows", stage.rows)
+                if stage.bytes is not None:
+                    span.set_attribute("weather.bytes", stage.bytes)
+
+
+def track(name: str):
+    """
+    Time a block as stage ``name``: duration histogram, error count and an
+    optional span. A shared no-op handle is returned when disabled.
+    """
+    if not config.metrics and config.tracer is None:
+        return nullcontext(_DISABLED_STAGE)
+    return _track(name)
+
+
+def timed(stage: str):
+    """
+    Decorator tracking each call as ``stage``. Sized results (DataFrames,
+    record lists, batches) are counted as processed rows.
+    """
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not config.metrics and config.tracer is None:
+                return func(*args, **kwargs)
+            with _track(stage) as handle:
+                result = func(*args, **kwargs)
+                if isinstance(result, Sized) and not isinstance(
+                    result, (str, bytes, Mapping)
+                ):
+                    handle.rows = len(result)
+            return result
+
+        return wrapper
+
+    return decorator
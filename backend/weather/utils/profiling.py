@@ -0,0 +1,172 @@
+from collections import deque
+from dataclasses import dataclass, field
+import logging
+import math
+import threading
+import time
+from typing import Sequence
+
+from django.db import connection
+
+
+logger = logging.getLogger("weather")
+
+
+@dataclass(frozen=True, slots=True)
+class QueryRecord:
+    sql: str
+    params: tuple | list | dict | None
+    duration: float
+    many: bool
+
+
+class QueryRecorder:
+    """``connection.execute_wrapper`` hook timing every statement of a request."""
+
+    def __init__(self):
+        self.queries: list[QueryRecord] = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(
+                QueryRecord(sql, params, time.perf_counter() - start, many)
+            )
+
+
+@dataclass
+class RequestProfile:
+    endpoint: str
+    method: str
+    status: int
+    total: float
+    queries: list[QueryRecord] = field(default_factory=list)
+    serialize_time: float = 0.0
+
+    @property
+    def query_count(self) -> int:
+        return len(self.queries)
+
+    @property
+    def sql_time(self) -> float:
+        return sum((q.duration for q in self.queries), 0.0)
+
+    @property
+    def python_time(self) -> float:
+        return max(self.total - self.sql_time - self.serialize_time, 0.0)
+
+    def slowest(self, count: int) -> list[QueryRecord]:
+        return sorted(self.queries, key=lambda q: q.duration, reverse=True)[:count]
+
+    def server_timing(self) -> str:
+        """``Server-Timing`` header value, durations in milliseconds."""
+        return ", ".join(
+            [
+                f"total;dur={self.total * 1000:.1f}",
+                f'sql;dur={self.sql_time * 1000:.1f};desc="{self.query_count} queries"',
+                f"python;dur={self.python_time * 1000:.1f}",
+                f"serialize;dur={self.serialize_time * 1000:.1f}",
+            ]
+        )
+
+    def to_dict(self, top_queries: int = 0, explain: bool = False) -> dict:
+        return {
+            "endpoint": self.endpoint,
+            "method": self.method,
+            "status": self.status,
+            "total_ms": round(self.total * 1000, 3),
+            "sql_ms": round(self.sql_time * 1000, 3),
+            "python_ms": round(self.python_time * 1000, 3),
+            "serialize_ms": round(self.serialize_time * 1000, 3),
+            "query_count": self.query_count,
+            "slowest_queries": [
+                {
+                    "sql": q.sql,
+                    "duration_ms": round(q.duration * 1000, 3),
+                    "plan": explain_query(q) if explain else None,
+                }
+                for q in self.slowest(top_queries)
+            ],
+        }
+
+
+def explain_query(query: QueryRecord) -> str | None:
+    """The database's plan for a recorded SELECT, or None."""
+    if query.many or not query.sql.lstrip().upper().startswith("SELECT"):
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"{connection.ops.explain_query_prefix()} {query.sql}", query.params
+            )
+            return "\n".join(
+                " ".join(str(col) for col in row) for row in cursor.fetchall()
+            )
+    except Exception as e:
+        logger.debug(f"EXPLAIN failed for {query.sql[:80]!r}: {e}")
+        return None
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(math.ceil(q / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+class ProfileAggregator:
+    """
+    Timings of the recent requests per endpoint, for percentile summaries.
+    Only the numbers are kept, not the statements and their parameters.
+    """
+
+    FIELDS = ("total_ms", "sql_ms", "python_ms", "serialize_ms")
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self._samples: dict[tuple[str, str], deque[tuple]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, profile: RequestProfile) -> None:
+        key = (profile.method, profile.endpoint)
+        sample = (
+            profile.total,
+            profile.sql_time,
+            profile.python_time,
+            profile.serialize_time,
+            profile.query_count,
+        )
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples is None:
+                samples = self._samples[key] = deque(maxlen=self.window)
+            samples.append(sample)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._samples.clear()
+
+    def stats(self) -> list[dict]:
+        with self._lock:
+            snapshot = {key: list(samples) for key, samples in self._samples.items()}
+
+        result = []
+        for (method, endpoint), samples in sorted(snapshot.items()):
+            *timings, counts = zip(*samples)
+            row = {"method": method, "endpoint": endpoint, "count": len(samples)}
+            for name, values in zip(self.FIELDS, timings):
+                row[name] = {
+                    f"p{q}": round(percentile(values, q) * 1000, 3)
+                    for q in (50, 90, 95, 99)
+                }
+            row["queries"] = {
+                "mean": round(sum(counts) / len(counts), 2),
+                "max": max(counts),
+            }
+            result.append(row)
+        return result
+
+
+aggregator = ProfileAggregator()
@@ -0,0 +1,191 @@
+import gzip
+import logging
+from typing import Callable
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+from weather.utils import metrics
+
+
+logger = logging.getLogger("weather")
+
+
+def _zstd_compressor() -> Callable[[bytes], bytes] | None:
+    """zstd from the standard library (3.14+) or the zstandard package."""
+    try:
+        from compression import zstd
+
+        return lambda body: zstd.compress(body, level=3)
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    # Compressor objects are not thread safe; creating one is cheap.
+    return lambda body: zstandard.ZstdCompressor(level=3).compress(body)
+
+
+ENCODERS: dict[str, Callable[[bytes], bytes]] = {
+    # mtime=0 keeps the bytes, and so the cached body, deterministic.
+    "gzip": lambda body: gzip.compress(body, compresslevel=6, mtime=0),
+}
+_zstd = _zstd_compressor()
+if _zstd is not None:
+    ENCODERS["zstd"] = _zstd
+
+
+def supported_encodings() -> list[str]:
+    """WEATHER_RESPONSE_ENCODINGS in preference order, minus unavailable ones."""
+    return [name for name in settings.WEATHER_RESPONSE_ENCODINGS if name in ENCODERS]
+
+
+def negotiate_encoding(accept_encoding: str, supported: list[str]) -> str:
+    """
+    The content coding to send for an ``Accept-Encoding`` header: the
+    supported coding with the highest q-value, ties going to the earlier
+    one in ``supported``, else ``identity``.
+    """
+    weights: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, *params = (part.strip() for part in item.split(";"))
+        if not name:
+            continue
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[name.lower()] = q
+
+    best, best_q = "identity", 0.0
+    for name in supported:
+        q = weights.get(name, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """Distinct strong ETag per content coding of the same representation."""
+    if encoding == "identity":
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+
+class ResponseBodyCache:
+    """
+    Rendered response bodies in the Django cache, per content coding, so a
+    repeated read costs neither rendering nor compression.
+
+    Keys are ETags derived from the data version, so new data never hits
+    an old entry. Each coding is compressed once from the cached identity
+    body. Bodies below ``min_size`` are stored uncompressed.
+    """
+
+    PREFIX = "weather:body"
+
+    def __init__(
+        self,
+        alias: str | None = None,
+        timeout: int | None = None,
+        min_size: int | None = None,
+    ):
+        self.alias = alias or settings.WEATHER_RESPONSE_CACHE
+        self.timeout = (
+            settings.WEATHER_RESPONSE_CACHE_TIMEOUT if timeout is None else timeout
+        )
+        self.min_size = (
+            settings.WEATHER_RESPONSE_COMPRESS_MIN_BYTES
+            if min_size is None
+            else min_size
+        )
+
+    def get(
+        self, etag: str, encoding: str, render: Callable[[], bytes]
+    ) -> tuple[str, bytes]:
+        """
+        ``(coding, body)`` for the representation behind ``etag``; ``render``
+        produces the identity body on a miss.
+        """
+        if not self.timeout:
+            return self._encode(render(), encoding)
+
+        cache = caches[self.alias]
+        key = self._key(etag)
+        cached = cache.get(f"{key}:{encoding}")
+        self._count(encoding, cached is not None)
+        if cached is not None:
+            return cached
+
+        identity = None
+        if encoding != "identity":
+            identity = cache.get(f"{key}:identity")
+        if identity is None:
+            identity = ("identity", render())
+            cache.set(f"{key}:identity", identity, self.timeout)
+        if encoding == "identity":
+            return identity
+
+        result = self._encode(identity[1], encoding)
+        cache.set(f"{key}:{encoding}", result, self.timeout)
+        return result
+
+    def warm(self, etag: str, encodings: list[str], render: Callable[[], bytes]) -> int:
+        """
+        Store the identity body behind ``etag`` and its ``encodings`` unless
+        cached already. Returns the number of entries written.
+        """
+        if not self.timeout:
+            return 0
+
+        cache = caches[self.alias]
+        key = self._key(etag)
+        written = 0
+        identity = cache.get(f"{key}:identity")
+        if identity is None:
+            identity = ("identity", render())
+            cache.set(f"{key}:identity", identity, self.timeout)
+            written += 1
+        for encoding in encodings:
+            if cache.get(f"{key}:{encoding}") is None:
+                cache.set(
+                    f"{key}:{encoding}",
+                    self._encode(identity[1], encoding),
+                    self.timeout,
+                )
+                written += 1
+        return written
+
+    @property
+    def shared(self) -> bool:
+        """Whether other processes see the entries (not a per-process cache)."""
+        return not isinstance(caches[self.alias], (LocMemCache, DummyCache))
+
+    def _key(self, etag: str) -> str:
+        return "{}:{}".format(self.PREFIX, etag.strip('"'))
+
+    def _encode(self, body: bytes, encoding: str) -> tuple[str, bytes]:
+        if encoding == "identity" or len(body) < self.min_size:
+            return "identity", body
+        with metrics.track("compress") as stage:
+            compressed = ENCODERS[encoding](body)
+            stage.bytes = len(body)
+        logger.debug(
+            f"Compressed response body with {encoding}: "
+            f"{len(body)} -> {len(compressed)} bytes."
+        )
+        return encoding, compressed
+
+    @staticmethod
+    def _count(encoding: str, hit: bool) -> None:
+        if metrics.config.metrics:
+            metrics.RESPONSE_CACHE.inc(
+                encoding=encoding, result="hit" if hit else "miss"
+            )
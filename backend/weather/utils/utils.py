@@ -1,45 +1,59 @@
+from __future__ import annotations
+
 from functools import wraps
 import logging
-import pandas as pd
-from weather.repositories.weather_repository import WeatherRecord
-
-
-def convert_to_records(df: pd.DataFrame) -> list[WeatherRecord]:
-    records = []
-    for _, row in df.iterrows():
-        records.append(
-            WeatherRecord(
-                time=pd.to_datetime(row["Time"]).date(),
-                t_max=float(row["t_max"]),
-                t_mean=float(row["t_mean"]),
-                t_min=float(row["t_min"]),
-                city=str(row["city"]),
-            )
-        )
-    return records
-
-
-def log_action(action: str, logger: logging.Logger):
-    def decorator(func):
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            logger.info(f"{action} started.")
-            result = func(*args, **kwargs)
-            logger.info(f"{action} finished successfully")
-            return result
+import time
+from typing import TYPE_CHECKING
+from weather.repositories.weather_repository import WeatherRecordBatch
+from weather.utils.metrics import timed
 
-        return wrapper
+if TYPE_CHECKING:
+    import pandas as pd
 
-    return decorator
 
+@timed("convert")
+def convert_to_batch(df: pd.DataFrame) -> WeatherRecordBatch:
+    """
+    Convert a cleaned single-city DataFrame into a columnar batch
+    straight from its arrays, without iterating over rows.
+    """
+    cities = df["city"].unique()
+    if len(cities) > 1:
+        raise ValueError(f"Expected data for a single city, got {list(cities)}.")
 
-def log_debug_action(action: str, logger: logging.Logger):
+    return WeatherRecordBatch(
+        city=str(cities[0]) if len(cities) else "",
+        time=df["Time"].to_numpy(dtype="datetime64[D]").tolist(),
+        t_max=df["t_max"].to_numpy(dtype="float64").tolist(),
+        t_mean=df["t_mean"].to_numpy(dtype="float64").tolist(),
+        t_min=df["t_min"].to_numpy(dtype="float64").tolist(),
+    )
+
+
+def log_action(action: str, logger: logging.Logger, stage: str | None = None):
+    """
+    Log the start and end of ``action``. With ``stage``, the call is also
+    timed into the stage metrics (and traced when enabled); sized results
+    such as DataFrames or record lists are counted as processed rows.
+    """
+    return _instrument(action, logger, logging.INFO, stage)
+
+
+def log_debug_action(action: str, logger: logging.Logger, stage: str | None = None):
+    return _instrument(action, logger, logging.DEBUG, stage)
+
+
+def _instrument(action: str, logger: logging.Logger, level: int, stage: str | None):
     def decorator(func):
+        target = func if stage is None else timed(stage)(func)
+
         @wraps(func)
         def wrapper(*args, **kwargs):
-            logger.debug(f"{action} started.")
-            result = func(*args, **kwargs)
-            logger.debug(f"{action} finished successfully")
+            logger.log(level, f"{action} started.")
+            start = time.perf_counter()
+            result = target(*args, **kwargs)
+            elapsed = time.perf_counter() - start
+            logger.log(level, f"{action} finished successfully in {elapsed:.3f}s")
             return result
 
         return wrapper
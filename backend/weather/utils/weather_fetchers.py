@@ -1,81 +1,68 @@
 from abc import ABC, abstractmethod
+from datetime import date
+from functools import cache
 import io
 import logging
-from typing import Any
+from typing import IO, Iterator
 import unicodedata
 import zipfile
+from django.conf import settings
 import requests
 import pandas as pd
 
-from weather.repositories.weather_repository import WeatherDataFields
+from weather.utils.metrics import add_bytes, add_rows
 from weather.utils.utils import log_action, log_debug_action
+from weather.utils.weather_sources import (
+    FileWeatherSource,
+    MergeEngine,
+    WeatherSource,
+    WeatherSourceRegistry,
+    align_chunks,
+)
 
 
 logger = logging.getLogger("weather")
 
 
 class WeatherFetcher(ABC):
+    city: str
+
     @abstractmethod
     def fetch(self) -> pd.DataFrame:
         pass
 
+    def fetch_chunks(self, chunk_size: int) -> Iterator[pd.DataFrame]:
+        """Yield the fetched data as consecutive date-ordered chunks."""
+        df = self.fetch()
+        for start in range(0, len(df), chunk_size):
+            yield df.iloc[start : start + chunk_size]
 
-class HungarometWeatherFetcher(WeatherFetcher):
-    BASE_URL_19010101_20231231 = (
-        "https://odp.met.hu/climate/homogenized_data/station_data_series/from_1901"
-    )
-    BASE_URL_20141002_20241231 = (
-        "https://odp.met.hu/climate/observations_hungary/daily/historical/"
-    )
-    MAX_TEMPREATURE_URL = "/maximum_temperature/tx_h_{city}_19012023.csv.zip"
-    MIN_TEMPREATURE_URL = "/minimum_temperature/tn_h_{city}_19012023.csv.zip"
-    MEAN_TEMPREATURE_URL = "/mean_temperature/t_h_{city}_19012023.csv.zip"
-
-    FILENAME_20141002_20241231 = "HABP_1D_{station_number}_20141002_20241231_hist.zip"
 
-    CITY_STATION_NUMBERS = {
-        "Budapest": 34429,
-    }
+class HungarometSource(WeatherSource):
+    """Shared download and parsing helpers for Hungaromet open data files."""
 
     NA = -999
 
-    def __init__(self, city):
-        self._check_city_availability(city)
-        self.city = city
+    # Path of the dataset below the Hungaromet open data host.
+    PATH = ""
 
-    @log_action(action="Fetching weather data", logger=logger)
-    def fetch(self) -> pd.DataFrame:
-        """
-        Collect maximum, mean, and minimum daily temperatures for a city
-        by combining long-term (1901-2023) and recent (2014-2024) datasets.
-        """
-        logger.info("Fetching weather data started.")
-        df_older = self.collect_historical_data()
-        df_recent = self.collect_recent_data()
-
-        df_merged = (
-            df_older.set_index("Time")
-            .combine_first(df_recent.set_index("Time"))
-            .reset_index()
-        )
-        df_merged["city"] = self.city
-
-        logger.info("Fetching weather data finished successfully.")
-        return df_merged
+    def __init__(self, city: str, session=None, base_url: str | None = None):
+        self.city = city
+        # Anything with a requests-compatible get(); lets benchmarks and
+        # tests serve archives without network access.
+        self.session = session or requests
+        self.base_url = (base_url or settings.HUNGAROMET_BASE_URL).rstrip("/")
 
-    def _check_city_availability(self, city: str) -> None:
-        logger.debug(f"Checking {city} city availability")
-        if city not in self.CITY_STATION_NUMBERS:
-            error_msg = f"City '{city}' is not available. Choose from {list(self.CITY_STATION_NUMBERS.keys())}."
-            logger.error(error_msg)
-            raise ValueError(error_msg)
-        logger.debug(f"City {city} is available.")
+    @property
+    def dataset_url(self) -> str:
+        return f"{self.base_url}{self.PATH}"
 
-    @log_debug_action(action="Downloading csv file", logger=logger)
+    @log_debug_action(action="Downloading csv file", logger=logger, stage="download")
     def _download_csv(self, url: str) -> io.BytesIO:
         try:
-            response = requests.get(url)
+            response = self.session.get(url)
             response.raise_for_status()
+            add_bytes("download", len(response.content))
             with zipfile.ZipFile(io.BytesIO(response.content)) as zfile:
                 csv_filename = zfile.namelist()[0]
                 with zfile.open(csv_filename) as f:
@@ -84,7 +71,20 @@ class HungarometWeatherFetcher(WeatherFetcher):
             logger.error(f"Failed to download CSV from {url}: {e}")
             raise ValueError(f"Unable to fetch weather data: {e}") from e
 
-    @log_debug_action(action="Removing accents", logger=logger)
+    @log_debug_action(action="Opening csv stream", logger=logger, stage="download")
+    def _open_csv(self, url: str) -> IO[bytes]:
+        """Download a zip archive and return a lazily decompressing CSV stream."""
+        try:
+            response = self.session.get(url)
+            response.raise_for_status()
+            add_bytes("download", len(response.content))
+        except requests.RequestException as e:
+            logger.error(f"Failed to download CSV from {url}: {e}")
+            raise ValueError(f"Unable to fetch weather data: {e}") from e
+
+        zfile = zipfile.ZipFile(io.BytesIO(response.content))
+        return zfile.open(zfile.namelist()[0])
+
     def _remove_accents(self, text: str) -> str:
         normalized = unicodedata.normalize("NFD", text)
         ret_value = "".join(
@@ -92,55 +92,213 @@ class HungarometWeatherFetcher(WeatherFetcher):
         )  # 'Mn' = non-spacing marks
         return ret_value
 
-    @log_action(action="Collecting historical data", logger=logger)
-    def collect_historical_data(self):
-        """Collect temperature data between 1901-2023."""
+    def clean_dataframe(
+        self, df: pd.DataFrame, rename_map: dict[str, str] = None
+    ) -> pd.DataFrame:
+        """Standardize and clean up a weather DataFrame."""
 
-        city_normalized = self._remove_accents(self.city)
+        df.columns = df.columns.str.strip()
+
+        if rename_map:
+            df = df.rename(columns=rename_map).drop(columns=["EOR"], errors="ignore")
+
+        df = df.replace(self.NA, pd.NA)
+        df["Time"] = pd.to_datetime(df["Time"], format="%Y%m%d")
+
+        return df
+
+
+class HungarometHomogenizedSource(HungarometSource):
+    """Homogenized daily series 1901-2023, one file per temperature column."""
+
+    name = "hungaromet_homogenized"
+    priority = 20
+    coverage = (date(1901, 1, 1), date(2023, 12, 31))
+
+    PATH = "/climate/homogenized_data/station_data_series/from_1901"
+    MAX_TEMPREATURE_URL = "/maximum_temperature/tx_h_{city}_19012023.csv.zip"
+    MIN_TEMPREATURE_URL = "/minimum_temperature/tn_h_{city}_19012023.csv.zip"
+    MEAN_TEMPREATURE_URL = "/mean_temperature/t_h_{city}_19012023.csv.zip"
 
-        datasets = {
-            "t_max": (self.MAX_TEMPREATURE_URL, {"tx": "t_max"}),
-            "t_min": (self.MIN_TEMPREATURE_URL, {"tn": "t_min"}),
-            "t_mean": (self.MEAN_TEMPREATURE_URL, {"ta": "t_mean"}),
-        }
+    def _datasets(self) -> list[tuple[str, dict[str, str]]]:
+        city_normalized = self._remove_accents(self.city)
+        return [
+            (
+                f"{self.dataset_url}{url_template.format(city=city_normalized)}",
+                rename_map,
+            )
+            for url_template, rename_map in (
+                (self.MAX_TEMPREATURE_URL, {"tx": "t_max"}),
+                (self.MIN_TEMPREATURE_URL, {"tn": "t_min"}),
+                (self.MEAN_TEMPREATURE_URL, {"ta": "t_mean"}),
+            )
+        ]
 
+    @log_action(
+        action="Collecting historical data", logger=logger, stage="read_homogenized"
+    )
+    def read(self) -> pd.DataFrame:
+        """Collect temperature data between 1901-2023."""
         dfs: list[pd.DataFrame] = []
-        for _, (url_template, rename_map) in datasets.items():
-            url = f"{self.BASE_URL_19010101_20231231}{url_template.format(city=city_normalized)}"
+        for url, rename_map in self._datasets():
             csv_file = self._download_csv(url)
             df = pd.read_csv(csv_file, sep=";")
             dfs.append(self.clean_dataframe(df, rename_map))
 
-        ret_df = dfs[0].merge(dfs[1], on="Time").merge(dfs[2], on="Time")
-        return ret_df
+        return dfs[0].merge(dfs[1], on="Time").merge(dfs[2], on="Time")
 
-    @log_action(action="Cleaning dataframe", logger=logger)
-    def clean_dataframe(
-        self, df: pd.DataFrame, rename_map: dict[str, str] = None
-    ) -> pd.DataFrame:
-        """Standardize and clean up a weather DataFrame."""
+    def read_chunks(self, chunk_size: int) -> Iterator[pd.DataFrame]:
+        readers = [
+            self._clean_chunks(
+                pd.read_csv(self._open_csv(url), sep=";", chunksize=chunk_size),
+                rename_map,
+            )
+            for url, rename_map in self._datasets()
+        ]
+        for window in align_chunks(readers):
+            if any(df is None for df in window):
+                continue
+            yield window[0].merge(window[1], on="Time").merge(window[2], on="Time")
 
-        df.columns = df.columns.str.strip()
+    def _clean_chunks(
+        self, chunks: Iterator[pd.DataFrame], rename_map: dict[str, str]
+    ) -> Iterator[pd.DataFrame]:
+        for chunk in chunks:
+            yield self.clean_dataframe(chunk, rename_map)
 
-        if rename_map:
-            df = df.rename(columns=rename_map).drop(columns=["EOR"], errors="ignore")
 
-        df.replace(self.NA, pd.NA, inplace=True)
+class HungarometRecentSource(HungarometSource):
+    """Recent daily station observations 2014-2024."""
 
-        return df
+    name = "hungaromet_recent"
+    priority = 10
+    coverage = (date(2014, 10, 2), date(2024, 12, 31))
+
+    PATH = "/climate/observations_hungary/daily/historical/"
+    FILENAME = "HABP_1D_{station_number}_20141002_20241231_hist.zip"
+
+    def __init__(
+        self,
+        city: str,
+        station_number: int,
+        session=None,
+        base_url: str | None = None,
+    ):
+        super().__init__(city, session, base_url)
+        self.station_number = station_number
 
-    @log_action(action="Collecting recent data", logger=logger)
-    def collect_recent_data(self):
-        station_number = self.CITY_STATION_NUMBERS[self.city]
-        url = self.BASE_URL_20141002_20241231 + self.FILENAME_20141002_20241231.format(
-            station_number=station_number
+    def _url(self) -> str:
+        return self.dataset_url + self.FILENAME.format(
+            station_number=self.station_number
         )
-        csv_file = self._download_csv(url)
+
+    @log_action(action="Collecting recent data", logger=logger, stage="read_recent")
+    def read(self) -> pd.DataFrame:
+        csv_file = self._download_csv(self._url())
 
         df = pd.read_csv(csv_file, skiprows=5, sep=";")
 
+        return self._clean_recent_dataframe(df)
+
+    def read_chunks(self, chunk_size: int) -> Iterator[pd.DataFrame]:
+        for chunk in pd.read_csv(
+            self._open_csv(self._url()), skiprows=5, sep=";", chunksize=chunk_size
+        ):
+            yield self._clean_recent_dataframe(chunk)
+
+    def _clean_recent_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
         df.columns = df.columns.str.strip()
         df = df[["Time", "t", "tx", "tn"]]
         df = df.rename(columns={"tx": "t_max", "tn": "t_min", "t": "t_mean"})
 
         return self.clean_dataframe(df)
+
+
+class HungarometWeatherFetcher(WeatherFetcher):
+    """
+    Collects daily temperatures for a city from every source registered for
+    it (by default the long-term and recent Hungaromet datasets, plus any
+    WEATHER_FILE_SOURCES) and merges them by priority.
+    """
+
+    CITY_STATION_NUMBERS = {
+        "Budapest": 34429,
+    }
+
+    def __init__(self, city, registry: WeatherSourceRegistry | None = None):
+        self.registry = registry or default_source_registry()
+        self._check_city_availability(city)
+        self.city = city
+
+    def sources(self) -> list[WeatherSource]:
+        return self.registry.sources_for(self.city)
+
+    @log_action(action="Fetching weather data", logger=logger, stage="fetch")
+    def fetch(self) -> pd.DataFrame:
+        """
+        Collect maximum, mean, and minimum daily temperatures for a city
+        by merging all of its sources.
+        """
+        df_merged = MergeEngine(self.sources()).merge()
+        df_merged["city"] = self.city
+        return df_merged
+
+    def fetch_chunks(self, chunk_size: int) -> Iterator[pd.DataFrame]:
+        """
+        Stream the merged sources as date-ordered chunks.
+
+        The zip archives are downloaded up front, but the CSVs are
+        decompressed and parsed lazily, so the first chunk is available
+        before the files have been fully parsed.
+        """
+        logger.info(f"Streaming weather data in chunks of {chunk_size} rows.")
+        for df_merged in MergeEngine(self.sources()).iter_chunks(chunk_size):
+            df_merged["city"] = self.city
+            add_rows("fetch", len(df_merged))
+            yield df_merged
+
+    def _check_city_availability(self, city: str) -> None:
+        logger.debug(f"Checking {city} city availability")
+        if city not in self.registry.cities():
+            error_msg = (
+                f"City '{city}' is not available. Choose from {self.registry.cities()}."
+            )
+            logger.error(error_msg)
+            raise ValueError(error_msg)
+        logger.debug(f"City {city} is available.")
+
+
+@cache
+def default_source_registry() -> WeatherSourceRegistry:
+    """
+    Registry with the Hungaromet datasets for every known station and the
+    local file sources configured in WEATHER_FILE_SOURCES.
+    """
+    registry = WeatherSourceRegistry()
+
+    for city, station_number in HungarometWeatherFetcher.CITY_STATION_NUMBERS.items():
+        registry.register(city, HungarometHomogenizedSource)
+        registry.register(
+            city,
+            lambda city, station_number=station_number: HungarometRecentSource(
+                city, station_number
+            ),
+            name=HungarometRecentSource.name,
+        )
+
+    for config in settings.WEATHER_FILE_SOURCES:
+        config = dict(config)
+        city = config.pop("city")
+        coverage = tuple(
+            date.fromisoformat(d) if d else None
+            for d in config.pop("coverage", (None, None))
+        )
+        registry.register(
+            city,
+            lambda _city, config=config, coverage=coverage: FileWeatherSource(
+                coverage=coverage, **config
+            ),
+            name=config.get("name"),
+        )
+
+    return registry
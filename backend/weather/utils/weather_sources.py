@@ -0,0 +1,310 @@
+from abc import ABC, abstractmethod
+from datetime import date
+import logging
+from typing import Callable, Iterator
+
+import numpy as np
+import pandas as pd
+
+from weather.repositories.weather_repository import WeatherDataFields
+from weather.utils.utils import log_action
+
+
+logger = logging.getLogger("weather")
+
+
+TEMPERATURE_COLUMNS = [field.value for field in WeatherDataFields]
+
+
+class WeatherSource(ABC):
+    """
+    A single provider of daily temperatures for one city.
+
+    Sources return date-ordered frames with a datetime ``Time`` column and
+    any subset of the temperature columns. When several sources have a value
+    for the same day and column, the one with the higher priority wins;
+    ``column_priority`` overrides the priority for individual columns.
+    """
+
+    name: str = "source"
+    priority: int = 0
+    column_priority: dict[str, int] = {}
+    coverage: tuple[date | None, date | None] = (None, None)
+
+    @abstractmethod
+    def read(self) -> pd.DataFrame:
+        pass
+
+    def read_chunks(self, chunk_size: int) -> Iterator[pd.DataFrame]:
+        df = self.read()
+        for start in range(0, len(df), chunk_size):
+            yield df.iloc[start : start + chunk_size]
+
+    def priority_for(self, column: str) -> int:
+        return self.column_priority.get(column, self.priority)
+
+    def covers(self, start: date | None, end: date | None) -> bool:
+        first, last = self.coverage
+        if start is not None and last is not None and last < start:
+            return False
+        if end is not None and first is not None and first > end:
+            return False
+        return True
+
+
+class FileWeatherSource(WeatherSource):
+    """Local CSV or Parquet file with a date column and temperature columns."""
+
+    def __init__(
+        self,
+        name: str,
+        path: str,
+        priority: int = 0,
+        column_priority: dict[str, int] | None = None,
+        coverage: tuple[date | None, date | None] = (None, None),
+        column_map: dict[str, str] | None = None,
+        date_format: str | None = None,
+        sep: str = ",",
+    ):
+        self.name = name
+        self.path = path
+        self.priority = priority
+        self.column_priority = column_priority or {}
+        self.coverage = coverage
+        self.column_map = column_map or {}
+        self.date_format = date_format
+        self.sep = sep
+
+    def read(self) -> pd.DataFrame:
+        if str(self.path).endswith(".parquet"):
+            df = pd.read_parquet(self.path)
+        else:
+            df = pd.read_csv(self.path, sep=self.sep)
+        return self._standardize(df)
+
+    def read_chunks(self, chunk_size: int) -> Iterator[pd.DataFrame]:
+        if str(self.path).endswith(".parquet"):
+            yield from super().read_chunks(chunk_size)
+            return
+        for chunk in pd.read_csv(self.path, sep=self.sep, chunksize=chunk_size):
+            yield self._standardize(chunk)
+
+    def _standardize(self, df: pd.DataFrame) -> pd.DataFrame:
+        df.columns = df.columns.str.strip()
+        df = df.rename(columns=self.column_map)
+        columns = ["Time"] + [c for c in TEMPERATURE_COLUMNS if c in df.columns]
+        df = df[columns]
+        return df.assign(Time=pd.to_datetime(df["Time"], format=self.date_format))
+
+
+SourceFactory = Callable[[str], WeatherSource]
+
+
+class WeatherSourceRegistry:
+    """Maps cities to the factories of the sources available for them."""
+
+    def __init__(self):
+        self._factories: dict[str, dict[str, SourceFactory]] = {}
+
+    def register(
+        self, city: str, factory: SourceFactory, name: str | None = None
+    ) -> None:
+        """
+        Add a source for ``city``. ``name`` defaults to the factory's own
+        (source classes have one) and must be unique per city, since merged
+        values are attributed to their sources by name.
+        """
+        name = name or getattr(factory, "name", None)
+        if not name:
+            raise ValueError(f"Sources registered for {city} need a name.")
+        factories = self._factories.setdefault(city, {})
+        if name in factories:
+            raise ValueError(
+                f"A source named '{name}' is already registered for {city}; "
+                f"source names must be unique per city."
+            )
+        factories[name] = factory
+
+    def cities(self) -> list[str]:
+        return list(self._factories)
+
+    def sources_for(self, city: str) -> list[WeatherSource]:
+        return [factory(city) for factory in self._factories.get(city, {}).values()]
+
+
+def align_chunks(
+    readers: list[Iterator[pd.DataFrame]], on: str = "Time"
+) -> Iterator[list[pd.DataFrame | None]]:
+    """
+    Advance several date-ordered chunk iterators together.
+
+    Each yielded window holds, for every reader, the rows up to the
+    smallest last date currently buffered among unfinished readers, so
+    rows for the same date always land in the same window.
+    """
+    buffers: list[pd.DataFrame | None] = [None] * len(readers)
+    exhausted = [False] * len(readers)
+
+    while True:
+        for i, reader in enumerate(readers):
+            while not exhausted[i] and (buffers[i] is None or buffers[i].empty):
+                try:
+                    buffers[i] = next(reader)
+                except StopIteration:
+                    exhausted[i] = True
+
+        if all(exhausted):
+            remaining = [buf for buf in buffers if buf is not None and not buf.empty]
+            if remaining:
+                yield buffers
+            return
+
+        cutoff = min(
+            buf[on].iloc[-1] for buf, done in zip(buffers, exhausted) if not done
+        )
+        window = []
+        for i, buf in enumerate(buffers):
+            if buf is None:
+                window.append(None)
+                continue
+            head = buf[on].to_numpy() <= cutoff
+            window.append(buf[head])
+            buffers[i] = buf[~head]
+        yield window
+
+
+class MergeEngine:
+    """
+    Merges N date-ordered sources into one daily frame.
+
+    The union of all dates is built once; every source is then scattered
+    into preallocated column arrays by binary-searched positions, in
+    descending priority per column, so only gaps left by higher-priority
+    sources are filled. A ``<column>_source`` categorical records which
+    source each value came from.
+    """
+
+    def __init__(
+        self,
+        sources: list[WeatherSource],
+        columns: list[str] = TEMPERATURE_COLUMNS,
+        start: date | None = None,
+        end: date | None = None,
+    ):
+        self.sources = [src for src in sources if src.covers(start, end)]
+        self.columns = columns
+        self.start = start
+        self.end = end
+
+    @log_action(action="Merging weather sources", logger=logger, stage="merge")
+    def merge(self) -> pd.DataFrame:
+        return self.merge_frames([src.read() for src in self.sources])
+
+    def iter_chunks(self, chunk_size: int) -> Iterator[pd.DataFrame]:
+        readers = [src.read_chunks(chunk_size) for src in self.sources]
+        # A date repeated across a source's chunk edge lands in two windows.
+        merged_until: list[np.datetime64 | None] = [None] * len(self.sources)
+        for window in align_chunks(readers):
+            merged = self.merge_frames(window, merged_until)
+            for index, df in enumerate(window):
+                if df is not None and not df.empty:
+                    merged_until[index] = df["Time"].max().to_datetime64()
+            if not merged.empty:
+                yield merged
+
+    def merge_frames(
+        self,
+        frames: list[pd.DataFrame | None],
+        merged_until: list[np.datetime64 | None] | None = None,
+    ) -> pd.DataFrame:
+        """
+        Merge one frame per source. Dates a source repeats, also from an
+        earlier window up to its ``merged_until`` date, are dropped after
+        their first row; they are listed per source in
+        ``attrs["source_duplicates"]`` for the quality report.
+        """
+        inputs = []
+        duplicates = {}
+        for index, (src, df) in enumerate(zip(self.sources, frames)):
+            if df is None or df.empty:
+                continue
+            times = df["Time"].to_numpy(dtype="datetime64[D]")
+            keep, duplicated = self._keep_mask(
+                src, times, merged_until[index] if merged_until else None
+            )
+            if duplicated.any():
+                duplicates[src.name] = times[duplicated].astype(str).tolist()
+            inputs.append((index, src, df, times, keep))
+
+        if not inputs:
+            return pd.DataFrame(
+                columns=["Time", *self.columns, *self._source_columns()]
+            )
+
+        union = np.unique(np.concatenate([times[keep] for *_, times, keep in inputs]))
+        positions = {
+            index: np.searchsorted(union, times[keep])
+            for index, _, _, times, keep in inputs
+        }
+
+        data = {"Time": union.astype("datetime64[ns]")}
+        categories = [src.name for src in self.sources]
+        for column in self.columns:
+            values = np.full(union.size, np.nan)
+            provenance = np.full(union.size, -1, dtype=np.int16)
+            ranked = sorted(
+                (item for item in inputs if column in item[2].columns),
+                key=lambda item: item[1].priority_for(column),
+                reverse=True,
+            )
+            for index, _, df, _, keep in ranked:
+                column_values = pd.to_numeric(df[column], errors="coerce").to_numpy(
+                    dtype="float64", na_value=np.nan
+                )[keep]
+                pos = positions[index]
+                fill = ~np.isnan(column_values) & np.isnan(values[pos])
+                values[pos[fill]] = column_values[fill]
+                provenance[pos[fill]] = index
+            data[column] = values
+            data[f"{column}_source"] = pd.Categorical.from_codes(
+                provenance, categories=categories
+            )
+
+        merged = pd.DataFrame(data)
+        merged.attrs["source_duplicates"] = duplicates
+        return merged
+
+    def _keep_mask(
+        self,
+        src: WeatherSource,
+        times: np.ndarray,
+        merged_until: np.datetime64 | None = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Rows inside the source coverage and requested range, first of each
+        date and after ``merged_until``, and the repeated dates in the range
+        that were dropped.
+        """
+        keep = np.ones(times.size, dtype=bool)
+        for first, last in (src.coverage, (self.start, self.end)):
+            if first is not None:
+                keep &= times >= np.datetime64(first, "D")
+            if last is not None:
+                keep &= times <= np.datetime64(last, "D")
+
+        duplicated = np.zeros(times.size, dtype=bool)
+        if merged_until is not None:
+            duplicated |= times <= np.datetime64(merged_until, "D")
+        if times.size > 1 and not np.all(times[1:] > times[:-1]):
+            duplicated |= pd.Index(times).duplicated(keep="first")
+        duplicated &= keep
+        if duplicated.any():
+            logger.warning(
+                f"Source {src.name} has {int(duplicated.sum())} duplicate "
+                f"dates; keeping the first occurrence."
+            )
+            keep &= ~duplicated
+        return keep, duplicated
+
+    def _source_columns(self) -> list[str]:
+        return [f"{column}_source" for column in self.columns]
@@ -1,22 +1,48 @@
-from django.shortcuts import render
+from django.conf import settings
+from django.http import HttpResponse
 import logging
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from weather.serializers import RollingAverageRequestSerializer
-from weather.repositories.weather_repository import DjangoWeatherDataRepository
-from weather.services.weather_services import (
-    RollingAverageService,
-    WeatherDataCollectorService,
-    WeatherDataValidationService,
+from weather.serializers import (
+    ChangesRequestSerializer,
+    QualityReportListRequestSerializer,
+    RollingAverageRequestSerializer,
 )
-from weather.utils.weather_fetchers import HungarometWeatherFetcher
-from weather.utils.utils import convert_to_records
+from weather.repositories.columnar_store import (
+    get_columnar_store,
+    get_read_repository,
+)
+from weather.repositories.quality_report_repository import (
+    DjangoQualityReportRepository,
+)
+from weather.repositories.rolling_series_repository import (
+    DjangoRollingSeriesRepository,
+)
+from weather.repositories.weather_repository import (
+    ChangeCursor,
+    DjangoWeatherDataRepository,
+)
+from weather.services.analytics import RollingAverageService, RollingSeriesService
+from weather.services.warmup import CacheWarmer, HotQuery, hot_queries
+from weather.utils import metrics
+from weather.utils.http_cache import (
+    add_cache_headers,
+    cacheable,
+    cached_json_response,
+    check_preconditions,
+    etag_matches,
+    make_etag,
+    not_modified,
+)
+from weather.utils.profiling import aggregator
 
 
 logger = logging.getLogger("weather")
 
+REPORT_MAX_AGE = 24 * 60 * 60
+
 
 class WeatherDataAPIView(APIView):
     def post(self, request):
@@ -34,23 +60,35 @@ class WeatherDataAPIView(APIView):
                 "message": "Error message"
             }
         """
+        # Collection needs pandas and requests; importing them here keeps them
+        # off the startup and read paths.
+        from weather.services.weather_services import WeatherIngestPipeline
+        from weather.utils.weather_fetchers import HungarometWeatherFetcher
+
         try:
             logger.debug(f"POST request to {self.__class__.__name__} started.")
             repository = DjangoWeatherDataRepository()
             fetcher = HungarometWeatherFetcher(city="Budapest")
-            collector_service = WeatherDataCollectorService(fetcher=fetcher)
 
             if not repository.exists_for_city("Budapest"):
-                collector_service.collect_historical_data()
-                data = collector_service.get_data()
-
-                validator_service = WeatherDataValidationService(dataframe=data)
-                validator_service.clean_data()
-                clean_data = validator_service.get_cleaned_data()
-
-                records = convert_to_records(clean_data)
-
-                repository.save_all(records)
+                pipeline = WeatherIngestPipeline(
+                    fetcher=fetcher,
+                    repository=repository,
+                    report_repository=DjangoQualityReportRepository(),
+                    store=get_columnar_store(),
+                    rolling_series=RollingSeriesService(
+                        repository,
+                        DjangoRollingSeriesRepository(),
+                        settings.WEATHER_ROLLING_WINDOWS,
+                    ),
+                    warmer=CacheWarmer() if settings.WEATHER_WARM_ENABLED else None,
+                )
+                if settings.WEATHER_INGEST_STREAMING:
+                    pipeline.run_streaming(
+                        chunk_size=settings.WEATHER_INGEST_CHUNK_SIZE
+                    )
+                else:
+                    pipeline.run()
             else:
                 logger.debug(
                     "Data for Budapest already exists in the database. Skipping fetch."
@@ -73,6 +111,17 @@ class WeatherDataAPIView(APIView):
 
 
 class RollingAverageAPIView(APIView):
+    def get(self, request):
+        """
+        Same as POST with the parameters in the query string
+        (?city=CityName&window=7&start_date=...&end_date=...), so responses
+        can be cached by proxies and revalidated with If-None-Match.
+
+        The response carries an ETag derived from the city's data version
+        and the parameters; a matching If-None-Match returns 304.
+        """
+        return self._rolling_average(request, request.query_params)
+
     def post(self, request):
         """
         Calculates the rolling average for weather data.
@@ -95,28 +144,263 @@ class RollingAverageAPIView(APIView):
                 },
                 ...
             ]
+
+        JSON bodies are cached per data version and sent gzip/zstd
+        compressed when the client accepts it. Unlike GET responses, POST
+        responses carry no ETag or Cache-Control; a matching If-None-Match
+        returns 412.
         """
+        return self._rolling_average(request, request.data)
+
+    def _rolling_average(self, request, params):
+        serializer = RollingAverageRequestSerializer(data=params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        validated_data = serializer.validated_data
+        query = HotQuery(
+            city=validated_data["city"],
+            window=validated_data["window"],
+            start_date=validated_data.get("start_date"),
+            end_date=validated_data.get("end_date"),
+        )
+
         try:
-            serializer = RollingAverageRequestSerializer(data=request.data)
-            serializer.is_valid(raise_exception=True)
+            hot_queries.record(query)
+
+            repository = get_read_repository()
+            service = RollingAverageService(
+                repository, series_repository=DjangoRollingSeriesRepository()
+            )
+
+            def calculate():
+                return service.calculate(
+                    city=query.city,
+                    window=query.window,
+                    start_date=query.start_date,
+                    end_date=query.end_date,
+                )
+
+            # The version is read before the data, so the data served is
+            # never older than the ETag it is sent with.
+            version = repository.data_version(query.city)
+            etag = None
+            if version is not None:
+                etag = query.etag(version)
+                if request.accepted_renderer.format == "json":
+                    return cached_json_response(request, etag, calculate)
+                precondition = check_preconditions(request, etag)
+                if precondition is not None:
+                    return precondition
 
-            validated_data = serializer.validated_data
-            city = validated_data["city"]
-            window = validated_data["window"]
-            start_date = validated_data.get("start_date")
-            end_date = validated_data.get("end_date")
+            data = calculate()
+        except Exception as e:
+            logger.error(f"Error in RollingAverageAPIView: {e}", exc_info=True)
+            return Response(
+                {"status": "error", "message": str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
 
+        response = Response(data, status=status.HTTP_200_OK)
+        if not cacheable(request):
+            return response
+        return add_cache_headers(response, etag)
+
+
+class WeatherChangesAPIView(APIView):
+    def get(self, request):
+        """
+        Rows inserted or changed since a change token, for incremental sync.
+
+        Query params:
+            city: CityName
+            since: token  # optional, "0" (default) returns every row
+            limit: integer  # optional, defaults at 1000
+
+        Response:
+            {
+                "city": "CityName",
+                "since": token,
+                "next": token,  # pass as ``since`` on the next call
+                "has_more": bool,
+                "changes": [
+                    {
+                        "time": "YYYY-MM-DD",
+                        "t_max": float,
+                        "t_mean": float,
+                        "t_min": float,
+                        "city": "CityName",
+                        "change_seq": integer,
+                        "updated_at": "YYYY-MM-DDTHH:MM:SSZ"
+                    },
+                    ...
+                ]
+            }
+        """
+        serializer = ChangesRequestSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        validated_data = serializer.validated_data
+        city = validated_data["city"]
+        since = validated_data["since"]
+        limit = validated_data["limit"]
+
+        try:
             repository = DjangoWeatherDataRepository()
-            service = RollingAverageService(repository)
+            etag = make_etag(
+                "changes", city, repository.data_version(city), since, limit
+            )
+            if etag_matches(request, etag):
+                return not_modified(etag, max_age=0)
+
+            changes = repository.changes_since(city, since, limit + 1)
+        except Exception as e:
+            logger.error(f"Error in WeatherChangesAPIView: {e}", exc_info=True)
+            return Response(
+                {"status": "error", "message": str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+        if has_more:
+            last = changes[-1]
+            next_cursor = ChangeCursor(last.change_seq, last.record.time)
+        elif changes:
+            next_cursor = ChangeCursor(changes[-1].change_seq)
+        else:
+            next_cursor = since
+
+        data = {
+            "city": city,
+            "since": str(since),
+            "next": str(next_cursor),
+            "has_more": has_more,
+            "changes": [change.to_dict() for change in changes],
+        }
+        return add_cache_headers(
+            Response(data, status=status.HTTP_200_OK), etag, max_age=0
+        )
+
+
+class QualityReportListAPIView(APIView):
+    def get(self, request):
+        """
+        Lists data quality reports of past collection runs, newest first.
+
+        Query params:
+            city: CityName  # optional
+            limit: integer  # optional, defaults at 20
 
-            data = service.calculate(
-                city=city, window=window, start_date=start_date, end_date=end_date
+        Response:
+            [
+                {
+                    "id": integer,
+                    "city": "CityName",
+                    "created_at": "YYYY-MM-DDTHH:MM:SSZ",
+                    "row_count": integer,
+                    "issue_count": integer
+                },
+                ...
+            ]
+        """
+        serializer = QualityReportListRequestSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        validated_data = serializer.validated_data
+
+        try:
+            repository = DjangoQualityReportRepository()
+            reports = repository.list(
+                city=validated_data.get("city"), limit=validated_data["limit"]
             )
         except Exception as e:
-            logger.error(f"Error in RollingAverageAPIView: {e}", exc_info=True)
+            logger.error(f"Error in QualityReportListAPIView: {e}", exc_info=True)
+            return Response(
+                {"status": "error", "message": str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+        etag = make_etag(
+            "quality-reports",
+            validated_data.get("city"),
+            validated_data["limit"],
+            *(r.id for r in reports),
+        )
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        return add_cache_headers(
+            Response([r.to_dict() for r in reports], status=status.HTTP_200_OK), etag
+        )
+
+
+class QualityReportDetailAPIView(APIView):
+    def get(self, request, report_id: int):
+        """
+        Returns a single data quality report with counts, first/last offending
+        dates, gap runs, out-of-range and inconsistent rows per column.
+        """
+        try:
+            report = DjangoQualityReportRepository().get(report_id)
+        except Exception as e:
+            logger.error(f"Error in QualityReportDetailAPIView: {e}", exc_info=True)
             return Response(
                 {"status": "error", "message": str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
-        return Response(data, status=status.HTTP_200_OK)
+        if report is None:
+            return Response(
+                {"status": "error", "message": "Report not found."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        # Stored reports never change.
+        etag = make_etag("quality-report", report.id)
+        if etag_matches(request, etag):
+            return not_modified(etag, max_age=REPORT_MAX_AGE)
+        return add_cache_headers(
+            Response(report.to_dict(), status=status.HTTP_200_OK),
+            etag,
+            max_age=REPORT_MAX_AGE,
+        )
+
+
+class MetricsAPIView(APIView):
+    def get(self, request):
+        """
+        Stage durations, row and byte counters in the Prometheus text format.
+        Returns 404 when WEATHER_METRICS_ENABLED is off.
+        """
+        if not metrics.config.metrics:
+            return Response(
+                {"status": "error", "message": "Metrics are disabled."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        return HttpResponse(
+            metrics.REGISTRY.render(),
+            content_type="text/plain; version=0.0.4; charset=utf-8",
+        )
+
+
+class ProfilingStatsAPIView(APIView):
+    def get(self, request):
+        """
+        Per-endpoint p50/p90/p95/p99 of total, SQL, Python and serialization
+        time plus query counts over the recent requests of this process.
+        Returns 404 when WEATHER_PROFILING_ENABLED is off.
+        """
+        if not settings.WEATHER_PROFILING_ENABLED:
+            return Response(
+                {"status": "error", "message": "Profiling is disabled."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        return Response(aggregator.stats(), status=status.HTTP_200_OK)
+
+    def delete(self, request):
+        """Resets the collected profiles. Returns 404 when profiling is off."""
+        if not settings.WEATHER_PROFILING_ENABLED:
+            return Response(
+                {"status": "error", "message": "Profiling is disabled."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        aggregator.clear()
+        return Response(status=status.HTTP_204_NO_CONTENT)